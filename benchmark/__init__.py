@@ -0,0 +1,3 @@
+# 性能基准测试：
+#   python -m benchmark.data_generator --products 10000 --categories 50 --orders 1000000   生成测试数据
+#   python -m benchmark.run_benchmark --scales small,medium --compare                      运行并与基线比较
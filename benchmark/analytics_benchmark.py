@@ -0,0 +1,139 @@
+from typing import Dict, List, Optional
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+
+# 以 python -m benchmark.analytics_benchmark 或直接运行脚本时都能导入项目模块
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+from benchmark import data_generator
+from model.entities import Order, parse_time_str, ts_to_datetime
+from service.analytics import OrderColumns, NUMPY_AVAILABLE, HISTOGRAM_GRANULARITIES
+
+# 比较两种实现时金额允许的误差（求和顺序不同，浮点结果可能差最后几位）
+AMOUNT_TOLERANCE = 0.01
+
+
+def make_orders(products: List[dict], count: int, seed: int) -> List[Order]:
+    """生成订单对象（与加载数据文件得到的订单相同）"""
+    orders = []
+    for item in data_generator.iter_orders(products, count, random.Random(seed)):
+        order = Order(item["order_id"], item["phone"], item["product_id"], item["buy_count"], item["product_price"])
+        order.create_ts = parse_time_str(item["create_time"])
+        orders.append(order)
+    return orders
+
+
+def python_report(orders: List[Order], categories: Dict[str, str], top_n: int = 10, granularity: str = "day",
+                  category: Optional[str] = None) -> Dict:
+    """纯Python逐个订单累加字典的销售报表（对照组），格式同OrderColumns.report"""
+    seconds = HISTOGRAM_GRANULARITIES[granularity]
+    by_category: Dict[str, List] = {}
+    products: Dict[str, List] = {}
+    periods: Dict[int, List] = {}
+    order_count, sales_count, sales_amount = 0, 0, 0.0
+    for order in orders:
+        current = categories.get(order.product_id)
+        if current is not None:
+            sales = by_category.setdefault(current, [0, 0.0])
+            sales[0] += order.buy_count
+            sales[1] += order.total_amount
+        if category is not None and current != category:
+            continue
+        sales = products.setdefault(order.product_id, [0, 0, 0.0])
+        sales[0] += 1
+        sales[1] += order.buy_count
+        sales[2] += order.total_amount
+        sales = periods.setdefault(order.create_ts - order.create_ts % seconds, [0, 0, 0.0])
+        sales[0] += 1
+        sales[1] += order.buy_count
+        sales[2] += order.total_amount
+        order_count += 1
+        sales_count += order.buy_count
+        sales_amount += order.total_amount
+    ranked = heapq.nsmallest(top_n, products.items(), key=lambda item: (-round(item[1][2], 2), item[0]))
+    return {
+        "by_category": {name: {"sales_count": count, "sales_amount": round(amount, 2)}
+                        for name, (count, amount) in by_category.items()},
+        "top_products": [{"product_id": product_id, "order_count": orders, "sales_count": count,
+                          "sales_amount": round(amount, 2)} for product_id, (orders, count, amount) in ranked],
+        "histogram": [{"period": ts_to_datetime(period), "order_count": orders, "sales_count": count,
+                       "sales_amount": round(amount, 2)} for period, (orders, count, amount) in sorted(periods.items())],
+        "order_count": order_count,
+        "sales_count": sales_count,
+        "sales_amount": round(sales_amount, 2),
+        "average_order_value": round(sales_amount / order_count, 2) if order_count else 0.0,
+        "engine": "python",
+    }
+
+
+def _same(expected, actual) -> bool:
+    """比较两份报表（忽略engine，金额允许浮点误差）"""
+    if isinstance(expected, dict):
+        return expected.keys() == actual.keys() and all(
+            key == "engine" or _same(value, actual[key]) for key, value in expected.items())
+    if isinstance(expected, list):
+        return len(expected) == len(actual) and all(map(_same, expected, actual))
+    if isinstance(expected, float) or isinstance(actual, float):
+        return abs(expected - actual) < AMOUNT_TOLERANCE
+    return expected == actual
+
+
+def _best(func, repeat: int):
+    """重复运行取最短耗时，返回(结果, 秒)"""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def run(products: int, categories: int, orders: int, repeat: int = 3, seed: int = 2024) -> bool:
+    """生成数据后分别计时两种实现的各类报表，并核对结果一致；返回是否全部一致"""
+    if not NUMPY_AVAILABLE:
+        sys.exit("未安装NumPy，无法比较列存统计引擎（pip install numpy）")
+    rng = random.Random(seed)
+    product_list = data_generator.generate_products(products, categories, rng)
+    print(f"生成数据：商品{products}个，分类{categories}个，订单{orders}个")
+    order_list = make_orders(product_list, orders, seed)
+    product_categories = {item["product_id"]: item["category"] for item in product_list}
+    # 删除一部分商品、给一部分商品改分类，覆盖“按商品当前分类统计”的口径
+    for item in product_list[::50]:
+        del product_categories[item["product_id"]]
+    for item in product_list[1::50]:
+        product_categories[item["product_id"]] = product_list[0]["category"]
+
+    columns, build_time = _best(lambda: OrderColumns.build(order_list, product_categories), 1)
+    print(f"构建订单列存：{build_time * 1000:.1f}ms")
+    print(f"{'报表':<28}{'Python(ms)':>14}{'NumPy(ms)':>14}{'加速':>10}  结果")
+    all_same = True
+    cases = [("day", None), ("hour", None), ("day", product_list[0]["category"])]
+    for granularity, category in cases:
+        expected, python_time = _best(
+            lambda: python_report(order_list, product_categories, 10, granularity, category), repeat)
+        actual, numpy_time = _best(lambda: columns.report(10, granularity, category), repeat)
+        same = _same(expected, actual)
+        all_same = all_same and same
+        name = f"{granularity}/{category or '全部'}"
+        print(f"{name:<28}{python_time * 1000:>14.1f}{numpy_time * 1000:>14.1f}"
+              f"{python_time / numpy_time:>9.1f}x  {'一致' if same else '不一致'}")
+    return all_same
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="销售报表：纯Python与NumPy列存引擎的耗时对比")
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=3, help="每个报表重复次数（取最短耗时）")
+    parser.add_argument("--seed", type=int, default=2024)
+    args = parser.parse_args()
+    if not run(args.products, args.categories, args.orders, args.repeat, args.seed):
+        sys.exit(1)
@@ -0,0 +1,114 @@
+from typing import List, Optional
+import argparse
+import datetime
+import itertools
+import json
+import random
+from model.entities import TIME_FORMAT
+
+# 商品热度服从Zipf分布：排名第r的商品被购买的权重为 1 / r^POPULARITY_SKEW
+POPULARITY_SKEW = 1.1
+# 平均每个客户（手机号）的订单数
+ORDERS_PER_CUSTOMER = 5
+# 订单时间分布在生成时刻之前的这么多天内
+ORDER_DAYS = 365
+# 每次批量抽样的订单数（避免一次性在内存中构造百万级列表）
+_BATCH_SIZE = 10000
+
+_NAME_WORDS = ["经典", "精选", "加大", "便携", "家用", "进口", "有机", "限量", "轻薄", "智能"]
+
+# 默认管理员账号（与Service层初始化的账号一致，基准测试用lsl登录）
+DEFAULT_USERS = [
+    {"username": "lsl", "password": "Lsl123", "is_super": True, "login_fail_count": 0, "lock_time": 0},
+    {"username": "user1", "password": "User123456", "is_super": False, "login_fail_count": 0, "lock_time": 0},
+]
+
+
+def product_id(index: int) -> str:
+    return f"P{index:06d}"
+
+
+def _weights(count: int) -> List[float]:
+    """Zipf权重的累计值（供random.choices的cum_weights使用）"""
+    return list(itertools.accumulate(1 / (rank ** POPULARITY_SKEW) for rank in range(1, count + 1)))
+
+
+def generate_products(count: int, categories: int, rng: random.Random) -> List[dict]:
+    """生成商品：分类数量也不均匀（前面的分类商品更多），库存足够支撑基准测试下单"""
+    category_names = [f"分类{index:02d}" for index in range(1, categories + 1)]
+    category_weights = _weights(categories)
+    products = []
+    for index in range(1, count + 1):
+        products.append({
+            "product_id": product_id(index),
+            "name": f"{rng.choice(_NAME_WORDS)}商品{index}",
+            "category": rng.choices(category_names, cum_weights=category_weights)[0],
+            "price": round(rng.uniform(1, 500), 1),
+            "stock": rng.randint(1000, 100000),
+        })
+    return products
+
+
+def iter_orders(products: List[dict], count: int, rng: random.Random,
+                now: Optional[datetime.datetime] = None):
+    """逐个生成订单：商品按Zipf热度抽样（少数爆款占大部分订单），老客户重复下单"""
+    now = now or datetime.datetime.now().replace(microsecond=0)
+    product_weights = _weights(len(products))
+    customers = max(1, count // ORDERS_PER_CUSTOMER)
+    customer_weights = _weights(customers)
+    phones = [f"1{rng.randint(3, 9)}{rng.randint(0, 999999999):09d}" for _ in range(customers)]
+    span = ORDER_DAYS * 86400
+
+    number = 0
+    while number < count:
+        batch = min(_BATCH_SIZE, count - number)
+        picked = rng.choices(products, cum_weights=product_weights, k=batch)
+        buyers = rng.choices(phones, cum_weights=customer_weights, k=batch)
+        for product, phone in zip(picked, buyers):
+            number += 1
+            buy_count = rng.randint(1, 5)
+            yield {
+                "order_id": f"O{number:08d}",
+                "phone": phone,
+                "product_id": product["product_id"],
+                "buy_count": buy_count,
+                "product_price": product["price"],
+                "total_amount": round(product["price"] * buy_count, 2),
+                "create_time": (now - datetime.timedelta(seconds=rng.randint(0, span))).strftime(TIME_FORMAT),
+            }
+
+
+def _write_array(f, name: str, items, last: bool = False) -> None:
+    f.write(f'  "{name}": [\n')
+    first = True
+    for item in items:
+        if not first:
+            f.write(",\n")
+        f.write("    " + json.dumps(item, ensure_ascii=False))
+        first = False
+    f.write("\n  ]" + ("\n" if last else ",\n"))
+
+
+def generate_data_file(path: str, products: int = 10000, categories: int = 50, orders: int = 1000000,
+                       seed: int = 2024) -> None:
+    """生成与mall_data.txt结构相同的数据文件：订单逐条写出，不在内存中构造完整数据"""
+    rng = random.Random(seed)
+    product_list = generate_products(products, categories, rng)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{\n")
+        _write_array(f, "users", DEFAULT_USERS)
+        _write_array(f, "products", product_list)
+        _write_array(f, "orders", iter_orders(product_list, orders, rng), last=True)
+        f.write("}\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="生成商城基准测试数据（mall_data.txt格式）")
+    parser.add_argument("--output", default="mall_data.txt")
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=2024)
+    args = parser.parse_args()
+    generate_data_file(args.output, args.products, args.categories, args.orders, args.seed)
+    print(f"已生成 {args.output}：商品{args.products}个，分类{args.categories}个，订单{args.orders}个")
@@ -0,0 +1,85 @@
+from typing import Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import getpass
+import json
+import sys
+import time
+
+# 对运行中的API服务（python -m view.api_server）测吞吐：
+# 每个连接使用长连接，一次流水线发送pipeline个请求后再依次读取响应
+DEFAULT_URL_PATH = "/statistics"
+
+
+async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    """读取一个响应，返回(状态码, 响应体)"""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def login(host: str, port: int, username: str, password: str) -> Optional[str]:
+    """登录获取令牌（失败返回None）"""
+    reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps({"username": username, "password": password}).encode("utf-8")
+    writer.write(f"POST /login HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n"
+                 f"Connection: close\r\n\r\n".encode("latin-1") + body)
+    status, payload = await _read_response(reader)
+    writer.close()
+    await writer.wait_closed()
+    return json.loads(payload)["data"]["token"] if status == 200 else None
+
+
+async def _client(host: str, port: int, path: str, token: str, requests: int, pipeline: int,
+                  statuses: Dict[int, int]) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAuthorization: Bearer {token}\r\n\r\n".encode("latin-1")
+    sent = 0
+    while sent < requests:
+        batch = min(pipeline, requests - sent)
+        writer.write(request * batch)
+        await writer.drain()
+        for _ in range(batch):
+            status, _ = await _read_response(reader)
+            statuses[status] = statuses.get(status, 0) + 1
+        sent += batch
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run(host: str, port: int, token: str, path: str = DEFAULT_URL_PATH, connections: int = 8,
+              requests: int = 1000, pipeline: int = 8) -> Dict:
+    """connections个连接并发，每个连接发送requests个请求，返回吞吐统计"""
+    statuses: Dict[int, int] = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, path, token, requests, pipeline, statuses) for _ in range(connections)))
+    seconds = time.perf_counter() - start
+    total = sum(statuses.values())
+    return {"requests": total, "seconds": seconds, "rps": total / seconds if seconds else 0.0, "statuses": statuses}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API服务吞吐测试")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--path", default=DEFAULT_URL_PATH, help="请求的GET接口")
+    parser.add_argument("--user", default="lsl", help="登录账号")
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=1000, help="每个连接的请求数")
+    parser.add_argument("--pipeline", type=int, default=8, help="每个连接流水线发送的请求数，1表示不使用流水线")
+    args = parser.parse_args()
+
+    session_token = asyncio.run(login(args.host, args.port, args.user, getpass.getpass("密码：")))
+    if not session_token:
+        sys.exit("登录失败：用户名或密码错误")
+    result = asyncio.run(run(args.host, args.port, session_token, args.path, args.connections, args.requests,
+                             args.pipeline))
+    codes: List[str] = [f"{code}×{count}" for code, count in sorted(result["statuses"].items())]
+    print(f"{result['requests']}个请求，耗时{result['seconds']:.2f}s，"
+          f"{result['rps']:.0f} 请求/秒（状态码：{', '.join(codes)}）")
@@ -0,0 +1,189 @@
+from typing import Dict, List, Optional
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+# 以 python -m benchmark.run_benchmark 或直接运行脚本时都能导入项目模块（运行中会切换工作目录）
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+from benchmark import data_generator
+from utils.metrics import Histogram
+
+# 数据规模：名称 -> (商品数, 分类数, 订单数)
+SCALES = {
+    "small": (1000, 10, 10000),
+    "medium": (5000, 30, 100000),
+    "large": (10000, 50, 1000000),
+}
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# 中位数比基线慢超过该比例视为性能退化
+REGRESSION_THRESHOLD = 0.2
+# 预填充日志使用的样例行（模拟长期运行后积累的日志）
+_LOG_LINE = "2024-01-01 00:00:00 - lsl - create_order - 0.0012s - success: O{:08d}\n"
+
+
+def _timed(histogram: Histogram, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    histogram.observe(time.perf_counter() - start)
+    return result
+
+
+def _seed_log(log_file: str, lines: int, max_bytes: int) -> int:
+    """预填充日志文件，返回写入的行数（保持在轮转大小以内，避免刚写入就被归档）"""
+    lines = min(lines, int(max_bytes * 0.9) // len(_LOG_LINE.format(0).encode("utf-8")))
+    with open(log_file, "a", encoding="utf-8") as f:
+        f.writelines(_LOG_LINE.format(number) for number in range(lines))
+    return lines
+
+
+def run_scale(name: str, work_dir: str, repeat: int, operations: int) -> Dict[str, Dict]:
+    """在独立目录中生成数据并运行一个规模的全部基准，返回 {基准名: 耗时统计}"""
+    products, categories, orders = SCALES[name]
+    scale_dir = os.path.join(work_dir, name)
+    os.makedirs(scale_dir)
+    os.chdir(scale_dir)  # 数据文件、日志、备份都使用相对路径，切换目录后互不干扰
+
+    from utils import log_config
+    from dao import data_handler
+    from service.mall_service import MallSystem
+    log_config.init_log()  # 日志写到当前规模的目录
+
+    print(f"[{name}] 生成数据：商品{products}个，分类{categories}个，订单{orders}个")
+    data_generator.generate_data_file(data_handler.DATA_FILE, products, categories, orders)
+    results = {bench: Histogram() for bench in (
+        "load_data", "save_data", "backup_data_full", "backup_data_delta",
+        "create_order", "cancel_order", "get_order_statistics", "get_recent_logs")}
+
+    # DAO层：加载/保存/备份
+    for _ in range(repeat):
+        users, product_list, order_list = _timed(results["load_data"], data_handler.load_data)
+    for _ in range(repeat):
+        _timed(results["save_data"], data_handler.save_data, users, product_list, order_list)
+    for _ in range(repeat):
+        _timed(results["backup_data_full"], data_handler.backup_data, True)
+    del users, product_list, order_list
+
+    # Service层：下单/撤单/统计（每次操作单独计时）
+    system = MallSystem()
+    token = system.login("lsl", "Lsl123")
+    rng = random.Random(operations)
+    product_ids = [data_generator.product_id(index) for index in range(1, products + 1)]
+    order_ids = [f"B{number:08d}" for number in range(operations)]
+    for order_id in order_ids:
+        _timed(results["create_order"], system.create_order, token, order_id, "13800000000", rng.choice(product_ids), "1")
+    for _ in range(repeat):
+        _timed(results["backup_data_delta"], data_handler.backup_data)
+    for order_id in order_ids:
+        _timed(results["cancel_order"], system.cancel_order, token, order_id)
+    for _ in range(operations):
+        _timed(results["get_order_statistics"], system.get_order_statistics, token)
+
+    # 日志查询：日志大小与历史操作量相关
+    log_config.flush_log()
+    _seed_log(log_config.LOG_FILE, orders, log_config.LOG_MAX_BYTES)
+    for _ in range(operations):
+        _timed(results["get_recent_logs"], system.get_recent_logs, token, "fail" if rng.random() < 0.5 else None)
+
+    system.flush()
+    os.chdir(work_dir)
+    return {bench: histogram.summary() for bench, histogram in results.items()}
+
+
+def compare(results: Dict, baseline: Dict, threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """与基线比较中位数耗时，返回退化项说明（两边都有的规模和基准才比较）"""
+    regressions = []
+    for scale, benches in results["scales"].items():
+        for bench, summary in benches.items():
+            base = baseline.get("scales", {}).get(scale, {}).get(bench)
+            if not base or not base["p50"]:
+                continue
+            ratio = summary["p50"] / base["p50"]
+            flag = "退化" if ratio > 1 + threshold else ("提升" if ratio < 1 - threshold else "持平")
+            print(f"{scale:>8} {bench:<22} 基线{base['p50'] * 1000:>10.3f}ms  "
+                  f"当前{summary['p50'] * 1000:>10.3f}ms  x{ratio:.2f} {flag}")
+            if ratio > 1 + threshold:
+                regressions.append(f"{scale}/{bench}: x{ratio:.2f}")
+    return regressions
+
+
+def run(scales: List[str], repeat: int = 3, operations: int = 200, work_dir: Optional[str] = None) -> Dict:
+    """运行基准：每个规模使用单独的临时目录，结束后删除（指定work_dir时保留）"""
+    original_dir = os.getcwd()
+    keep = work_dir is not None
+    work_dir = os.path.abspath(work_dir) if keep else tempfile.mkdtemp(prefix="mall_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+    results = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "operations": operations,
+        },
+        "scales": {},
+    }
+    try:
+        for name in scales:
+            results["scales"][name] = run_scale(name, work_dir, repeat, operations)
+    finally:
+        os.chdir(original_dir)
+        if not keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def _print_results(results: Dict) -> None:
+    for scale, benches in results["scales"].items():
+        print(f"\n规模 {scale}（耗时单位ms）")
+        print(f"{'基准':<24}{'次数':>6}{'平均':>12}{'P50':>12}{'P95':>12}{'P99':>12}{'最大':>12}")
+        for bench, summary in benches.items():
+            print(f"{bench:<24}{summary['count']:>6}" + "".join(
+                f"{summary[key] * 1000:>12.3f}" for key in ("mean", "p50", "p95", "p99", "max")))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="商城系统性能基准测试")
+    parser.add_argument("--scales", default="small,medium", help=f"逗号分隔，可选：{', '.join(SCALES)}")
+    parser.add_argument("--repeat", type=int, default=3, help="加载/保存/备份的重复次数")
+    parser.add_argument("--operations", type=int, default=200, help="下单/撤单/统计/查日志的操作次数")
+    parser.add_argument("--output", default="benchmark_results.json", help="结果JSON文件")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="基线JSON文件")
+    parser.add_argument("--compare", action="store_true", help="与基线比较，有退化时以状态码1退出")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--work-dir", help="数据目录（默认使用临时目录并在结束后删除）")
+    args = parser.parse_args()
+
+    scale_names = [name.strip() for name in args.scales.split(",") if name.strip()]
+    unknown = [name for name in scale_names if name not in SCALES]
+    if unknown:
+        parser.error(f"未知规模：{', '.join(unknown)}")
+
+    bench_results = run(scale_names, args.repeat, args.operations, args.work_dir)
+    _print_results(bench_results)
+    with open(args.output, "w", encoding="utf-8") as out:
+        json.dump(bench_results, out, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入 {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as out:
+            json.dump(bench_results, out, ensure_ascii=False, indent=2)
+        print(f"基线已保存到 {args.baseline}")
+    elif args.compare:
+        if not os.path.exists(args.baseline):
+            sys.exit(f"基线文件不存在：{args.baseline}（先用 --save-baseline 生成）")
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline_results = json.load(f)
+        print()
+        found = compare(bench_results, baseline_results)
+        if found:
+            print("性能退化：" + "；".join(found))
+            sys.exit(1)
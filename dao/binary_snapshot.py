@@ -0,0 +1,406 @@
+from typing import List, Dict, Optional, Iterator, Iterable, Tuple
+from collections.abc import MutableMapping, ValuesView
+import mmap
+import os
+import struct
+import sys
+import threading
+import weakref
+from model.entities import User, Product, Order
+
+# 二进制快照：定长记录 + 字符串表，可用mmap打开，订单在访问时才构造为Order对象
+# 文件布局：文件头 | 字符串偏移表 | 字符串数据 | 用户 | 商品 | 订单 | 订单编号排序索引 | 商品销售汇总
+MAGIC = b"MALLBIN1"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sIIIIII7Q")      # 魔数、版本、5个数量、7个区段偏移
+_STR_OFFSET = struct.Struct("<Q")
+_USER = struct.Struct("<IIBid")             # 用户名、密码、是否超管、失败次数、锁定时间（后两项仅为兼容保留）
+_PRODUCT = struct.Struct("<IIIdq")          # 编号、名称、分类、单价、库存
+_ORDER = struct.Struct("<IIIIddq")          # 编号、手机号、商品编号、数量、下单单价、总金额、下单时间（整数秒）
+_ID_INDEX = struct.Struct("<I")             # 按订单编号排序后的订单序号
+_SALES = struct.Struct("<IIqd")             # 商品编号、订单数、销售数量、销售额
+
+
+def is_binary_snapshot(path: str) -> bool:
+    """根据文件开头的魔数判断是否为二进制快照"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class _StringTable:
+    """写快照时收集字符串并去重（手机号、商品编号、分类大量重复）"""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.strings: List[bytes] = []
+
+    def add(self, value: str) -> int:
+        idx = self.index.get(value)
+        if idx is None:
+            idx = len(self.strings)
+            self.index[value] = idx
+            self.strings.append(value.encode("utf-8"))
+        return idx
+
+
+def write_snapshot(path: str, users: Iterable[User], products: Iterable[Product], orders: Iterable[Order]) -> None:
+    """写二进制快照：先写临时文件再替换。orders为LazyOrderMap的values()时，写完后该订单集合改为读取新文件"""
+    strings = _StringTable()
+    user_blob = bytearray()
+    for user in users:
+        user_blob += _USER.pack(strings.add(user.username), strings.add(user.password),
+                                1 if user.is_super else 0, int(user.login_fail_count), float(user.lock_time))
+    product_blob = bytearray()
+    for product in products:
+        product_blob += _PRODUCT.pack(strings.add(product.product_id), strings.add(product.name),
+                                      strings.add(product.category), product.price, product.stock)
+    order_blob = bytearray()
+    order_ids: List[Tuple[str, int]] = []
+    sales: Dict[str, List] = {}
+    for i, order in enumerate(orders):
+        order_blob += _ORDER.pack(strings.add(order.order_id), strings.add(order.phone),
+                                  strings.add(order.product_id), order.buy_count,
+                                  order.product_price, order.total_amount, order.create_ts)
+        order_ids.append((order.order_id, i))
+        item = sales.setdefault(order.product_id, [0, 0, 0.0])
+        item[0] += 1
+        item[1] += order.buy_count
+        item[2] += order.total_amount
+    # 订单编号排序索引：打开快照后按编号二分查找，不必建立字典
+    order_ids.sort()
+    id_index_blob = b"".join(_ID_INDEX.pack(i) for _, i in order_ids)
+    sales_blob = b"".join(_SALES.pack(strings.add(pid), *item) for pid, item in sales.items())
+
+    str_offsets = bytearray()
+    position = 0
+    for value in strings.strings:
+        str_offsets += _STR_OFFSET.pack(position)
+        position += len(value)
+    str_offsets += _STR_OFFSET.pack(position)
+    str_blob = b"".join(strings.strings)
+
+    sections = [str_offsets, str_blob, user_blob, product_blob, order_blob, id_index_blob, sales_blob]
+    offsets = []
+    position = _HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+    header = _HEADER.pack(MAGIC, VERSION, len(strings.strings), len(user_blob) // _USER.size,
+                          len(product_blob) // _PRODUCT.size, len(order_blob) // _ORDER.size,
+                          len(sales), *offsets)
+
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(header)
+        for section in sections:
+            f.write(section)
+        f.flush()
+        os.fsync(f.fileno())
+
+    source = orders.mapping if isinstance(orders, _OrderValues) else None
+    closed = release(path, keep=source)
+    try:
+        os.replace(tmp_file, path)
+    except OSError:
+        if closed:
+            source.snapshot.reopen()  # 旧文件仍在，继续读取
+        raise
+    if source is not None:
+        # 新文件的内容就是source当前的全部订单
+        source.rebase(BinarySnapshot(path))
+
+
+# 正在按需读取快照文件的订单集合（id -> 集合），替换快照文件前据此关闭对应的mmap
+_open_maps: "weakref.WeakValueDictionary[int, LazyOrderMap]" = weakref.WeakValueDictionary()
+_open_lock = threading.Lock()
+
+
+def release(path: str, keep: Optional["LazyOrderMap"] = None) -> bool:
+    """替换或覆盖path之前调用：关闭所有映射该文件的快照（Windows下被映射的文件不能替换，
+    POSIX下也不应继续读取已被替换的旧文件）。keep为随后改为读取新文件的订单集合，只关闭不读取；
+    其他仍在使用该文件的订单集合先把剩余订单构造到内存中。返回keep的快照是否被关闭"""
+    path = os.path.abspath(path)
+    with _open_lock:
+        maps = [orders for orders in _open_maps.values() if orders.snapshot.path == path]
+    closed = False
+    for orders in maps:
+        if orders is keep:
+            orders.snapshot.close()
+            closed = True
+        else:
+            orders.detach()
+    return closed
+
+
+class BinarySnapshot:
+    """以只读mmap方式打开的二进制快照"""
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self.reopen()
+        (magic, version, self.n_strings, self.n_users, self.n_products, self.n_orders, self.n_sales,
+         self.str_offsets_off, self.str_blob_off, self.users_off, self.products_off,
+         self.orders_off, self.id_index_off, self.sales_off) = _HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"不是有效的二进制快照文件：{path}")
+
+    @property
+    def closed(self) -> bool:
+        return self.mm is None
+
+    def reopen(self) -> None:
+        with open(self.path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self) -> None:
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+
+    def string(self, idx: int) -> str:
+        start, end = struct.unpack_from("<QQ", self.mm, self.str_offsets_off + idx * _STR_OFFSET.size)
+        return self.mm[self.str_blob_off + start:self.str_blob_off + end].decode("utf-8")
+
+    def users(self) -> List[User]:
+        users = []
+        for i in range(self.n_users):
+            name, password, is_super, fail_count, lock_time = _USER.unpack_from(self.mm, self.users_off + i * _USER.size)
+            user = User(self.string(name), self.string(password), bool(is_super))
+            user.login_fail_count = fail_count
+            user.lock_time = lock_time
+            users.append(user)
+        return users
+
+    def products(self) -> List[Product]:
+        products = []
+        for i in range(self.n_products):
+            pid, name, category, price, stock = _PRODUCT.unpack_from(self.mm, self.products_off + i * _PRODUCT.size)
+            products.append(Product(self.string(pid), self.string(name), self.string(category), price, stock))
+        return products
+
+    def order_at(self, i: int) -> Order:
+        """按序号构造订单对象"""
+        order_id, phone, pid, buy_count, price, _total, create_ts = _ORDER.unpack_from(
+            self.mm, self.orders_off + i * _ORDER.size)
+        order = Order(self.string(order_id), self.string(phone), self.string(pid), buy_count, price)
+        order.create_ts = create_ts
+        return order
+
+    def order_id_at(self, i: int) -> str:
+        return self.string(struct.unpack_from("<I", self.mm, self.orders_off + i * _ORDER.size)[0])
+
+    def find_order(self, order_id: str) -> Optional[int]:
+        """按订单编号二分查找，返回订单序号"""
+        lo, hi = 0, self.n_orders
+        while lo < hi:
+            mid = (lo + hi) // 2
+            i = _ID_INDEX.unpack_from(self.mm, self.id_index_off + mid * _ID_INDEX.size)[0]
+            mid_id = self.order_id_at(i)
+            if mid_id == order_id:
+                return i
+            if mid_id < order_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def product_sales(self) -> Dict[str, List]:
+        """写快照时预先汇总的商品销售数据：{商品编号: [订单数, 销售数量, 销售额]}"""
+        sales = {}
+        for i in range(self.n_sales):
+            pid, orders, count, amount = _SALES.unpack_from(self.mm, self.sales_off + i * _SALES.size)
+            sales[self.string(pid)] = [orders, count, amount]
+        return sales
+
+
+class _OrderValues(ValuesView):
+    """订单值视图：遍历时按需构造，支持len()"""
+
+    @property
+    def mapping(self) -> "LazyOrderMap":
+        return self._mapping
+
+    def __iter__(self) -> Iterator[Order]:
+        return self._mapping.iter_orders()
+
+
+class _NoSnapshot:
+    """detach之后的空快照：订单全部在内存中"""
+    path = None
+    n_orders = 0
+
+    def close(self) -> None:
+        pass
+
+    def find_order(self, order_id: str) -> None:
+        return None
+
+    def product_sales(self) -> Dict[str, List]:
+        return {}
+
+
+class LazyOrderMap(MutableMapping):
+    """按订单编号访问的订单集合：快照中的订单按需构造，新增/删除记录在内存中叠加。
+    非线程安全：读取与写快照（write_snapshot会切换本集合读取的文件）由调用方串行，MallSystem在提交锁内访问订单"""
+
+    def __init__(self, snapshot: BinarySnapshot):
+        self.snapshot = snapshot
+        self._overlay: Dict[str, Order] = {}  # 新增的订单及已访问过的快照订单
+        self._replaced = set()                # 被重新赋值的快照订单编号
+        self._deleted = set()                 # 已删除的快照订单编号
+        self._extra = 0                       # 不在快照中的新增订单数
+        with _open_lock:
+            _open_maps[id(self)] = self
+
+    def rebase(self, snapshot: BinarySnapshot) -> None:
+        """改为读取新快照（其中的订单与本集合当前内容一致）：内存中的增删改都已包含在新快照中，
+        已构造的订单对象保留，多次访问仍得到同一个对象"""
+        old, self.snapshot = self.snapshot, snapshot
+        self._replaced = set()
+        self._deleted = set()
+        self._extra = 0
+        old.close()
+
+    def detach(self) -> None:
+        """不再读取快照文件：把尚未构造的订单全部构造到内存中（快照文件即将被其他内容替换时使用）"""
+        if isinstance(self.snapshot, _NoSnapshot):
+            return
+        self._overlay = {order_id: order if order is not None else self.snapshot.order_at(i)
+                         for order_id, order, i in self._iter_entries()}
+        self.snapshot.close()
+        self.snapshot = _NoSnapshot()
+        self._replaced = set()
+        self._deleted = set()
+        self._extra = len(self._overlay)
+
+    def __getitem__(self, order_id: str) -> Order:
+        order = self._overlay.get(order_id)
+        if order is not None:
+            return order
+        if order_id in self._deleted:
+            raise KeyError(order_id)
+        i = self.snapshot.find_order(order_id)
+        if i is None:
+            raise KeyError(order_id)
+        # 缓存已访问的订单，保证多次访问得到同一个对象
+        order = self._overlay[order_id] = self.snapshot.order_at(i)
+        return order
+
+    def __setitem__(self, order_id: str, order: Order) -> None:
+        if order_id in self._deleted:
+            self._deleted.discard(order_id)
+            self._replaced.add(order_id)
+        elif order_id not in self._overlay:
+            if self.snapshot.find_order(order_id) is None:
+                self._extra += 1
+            else:
+                self._replaced.add(order_id)
+        elif self._overlay[order_id] is not order and self.snapshot.find_order(order_id) is not None:
+            self._replaced.add(order_id)
+        self._overlay[order_id] = order
+
+    def __delitem__(self, order_id: str) -> None:
+        if order_id in self._deleted:
+            raise KeyError(order_id)
+        if self.snapshot.find_order(order_id) is not None:
+            self._deleted.add(order_id)
+            self._replaced.discard(order_id)
+            self._overlay.pop(order_id, None)
+        elif order_id in self._overlay:
+            del self._overlay[order_id]
+            self._extra -= 1
+        else:
+            raise KeyError(order_id)
+
+    def __contains__(self, order_id) -> bool:
+        if order_id in self._overlay:
+            return True
+        return order_id not in self._deleted and self.snapshot.find_order(order_id) is not None
+
+    def __len__(self) -> int:
+        return self.snapshot.n_orders - len(self._deleted) + self._extra
+
+    def _iter_entries(self) -> Iterator[Tuple[str, Optional[Order], int]]:
+        """先按快照顺序，再按新增顺序：返回(订单编号, 内存中的订单或None, 快照序号)"""
+        seen = set()
+        for i in range(self.snapshot.n_orders):
+            order_id = self.snapshot.order_id_at(i)
+            if order_id in self._deleted:
+                continue
+            order = self._overlay.get(order_id)
+            if order is not None:
+                seen.add(order_id)
+            yield order_id, order, i
+        for order_id, order in self._overlay.items():
+            if order_id not in seen:
+                yield order_id, order, -1
+
+    def __iter__(self) -> Iterator[str]:
+        for order_id, _, _ in self._iter_entries():
+            yield order_id
+
+    def iter_orders(self) -> Iterator[Order]:
+        """遍历订单：快照中未访问过的订单临时构造、不缓存，避免一次遍历占满内存"""
+        for _, order, i in self._iter_entries():
+            yield order if order is not None else self.snapshot.order_at(i)
+
+    def values(self) -> ValuesView:
+        return _OrderValues(self)
+
+    def product_sales(self) -> Dict[str, List]:
+        """商品销售汇总：快照中的预汇总数据 + 内存中的增删改，不必遍历全部订单"""
+        sales = self.snapshot.product_sales()
+
+        def _add(order: Order, sign: int) -> None:
+            item = sales.setdefault(order.product_id, [0, 0, 0.0])
+            item[0] += sign
+            item[1] += sign * order.buy_count
+            item[2] += sign * order.total_amount
+            if item[0] <= 0:
+                del sales[order.product_id]
+
+        for order_id in self._deleted | self._replaced:
+            _add(self.snapshot.order_at(self.snapshot.find_order(order_id)), -1)
+        for order_id, order in self._overlay.items():
+            if order_id in self._replaced or self.snapshot.find_order(order_id) is None:
+                _add(order, 1)
+        return sales
+
+
+def convert_json_to_binary(json_file: str, binary_file: str) -> Tuple[int, int, int]:
+    """工具：JSON数据文件转为二进制快照，返回(用户数, 商品数, 订单数)"""
+    from dao.data_handler import _stream_entities
+    users, products, orders = _stream_entities(json_file, None, None)
+    write_snapshot(binary_file, users, products, orders)
+    return len(users), len(products), len(orders)
+
+
+def convert_binary_to_json(binary_file: str, json_file: str) -> Tuple[int, int, int]:
+    """工具：二进制快照转回JSON数据文件（格式与save_data一致）"""
+    import json
+    snapshot = BinarySnapshot(binary_file)
+    orders = LazyOrderMap(snapshot)
+    data = {
+        "users": [user.to_dict() for user in snapshot.users()],
+        "products": [product.to_dict() for product in snapshot.products()],
+        "orders": [order.to_dict() for order in orders.values()]
+    }
+    with open(json_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return len(data["users"]), len(data["products"]), len(data["orders"])
+
+
+if __name__ == "__main__":
+    # 用法：python -m dao.binary_snapshot to-binary mall_data.txt mall_data.bin
+    #       python -m dao.binary_snapshot to-json mall_data.bin mall_data.txt
+    if len(sys.argv) != 4 or sys.argv[1] not in ("to-binary", "to-json"):
+        print("用法：python -m dao.binary_snapshot to-binary|to-json 源文件 目标文件")
+        sys.exit(1)
+    convert = convert_json_to_binary if sys.argv[1] == "to-binary" else convert_binary_to_json
+    counts = convert(sys.argv[2], sys.argv[3])
+    print(f"转换完成：用户{counts[0]}个，商品{counts[1]}个，订单{counts[2]}个")
@@ -1,39 +1,61 @@
-from typing import List, Tuple, Optional, Dict
+from typing import List, Tuple, Optional, Dict, Collection, Iterator, Any
+import itertools
 import json
 import os
-from model.entities import User, Product, Order
+import time
+from model.entities import User, Product, Order, parse_time_str
 from utils.log_config import logger
-import datetime
+from utils.metrics import registry, elapsed
+from dao import journal, incremental_backup, binary_snapshot
+from dao.json_stream import iter_top_level_arrays, ProgressCallback
 
 # 数据文件绝对路径配置，后续可以修改
 DATA_FILE = "mall_data.txt"       # 主数据文件
 BACKUP_FILE = "mall_backup.txt"   # 备份文件
+# 日志模式：每次变更只追加到 journal.JOURNAL_FILE，定期才整体写主数据文件
+JOURNAL_ENABLED = True
+# 存储后端："json"（mall_data.txt）或 "sqlite"（见 dao/sqlite_handler.py，首次使用前先执行迁移）
+STORAGE_BACKEND = "json"
+# 快照格式（json后端）："json" 或 "binary"（mmap打开、订单按需加载，见 dao/binary_snapshot.py）
+SNAPSHOT_FORMAT = "json"
+BINARY_SNAPSHOT_FILE = "mall_data.bin"
 
-def load_data() -> Tuple[List[User], List[Product], List[Order]]:
-    """加载数据：从主文件读取，返回用户/商品/订单列表"""
+def _data_file() -> str:
+    """当前快照格式对应的主数据文件"""
+    return BINARY_SNAPSHOT_FILE if SNAPSHOT_FORMAT == "binary" else DATA_FILE
+
+def _sqlite_backend():
+    """延迟导入SQLite后端（sqlite_handler依赖本模块的转换函数，避免循环导入）"""
+    from dao import sqlite_handler
+    return sqlite_handler
+
+def load_data(progress_callback: Optional[ProgressCallback] = None) -> Tuple[List[User], List[Product], List[Order]]:
+    """加载数据：从主文件读取，返回用户/商品/订单列表；progress_callback(已完成, 总量)用于显示加载进度"""
+    start = time.perf_counter()
+    if STORAGE_BACKEND == "sqlite":
+        return _sqlite_backend().load_data(progress_callback)
     try:
-        if not os.path.exists(DATA_FILE):
+        journal_entries = journal.read_records() if JOURNAL_ENABLED else []
+        data_file = _data_file()
+        if not os.path.exists(data_file) and not journal_entries:
             logger.info("", extra={
                 "user": "system",
                 "operation": "load_data",
-                "response_time": "0.0s",
+                "response_time": elapsed(start),
                 "result": "success: 数据文件不存在，返回空列表"
             })
             return [], [], []
 
-        # 读取文件（UTF-8编码）
-        with open(DATA_FILE, "r", encoding="utf-8", errors="ignore") as f:
-            data = json.load(f)
-
-        # 转换JSON数据为实体类
-        users = _json_to_users(data.get("users", []))
-        products = _json_to_products(data.get("products", []))
-        orders = _json_to_orders(data.get("orders", []))
+        # 读取快照（JSON流式解析或二进制按需加载），同时合并快照之后的日志变更
+        overlay = journal.compact_records(journal_entries)
+        users, products, orders = _load_snapshot(data_file, overlay, progress_callback)
+        registry.observe("dao.load", time.perf_counter() - start,
+                         os.path.getsize(data_file) if os.path.exists(data_file) else 0)
 
         logger.info("", extra={
             "user": "system",
             "operation": "load_data",
-            "response_time": "0.0s",
+            "response_time": elapsed(start),
             "result": f"success: 加载用户{len(users)}个，商品{len(products)}个，订单{len(orders)}个"
         })
         return users, products, orders
@@ -42,29 +64,59 @@ def load_data() -> Tuple[List[User], List[Product], List[Order]]:
         logger.error("", extra={
             "user": "system",
             "operation": "load_data",
-            "response_time": "0.0s",
+            "response_time": elapsed(start),
             "result": f"fail: {str(e)}"
         })
         return [], [], []
 
 def save_data(users: List[User], products: List[Product], orders: List[Order]) -> bool:
     """保存数据：将实体类列表写入主文件（供Service层调用）"""
+    start = time.perf_counter()
+    if STORAGE_BACKEND == "sqlite":
+        return _sqlite_backend().save_data(users, products, orders)
     try:
-        # 转换实体类为JSON可序列化的字典
-        data = {
-            "users": [user.to_dict() for user in users],
-            "products": [prod.to_dict() for prod in products],
-            "orders": [order.to_dict() for order in orders]
-        }
+        if SNAPSHOT_FORMAT == "binary":
+            with registry.timer("dao.write") as timer:
+                binary_snapshot.write_snapshot(BINARY_SNAPSHOT_FILE, users, products, orders)
+                timer.bytes = os.path.getsize(BINARY_SNAPSHOT_FILE)
+            _after_checkpoint()
+            registry.observe("dao.save", time.perf_counter() - start, timer.bytes)
+            logger.info("", extra={
+                "user": "system",
+                "operation": "save_data",
+                "response_time": elapsed(start),
+                "result": f"success: 保存二进制快照，用户{len(users)}个，商品{len(products)}个，订单{len(orders)}个"
+            })
+            return True
+
+        # 转换实体类为JSON可序列化的字典，再编码为字节（序列化和写盘分别计时）
+        with registry.timer("dao.serialize") as timer:
+            data = {
+                "users": [user.to_dict() for user in users],
+                "products": [prod.to_dict() for prod in products],
+                "orders": [order.to_dict() for order in orders]
+            }
+            payload = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+            timer.bytes = len(payload)
 
-        # 写入文件（UTF-8编码，格式化输出）
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        # 先写临时文件再替换，避免写到一半崩溃导致主文件损坏
+        tmp_file = DATA_FILE + ".tmp"
+        with open(tmp_file, "wb") as f:
+            with registry.timer("dao.write") as timer:
+                f.write(payload)
+                f.flush()
+                timer.bytes = len(payload)
+            with registry.timer("dao.fsync"):
+                os.fsync(f.fileno())
+        binary_snapshot.release(DATA_FILE)
+        os.replace(tmp_file, DATA_FILE)
+        _after_checkpoint()
+        registry.observe("dao.save", time.perf_counter() - start, len(payload))
 
         logger.info("", extra={
             "user": "system",
             "operation": "save_data",
-            "response_time": "0.0s",
+            "response_time": elapsed(start),
             "result": f"success: 保存用户{len(users)}个，商品{len(products)}个，订单{len(orders)}个"
         })
         return True
@@ -73,33 +125,66 @@ def save_data(users: List[User], products: List[Product], orders: List[Order]) -
         logger.error("", extra={
             "user": "system",
             "operation": "save_data",
-            "response_time": "0.0s",
+            "response_time": elapsed(start),
             "result": f"fail: {str(e)}"
         })
         return False
 
-def backup_data() -> bool:
-    """备份数据：将主文件复制到备份文件（供Service层调用）"""
+def _after_checkpoint() -> None:
+    """快照已包含全部数据，日志可以清空（尚未备份的记录先转存，供下次增量备份使用）"""
+    if JOURNAL_ENABLED:
+        incremental_backup.carry_over_journal(BACKUP_FILE)
+        journal.clear_journal()
+
+def save_changes(changes: List[Dict], users: Collection[User], products: Collection[Product],
+                 orders: Collection[Order]) -> bool:
+    """增量保存：日志模式下只追加本次变更，达到间隔后再写完整快照（供Service层调用）"""
+    if STORAGE_BACKEND == "sqlite":
+        return _sqlite_backend().save_changes(changes)
+    if not JOURNAL_ENABLED:
+        return save_data(users, products, orders)
+
+    if not journal.append_records(changes):
+        return False
+
+    if journal.need_checkpoint():
+        # 快照失败不影响本次结果：变更已写入日志，下次启动可以重放
+        save_data(users, products, orders)
+    return True
+
+def backup_data(full: bool = False) -> bool:
+    """备份数据：默认只写上次备份之后的增量，full=True或增量过多时按字节完整复制主文件（供Service层调用）"""
+    start = time.perf_counter()
+    if STORAGE_BACKEND == "sqlite":
+        return _sqlite_backend().backup_data()
     try:
-        if not os.path.exists(DATA_FILE):
+        data_file = _data_file()
+        if not os.path.exists(data_file):
             logger.warning("", extra={
                 "user": "system",
                 "operation": "backup_data",
-                "response_time": "0.0s",
+                "response_time": elapsed(start),
                 "result": "warn: 主数据文件不存在，无法备份"
             })
             return False
 
-        # 读取主文件并写入备份文件
-        with open(DATA_FILE, "r", encoding="utf-8") as f_in, \
-             open(BACKUP_FILE, "w", encoding="utf-8") as f_out:
-            json.dump(json.load(f_in), f_out, ensure_ascii=False, indent=2)
+        # 增量备份依赖变更日志；不满足条件时退回完整备份（不解析JSON，直接复制文件）
+        delta_count = None
+        if JOURNAL_ENABLED and not full:
+            delta_count = incremental_backup.delta_backup(BACKUP_FILE)
+        if delta_count is None:
+            incremental_backup.full_backup(data_file, BACKUP_FILE)
+            registry.observe("dao.backup_full", time.perf_counter() - start, os.path.getsize(data_file))
+            result = "success: 完整备份完成"
+        else:
+            registry.observe("dao.backup_delta", time.perf_counter() - start)
+            result = f"success: 增量备份完成，{delta_count}条变更"
 
         logger.info("", extra={
             "user": "system",
             "operation": "backup_data",
-            "response_time": "0.0s",
-            "result": "success: 数据备份完成"
+            "response_time": elapsed(start),
+            "result": result
         })
         return True
 
@@ -107,36 +192,36 @@ def backup_data() -> bool:
         logger.error("", extra={
             "user": "system",
             "operation": "backup_data",
-            "response_time": "0.0s",
+            "response_time": elapsed(start),
             "result": f"fail: {str(e)}"
         })
         return False
 
-def restore_data() -> Tuple[List[User], List[Product], List[Order], bool]:
+def restore_data(progress_callback: Optional[ProgressCallback] = None) -> Tuple[List[User], List[Product], List[Order], bool]:
     """恢复数据：从备份文件加载数据（供Service层调用）"""
+    start = time.perf_counter()
+    if STORAGE_BACKEND == "sqlite":
+        return _sqlite_backend().restore_data()
     try:
         if not os.path.exists(BACKUP_FILE):
             logger.warning("", extra={
                 "user": "system",
                 "operation": "restore_data",
-                "response_time": "0.0s",
+                "response_time": elapsed(start),
                 "result": "warn: 备份文件不存在，无法恢复"
             })
             return [], [], [], False
 
-        # 读取备份文件
-        with open(BACKUP_FILE, "r", encoding="utf-8", errors="ignore") as f:
-            data = json.load(f)
-
-        # 转换为实体类
-        users = _json_to_users(data.get("users", []))
-        products = _json_to_products(data.get("products", []))
-        orders = _json_to_orders(data.get("orders", []))
+        # 流式读取备份基线，逐条合并增量备份中的变更
+        overlay = journal.compact_records(incremental_backup.read_deltas(BACKUP_FILE))
+        users, products, orders = _load_snapshot(BACKUP_FILE, overlay, progress_callback)
+        incremental_backup.mark_restored(BACKUP_FILE)
+        registry.observe("dao.restore", time.perf_counter() - start, os.path.getsize(BACKUP_FILE))
 
         logger.info("", extra={
             "user": "system",
             "operation": "restore_data",
-            "response_time": "0.0s",
+            "response_time": elapsed(start),
             "result": f"success: 从备份恢复用户{len(users)}个，商品{len(products)}个，订单{len(orders)}个"
         })
         return users, products, orders, True
@@ -145,71 +230,131 @@ def restore_data() -> Tuple[List[User], List[Product], List[Order], bool]:
         logger.error("", extra={
             "user": "system",
             "operation": "restore_data",
-            "response_time": "0.0s",
+            "response_time": elapsed(start),
             "result": f"fail: {str(e)}"
         })
         return [], [], [], False
 
 # ------------------------------ 内部辅助函数 ------------------------------
+def _load_snapshot(path: str, overlay: Dict[str, Dict[str, Optional[Dict]]],
+                   progress_callback: Optional[ProgressCallback]) -> Tuple[List[User], List[Product], Any]:
+    """按文件内容选择读取方式：二进制快照按需加载订单，否则流式解析JSON"""
+    if binary_snapshot.is_binary_snapshot(path):
+        return _load_binary_snapshot(path, overlay, progress_callback)
+    return _stream_entities(path, overlay, progress_callback)
+
+def _load_binary_snapshot(path: str, overlay: Dict[str, Dict[str, Optional[Dict]]],
+                          progress_callback: Optional[ProgressCallback]) -> Tuple[List[User], List[Product], Any]:
+    """打开二进制快照：用户/商品直接构造，订单返回按需加载的LazyOrderMap"""
+    snapshot = binary_snapshot.BinarySnapshot(path)
+    users = snapshot.users()
+    products = snapshot.products()
+    orders = binary_snapshot.LazyOrderMap(snapshot)
+    if overlay:
+        users = _json_to_users(list(journal.merge_items(
+            (user.to_dict() for user in users), overlay["users"], journal.ENTITY_KEYS["users"])))
+        products = _json_to_products(list(journal.merge_items(
+            (product.to_dict() for product in products), overlay["products"], journal.ENTITY_KEYS["products"])))
+        for order_id, item in overlay["orders"].items():
+            if item is None:
+                orders.pop(order_id, None)
+            else:
+                order = _json_to_order(item)
+                if order is not None:
+                    orders[order_id] = order
+    if progress_callback:
+        progress_callback(1, 1)
+    return users, products, orders
+
+def _stream_entities(path: str, overlay: Optional[Dict[str, Dict[str, Optional[Dict]]]],
+                     progress_callback: Optional[ProgressCallback]) -> Tuple[List[User], List[Product], List[Order]]:
+    """流式加载：逐个解析数组元素并立即转为实体，overlay为需要合并的日志变更（见journal.compact_records）"""
+    converters = {"users": _json_to_user, "products": _json_to_product, "orders": _json_to_order}
+    results: Dict[str, List[Any]] = {entity: [] for entity in converters}
+
+    def _convert(entity: str, items: Iterator[Dict]) -> None:
+        if overlay:
+            items = journal.merge_items(items, overlay[entity], journal.ENTITY_KEYS[entity])
+        for item in items:
+            entity_obj = converters[entity](item)
+            if entity_obj is not None:
+                results[entity].append(entity_obj)
+
+    stream = iter_top_level_arrays(path, progress_callback) if os.path.exists(path) else iter(())
+    done = set()
+    for entity, group in itertools.groupby(stream, key=lambda pair: pair[0]):
+        if entity in converters:
+            _convert(entity, (item for _, item in group))
+            done.add(entity)
+    # 快照中没有对应列表的实体，只合并日志中新增的记录
+    if overlay:
+        for entity in converters:
+            if entity not in done:
+                _convert(entity, iter(()))
+
+    return results["users"], results["products"], results["orders"]
+
+def _json_to_user(item: Dict) -> Optional[User]:
+    """JSON字典转为User实体"""
+    user = User(
+        username=item.get("username", ""),
+        password=item.get("password", ""),
+        is_super=item.get("is_super", False)
+    )
+    user.login_fail_count = item.get("login_fail_count", 0)
+    user.lock_time = item.get("lock_time", 0)
+    return user
+
+def _json_to_product(item: Dict) -> Optional[Product]:
+    """JSON字典转为Product实体（数据无效返回None）"""
+    try:
+        return Product(
+            product_id=item.get("product_id", ""),
+            name=item.get("name", ""),
+            category=item.get("category", ""),
+            price=float(item.get("price", 0)),
+            stock=int(item.get("stock", 0))
+        )
+    except (ValueError, TypeError):
+        logger.warning("", extra={
+            "user": "system",
+            "operation": "_json_to_products",
+            "response_time": "0.0s",
+            "result": f"warn: 无效商品数据{item}，跳过"
+        })
+        return None
+
+def _json_to_order(item: Dict) -> Optional[Order]:
+    """JSON字典转为Order实体（数据无效返回None）"""
+    try:
+        # 解析下单时间（字符串转整数秒）
+        create_ts = parse_time_str(item.get("create_time", ""))
+        order = Order(
+            order_id=item.get("order_id", ""),
+            phone=item.get("phone", ""),
+            product_id=item.get("product_id", ""),
+            buy_count=int(item.get("buy_count", 0)),
+            product_price=float(item.get("product_price", 0))
+        )
+        order.create_ts = create_ts  # 覆盖默认时间
+        return order
+    except (ValueError, TypeError):
+        logger.warning("", extra={
+            "user": "system",
+            "operation": "_json_to_orders",
+            "response_time": "0.0s",
+            "result": f"warn: 无效订单数据{item}，跳过"
+        })
+        return None
+
 def _json_to_users(json_list: List[Dict]) -> List[User]:
     """JSON列表转为User实体列表"""
-    users = []
-    for item in json_list:
-        user = User(
-            username=item.get("username", ""),
-            password=item.get("password", ""),
-            is_super=item.get("is_super", False)
-        )
-        user.login_fail_count = item.get("login_fail_count", 0)
-        user.lock_time = item.get("lock_time", 0)
-        users.append(user)
-    return users
+    return [user for user in map(_json_to_user, json_list) if user is not None]
 
 def _json_to_products(json_list: List[Dict]) -> List[Product]:
     """JSON列表转为Product实体列表"""
-    products = []
-    for item in json_list:
-        try:
-            product = Product(
-                product_id=item.get("product_id", ""),
-                name=item.get("name", ""),
-                category=item.get("category", ""),
-                price=float(item.get("price", 0)),
-                stock=int(item.get("stock", 0))
-            )
-            products.append(product)
-        except (ValueError, TypeError):
-            logger.warning("", extra={
-                "user": "system",
-                "operation": "_json_to_products",
-                "response_time": "0.0s",
-                "result": f"warn: 无效商品数据{item}，跳过"
-            })
-    return products
+    return [product for product in map(_json_to_product, json_list) if product is not None]
 
 def _json_to_orders(json_list: List[Dict]) -> List[Order]:
     """JSON列表转为Order实体列表"""
-    orders = []
-    for item in json_list:
-        try:
-            # 解析下单时间（字符串转datetime）
-            create_time = datetime.datetime.strptime(
-                item.get("create_time", ""), "%Y-%m-%d %H:%M:%S"
-            )
-            order = Order(
-                order_id=item.get("order_id", ""),
-                phone=item.get("phone", ""),
-                product_id=item.get("product_id", ""),
-                buy_count=int(item.get("buy_count", 0)),
-                product_price=float(item.get("product_price", 0))
-            )
-            order.create_time = create_time  # 覆盖默认时间
-            orders.append(order)
-        except (ValueError, TypeError):
-            logger.warning("", extra={
-                "user": "system",
-                "operation": "_json_to_orders",
-                "response_time": "0.0s",
-                "result": f"warn: 无效订单数据{item}，跳过"
-            })
-    return orders
\ No newline at end of file
+    return [order for order in map(_json_to_order, json_list) if order is not None]
@@ -0,0 +1,140 @@
+from typing import List, Dict, Optional
+import glob
+import json
+import os
+import shutil
+from dao import journal, binary_snapshot
+
+# 增量备份：备份文件（完整基线）+ 若干增量文件，增量文件只包含上次备份之后的变更记录（格式同变更日志）
+# 累计多少个增量文件后重新做一次完整备份
+MAX_BACKUP_DELTAS = 10
+
+
+def _state_file(backup_file: str) -> str:
+    """备份状态文件：记录增量文件个数和已备份到的日志位置"""
+    return backup_file + ".state"
+
+
+def _pending_file(backup_file: str) -> str:
+    """待备份变更：写快照清空日志前，把尚未备份的日志记录转存到这里"""
+    return backup_file + ".pending"
+
+
+def delta_file(backup_file: str, number: int) -> str:
+    return f"{backup_file}.delta{number}"
+
+
+def load_state(backup_file: str) -> Optional[Dict]:
+    """读取备份状态（不存在或损坏返回None，此时下一次备份必须是完整备份）"""
+    try:
+        with open(_state_file(backup_file), "r", encoding="utf-8") as f:
+            state = json.load(f)
+        return {"journal_offset": int(state["journal_offset"]), "deltas": int(state["deltas"])}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _save_state(backup_file: str, state: Dict) -> None:
+    tmp_file = _state_file(backup_file) + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_file, _state_file(backup_file))
+
+
+def _write_entries(path: str, entries: List[List[Dict]], mode: str = "w") -> None:
+    with open(path, mode, encoding="utf-8") as f:
+        for changes in entries:
+            f.write(json.dumps({"changes": changes}, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _read_entries(path: str) -> List[List[Dict]]:
+    entries = []
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line)["changes"])
+                except (ValueError, KeyError):
+                    continue
+    return entries
+
+
+def _remove_deltas(backup_file: str) -> None:
+    for path in glob.glob(glob.escape(backup_file) + ".delta*"):
+        os.remove(path)
+
+
+def carry_over_journal(backup_file: str) -> None:
+    """写快照清空日志之前调用：把上次备份之后的日志记录转存到待备份文件，避免增量丢失"""
+    state = load_state(backup_file)
+    if state is None:
+        return  # 还没有可用的基线，下一次本来就是完整备份
+    entries, _ = journal.read_records_since(state["journal_offset"])
+    if entries:
+        _write_entries(_pending_file(backup_file), entries, mode="a")
+    state["journal_offset"] = 0
+    _save_state(backup_file, state)
+
+
+def full_backup(data_file: str, backup_file: str) -> None:
+    """完整备份：按字节复制主数据文件，日志中尚未写入快照的记录作为第1个增量"""
+    # 先使旧的备份状态失效，中途失败时下一次备份会重新做完整备份
+    if os.path.exists(_state_file(backup_file)):
+        os.remove(_state_file(backup_file))
+    tmp_file = backup_file + ".tmp"
+    shutil.copyfile(data_file, tmp_file)
+    binary_snapshot.release(backup_file)  # 从二进制备份恢复后，订单仍按需读取备份文件
+    os.replace(tmp_file, backup_file)
+    _remove_deltas(backup_file)
+    if os.path.exists(_pending_file(backup_file)):
+        os.remove(_pending_file(backup_file))  # 已包含在主数据文件中
+
+    entries, offset = journal.read_records_since(0)
+    deltas = 0
+    if entries:
+        _write_entries(delta_file(backup_file, 1), entries)
+        deltas = 1
+    _save_state(backup_file, {"journal_offset": offset, "deltas": deltas})
+
+
+def delta_backup(backup_file: str) -> Optional[int]:
+    """增量备份：只写上次备份之后的变更，返回写入的记录条数；需要完整备份时返回None"""
+    state = load_state(backup_file)
+    if state is None or not os.path.exists(backup_file) or state["deltas"] >= MAX_BACKUP_DELTAS:
+        return None
+
+    entries = _read_entries(_pending_file(backup_file))
+    journal_entries, offset = journal.read_records_since(state["journal_offset"])
+    entries.extend(journal_entries)
+    if entries:
+        state["deltas"] += 1
+        _write_entries(delta_file(backup_file, state["deltas"]), entries)
+    state["journal_offset"] = offset
+    _save_state(backup_file, state)
+    if os.path.exists(_pending_file(backup_file)):
+        os.remove(_pending_file(backup_file))
+    return len(entries)
+
+
+def read_deltas(backup_file: str) -> List[List[Dict]]:
+    """按顺序读取全部增量记录（恢复时与基线合并）"""
+    state = load_state(backup_file)
+    if state is None:
+        return []
+    entries = []
+    for number in range(1, state["deltas"] + 1):
+        entries.extend(_read_entries(delta_file(backup_file, number)))
+    return entries
+
+
+def mark_restored(backup_file: str) -> None:
+    """从备份恢复后调用：当前数据与备份一致，之前未备份的变更全部作废"""
+    state = load_state(backup_file)
+    if state is None:
+        return
+    if os.path.exists(_pending_file(backup_file)):
+        os.remove(_pending_file(backup_file))
+    state["journal_offset"] = journal.journal_size()
+    _save_state(backup_file, state)
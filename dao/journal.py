@@ -0,0 +1,169 @@
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
+import json
+import os
+import time
+from utils.log_config import logger
+from utils.metrics import registry
+
+# 预写日志文件：每次业务变更追加一行，不再整体重写主数据文件
+JOURNAL_FILE = "mall_journal.log"
+# 累计追加多少条变更记录后写一次完整快照（checkpoint）
+CHECKPOINT_INTERVAL = 200
+
+# 实体类型 -> 主键字段（与 mall_data.txt 中的列表名一一对应）
+ENTITY_KEYS = {
+    "users": "username",
+    "products": "product_id",
+    "orders": "order_id",
+}
+
+_pending_count = 0  # 上次快照之后日志中的记录条数
+
+
+def put_record(entity: str, key: str, data: Dict) -> Dict:
+    """新增/覆盖记录：data为实体的to_dict()结果，key为变更前的主键"""
+    return {"op": "put", "entity": entity, "key": key, "data": data}
+
+
+def delete_record(entity: str, key: str) -> Dict:
+    """删除记录：按主键删除实体"""
+    return {"op": "delete", "entity": entity, "key": key}
+
+
+def append_records(changes: List[Dict]) -> bool:
+    """追加变更：一次业务操作的所有变更写成一行，保证重放时要么全部生效要么全部忽略"""
+    global _pending_count
+    try:
+        with registry.timer("journal.serialize") as timer:
+            line = (json.dumps({"ts": round(time.time(), 3), "changes": changes}, ensure_ascii=False) + "\n").encode("utf-8")
+            timer.bytes = len(line)
+        with open(JOURNAL_FILE, "ab") as f:
+            with registry.timer("journal.write") as timer:
+                f.write(line)
+                f.flush()
+                timer.bytes = len(line)
+            with registry.timer("journal.fsync"):
+                os.fsync(f.fileno())
+        _pending_count += 1
+        return True
+    except Exception as e:
+        logger.error("", extra={
+            "user": "system",
+            "operation": "append_journal",
+            "response_time": "0.0s",
+            "result": f"fail: {str(e)}"
+        })
+        return False
+
+
+def read_records() -> List[List[Dict]]:
+    """读取日志：返回每次操作的变更列表，末尾写了一半的行（进程崩溃）直接丢弃"""
+    global _pending_count
+    entries = []
+    if os.path.exists(JOURNAL_FILE):
+        with open(JOURNAL_FILE, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line)["changes"])
+                except (ValueError, KeyError):
+                    logger.warning("", extra={
+                        "user": "system",
+                        "operation": "read_journal",
+                        "response_time": "0.0s",
+                        "result": "warn: 日志记录不完整，已跳过"
+                    })
+    _pending_count = len(entries)
+    return entries
+
+
+def read_records_since(offset: int) -> Tuple[List[List[Dict]], int]:
+    """从指定字节位置读取日志：返回(变更列表, 读到的末尾位置)，用于增量备份"""
+    entries = []
+    end = offset
+    if os.path.exists(JOURNAL_FILE):
+        with open(JOURNAL_FILE, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # 末尾写了一半的行，留到下次
+                end += len(line)
+                try:
+                    entries.append(json.loads(line.decode("utf-8", errors="ignore"))["changes"])
+                except (ValueError, KeyError):
+                    continue
+    return entries, end
+
+
+def journal_size() -> int:
+    """日志文件当前大小（字节）"""
+    return os.path.getsize(JOURNAL_FILE) if os.path.exists(JOURNAL_FILE) else 0
+
+
+def compact_records(entries: List[List[Dict]]) -> Dict[str, Dict[str, Optional[Dict]]]:
+    """合并日志：按实体类型得到 {主键: 最终数据}，None表示已删除（加载时逐条合并，不必先构造完整快照）"""
+    overlay = {entity: {} for entity in ENTITY_KEYS}
+    for changes in entries:
+        for change in changes:
+            table = overlay.get(change.get("entity"))
+            if table is None:
+                continue
+            key = change.get("key", "")
+            if change.get("op") == "put":
+                new_data = change.get("data", {})
+                new_key = new_data.get(ENTITY_KEYS[change["entity"]], key)
+                if new_key != key:
+                    table[key] = None  # 主键被修改（如用户名），旧键视为删除
+                table[new_key] = new_data
+            elif change.get("op") == "delete":
+                table[key] = None
+    return overlay
+
+
+def merge_items(items: Iterable[Dict], table: Dict[str, Optional[Dict]], key_field: str) -> Iterator[Dict]:
+    """逐条合并：快照中的记录被日志覆盖或删除，日志中新增的记录追加在最后"""
+    seen = set()
+    for item in items:
+        key = item.get(key_field, "")
+        if key in table:
+            seen.add(key)
+            if table[key] is not None:
+                yield table[key]
+        else:
+            yield item
+    for key, item in table.items():
+        if key not in seen and item is not None:
+            yield item
+
+
+def apply_records(data: Dict[str, Any], entries: List[List[Dict]]) -> None:
+    """重放日志：把变更应用到快照字典上（与mall_data.txt结构相同）"""
+    overlay = compact_records(entries)
+    for entity, key_field in ENTITY_KEYS.items():
+        data[entity] = list(merge_items(data.get(entity, []), overlay[entity], key_field))
+
+
+def clear_journal() -> bool:
+    """清空日志：写完快照后调用，之前的记录已全部包含在快照中"""
+    global _pending_count
+    try:
+        if os.path.exists(JOURNAL_FILE):
+            with open(JOURNAL_FILE, "w", encoding="utf-8") as f:
+                f.truncate()
+        _pending_count = 0
+        return True
+    except Exception as e:
+        logger.error("", extra={
+            "user": "system",
+            "operation": "clear_journal",
+            "response_time": "0.0s",
+            "result": f"fail: {str(e)}"
+        })
+        return False
+
+
+def need_checkpoint() -> bool:
+    """是否需要写快照：日志记录数达到CHECKPOINT_INTERVAL"""
+    return _pending_count >= CHECKPOINT_INTERVAL
@@ -0,0 +1,111 @@
+from typing import Callable, Iterator, Optional, Tuple, Any
+import codecs
+import json
+import os
+
+# 每次从文件读取的字节数
+CHUNK_SIZE = 1024 * 1024
+
+# 进度回调：(已读取字节数, 文件总字节数)
+ProgressCallback = Callable[[int, int], None]
+
+_WHITESPACE = " \t\r\n"
+
+
+class _ChunkReader:
+    """分块读取文件并按需解码JSON值，只在内存中保留尚未解析的部分"""
+
+    def __init__(self, f, total: int, progress_callback: Optional[ProgressCallback]):
+        self.f = f
+        self.total = total
+        self.progress_callback = progress_callback
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self.buf = ""
+        self.pos = 0
+        self.bytes_read = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """再读一块数据，返回是否读到了新内容"""
+        if self.eof:
+            return False
+        raw = self.f.read(CHUNK_SIZE)
+        if not raw:
+            self.eof = True
+            self.buf = self.buf[self.pos:] + self.text_decoder.decode(b"", final=True)
+            self.pos = 0
+            return False
+        self.bytes_read += len(raw)
+        # 丢弃已解析的部分，避免缓冲区无限增长
+        self.buf = self.buf[self.pos:] + self.text_decoder.decode(raw)
+        self.pos = 0
+        if self.progress_callback:
+            self.progress_callback(self.bytes_read, self.total)
+        return True
+
+    def peek(self) -> str:
+        """跳过空白，返回下一个字符（文件结束返回空串）"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                return ""
+            self._fill()
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"JSON格式错误：期望'{char}'，位置{self.bytes_read}附近")
+        self.pos += 1
+
+    def decode(self) -> Any:
+        """解码下一个完整的JSON值；数据不完整时继续读取"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # 数字等值可能恰好在块边界被截断，后面必须还有字符才算完整
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def iter_top_level_arrays(path: str, progress_callback: Optional[ProgressCallback] = None) -> Iterator[Tuple[str, Any]]:
+    """流式解析 {"users": [...], "products": [...], "orders": [...]} 结构的文件：
+    逐个返回 (顶层键, 数组元素)，不构造完整的字典；非数组的顶层值直接跳过"""
+    total = os.path.getsize(path)
+    with open(path, "rb") as f:
+        reader = _ChunkReader(f, total, progress_callback)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            key = reader.decode()
+            reader.expect(":")
+            if reader.peek() == "[":
+                reader.pos += 1
+                if reader.peek() == "]":
+                    reader.pos += 1
+                else:
+                    while True:
+                        yield key, reader.decode()
+                        if reader.peek() == ",":
+                            reader.pos += 1
+                            continue
+                        reader.expect("]")
+                        break
+            else:
+                reader.decode()
+            if reader.peek() == ",":
+                reader.pos += 1
+                continue
+            reader.expect("}")
+            break
+        if progress_callback:
+            progress_callback(total, total)
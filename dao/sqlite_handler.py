@@ -0,0 +1,290 @@
+from typing import List, Tuple, Optional, Dict
+import json
+import os
+import sqlite3
+import time
+from model.entities import User, Product, Order
+from utils.log_config import logger
+from utils.metrics import registry, elapsed
+from dao import journal
+from dao.json_stream import ProgressCallback
+from dao.data_handler import DATA_FILE, _json_to_users, _json_to_products, _json_to_orders
+
+# SQLite数据文件配置：与JSON文件并存，由 data_handler.STORAGE_BACKEND 选择使用哪一种
+DB_FILE = "mall_data.db"            # 主数据库
+BACKUP_DB_FILE = "mall_backup.db"   # 备份数据库
+
+# 表结构：每类实体一张表，主键与 journal.ENTITY_KEYS 一致
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    is_super INTEGER NOT NULL DEFAULT 0,
+    login_fail_count INTEGER NOT NULL DEFAULT 0,
+    lock_time REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS products (
+    product_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    price REAL NOT NULL,
+    stock INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS orders (
+    order_id TEXT PRIMARY KEY,
+    phone TEXT NOT NULL,
+    product_id TEXT NOT NULL,
+    buy_count INTEGER NOT NULL,
+    product_price REAL NOT NULL,
+    total_amount REAL NOT NULL,
+    create_time TEXT NOT NULL
+);
+"""
+
+# 每张表的列顺序（与实体to_dict()的键相同）
+_COLUMNS = {
+    "users": ["username", "password", "is_super", "login_fail_count", "lock_time"],
+    "products": ["product_id", "name", "category", "price", "stock"],
+    "orders": ["order_id", "phone", "product_id", "buy_count", "product_price", "total_amount", "create_time"],
+}
+
+_conn: Optional[sqlite3.Connection] = None
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    """打开数据库并建表"""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _get_conn() -> sqlite3.Connection:
+    """获取主数据库连接（进程内复用同一个连接）"""
+    global _conn
+    if _conn is None:
+        _conn = _connect(DB_FILE)
+    return _conn
+
+
+def _read_tables(conn: sqlite3.Connection,
+                 progress_callback: Optional[ProgressCallback] = None) -> Tuple[List[User], List[Product], List[Order]]:
+    """读取三张表并转为实体列表（复用JSON转换函数），每读完一张表报告一次进度"""
+    data = {}
+    for i, (table, columns) in enumerate(_COLUMNS.items(), 1):
+        rows = conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY rowid").fetchall()
+        data[table] = [dict(row) for row in rows]
+        if progress_callback:
+            progress_callback(i, len(_COLUMNS))
+    for item in data["users"]:
+        item["is_super"] = bool(item["is_super"])
+    return (_json_to_users(data["users"]),
+            _json_to_products(data["products"]),
+            _json_to_orders(data["orders"]))
+
+
+def _upsert(conn: sqlite3.Connection, table: str, item: Dict) -> None:
+    """插入或更新一行（UPSERT保留原rowid，加载时顺序不变）"""
+    columns = _COLUMNS[table]
+    placeholders = ", ".join("?" for _ in columns)
+    updates = ", ".join(f"{col} = excluded.{col}" for col in columns[1:])
+    conn.execute(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+        f"ON CONFLICT({columns[0]}) DO UPDATE SET {updates}",
+        [item.get(col) for col in columns]
+    )
+
+
+def load_data(progress_callback: Optional[ProgressCallback] = None) -> Tuple[List[User], List[Product], List[Order]]:
+    """加载数据：从SQLite主库读取，返回用户/商品/订单列表"""
+    start = time.perf_counter()
+    try:
+        users, products, orders = _read_tables(_get_conn(), progress_callback)
+        registry.observe("sqlite.load", time.perf_counter() - start)
+        logger.info("", extra={
+            "user": "system",
+            "operation": "load_data",
+            "response_time": elapsed(start),
+            "result": f"success: 从数据库加载用户{len(users)}个，商品{len(products)}个，订单{len(orders)}个"
+        })
+        return users, products, orders
+
+    except Exception as e:
+        logger.error("", extra={
+            "user": "system",
+            "operation": "load_data",
+            "response_time": elapsed(start),
+            "result": f"fail: {str(e)}"
+        })
+        return [], [], []
+
+
+def save_data(users: List[User], products: List[Product], orders: List[Order]) -> bool:
+    """整体保存：在一个事务内清空并重写三张表（初始化、恢复数据时使用）"""
+    start = time.perf_counter()
+    try:
+        conn = _get_conn()
+        with conn:
+            for table in _COLUMNS:
+                conn.execute(f"DELETE FROM {table}")
+            for user in users:
+                _upsert(conn, "users", user.to_dict())
+            for product in products:
+                _upsert(conn, "products", product.to_dict())
+            for order in orders:
+                _upsert(conn, "orders", order.to_dict())
+        registry.observe("sqlite.save", time.perf_counter() - start)
+
+        logger.info("", extra={
+            "user": "system",
+            "operation": "save_data",
+            "response_time": elapsed(start),
+            "result": f"success: 保存用户{len(users)}个，商品{len(products)}个，订单{len(orders)}个"
+        })
+        return True
+
+    except Exception as e:
+        logger.error("", extra={
+            "user": "system",
+            "operation": "save_data",
+            "response_time": elapsed(start),
+            "result": f"fail: {str(e)}"
+        })
+        return False
+
+
+def save_changes(changes: List[Dict]) -> bool:
+    """增量保存：把put/delete变更记录转为行级INSERT/UPDATE/DELETE，在一个事务内执行"""
+    start = time.perf_counter()
+    try:
+        conn = _get_conn()
+        with conn:
+            for change in changes:
+                table = change["entity"]
+                key_field = journal.ENTITY_KEYS[table]
+                key = change["key"]
+                if change["op"] == "put":
+                    item = change["data"]
+                    if item.get(key_field, key) != key:
+                        # 主键被修改（如用户名），先删除旧行
+                        conn.execute(f"DELETE FROM {table} WHERE {key_field} = ?", (key,))
+                    _upsert(conn, table, item)
+                elif change["op"] == "delete":
+                    conn.execute(f"DELETE FROM {table} WHERE {key_field} = ?", (key,))
+        registry.observe("sqlite.save_changes", time.perf_counter() - start)
+        return True
+
+    except Exception as e:
+        logger.error("", extra={
+            "user": "system",
+            "operation": "save_changes",
+            "response_time": elapsed(start),
+            "result": f"fail: {str(e)}"
+        })
+        return False
+
+
+def backup_data() -> bool:
+    """备份数据：使用SQLite在线备份接口复制主库，不需要经过实体转换"""
+    start = time.perf_counter()
+    try:
+        target = sqlite3.connect(BACKUP_DB_FILE)
+        try:
+            _get_conn().backup(target)
+        finally:
+            target.close()
+        registry.observe("sqlite.backup", time.perf_counter() - start, os.path.getsize(BACKUP_DB_FILE))
+
+        logger.info("", extra={
+            "user": "system",
+            "operation": "backup_data",
+            "response_time": elapsed(start),
+            "result": "success: 数据库备份完成"
+        })
+        return True
+
+    except Exception as e:
+        logger.error("", extra={
+            "user": "system",
+            "operation": "backup_data",
+            "response_time": elapsed(start),
+            "result": f"fail: {str(e)}"
+        })
+        return False
+
+
+def restore_data() -> Tuple[List[User], List[Product], List[Order], bool]:
+    """恢复数据：从备份库读取数据（写回主库由Service层调用save_data完成）"""
+    start = time.perf_counter()
+    try:
+        if not os.path.exists(BACKUP_DB_FILE):
+            logger.warning("", extra={
+                "user": "system",
+                "operation": "restore_data",
+                "response_time": elapsed(start),
+                "result": "warn: 备份数据库不存在，无法恢复"
+            })
+            return [], [], [], False
+
+        conn = _connect(BACKUP_DB_FILE)
+        try:
+            users, products, orders = _read_tables(conn)
+        finally:
+            conn.close()
+        registry.observe("sqlite.restore", time.perf_counter() - start)
+
+        logger.info("", extra={
+            "user": "system",
+            "operation": "restore_data",
+            "response_time": elapsed(start),
+            "result": f"success: 从备份恢复用户{len(users)}个，商品{len(products)}个，订单{len(orders)}个"
+        })
+        return users, products, orders, True
+
+    except Exception as e:
+        logger.error("", extra={
+            "user": "system",
+            "operation": "restore_data",
+            "response_time": elapsed(start),
+            "result": f"fail: {str(e)}"
+        })
+        return [], [], [], False
+
+
+def migrate_from_json(json_file: str = DATA_FILE) -> bool:
+    """一次性迁移：把JSON主数据文件（含未合并的变更日志）导入SQLite主库"""
+    start = time.perf_counter()
+    try:
+        data = {}
+        if os.path.exists(json_file):
+            with open(json_file, "r", encoding="utf-8", errors="ignore") as f:
+                data = json.load(f)
+        journal.apply_records(data, journal.read_records())
+
+        users = _json_to_users(data.get("users", []))
+        products = _json_to_products(data.get("products", []))
+        orders = _json_to_orders(data.get("orders", []))
+        if not save_data(users, products, orders):
+            return False
+
+        logger.info("", extra={
+            "user": "system",
+            "operation": "migrate_from_json",
+            "response_time": elapsed(start),
+            "result": f"success: 迁移用户{len(users)}个，商品{len(products)}个，订单{len(orders)}个"
+        })
+        return True
+
+    except Exception as e:
+        logger.error("", extra={
+            "user": "system",
+            "operation": "migrate_from_json",
+            "response_time": elapsed(start),
+            "result": f"fail: {str(e)}"
+        })
+        return False
+
+
+if __name__ == "__main__":
+    # 用法：python -m dao.sqlite_handler  （迁移完成后把 data_handler.STORAGE_BACKEND 改为 "sqlite"）
+    print("迁移成功" if migrate_from_json() else "迁移失败，详见日志")
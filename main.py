@@ -1,11 +1,146 @@
+from typing import Callable, List, Optional
 from service.mall_service import MallSystem
+from model.entities import Product, TIME_FORMAT, parse_time_bound
+from utils.validator import check_phone
 
+import datetime
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import tkinter.scrolledtext as st
 
-# 初始化业务系统
-mall_system = MallSystem()
+# 业务系统实例：启动时由 load_mall_system 创建（数据量大时显示加载进度）
+mall_system: MallSystem = None
+
+# 商品列表每页显示的行数，以及表格列 -> 排序字段
+PRODUCT_PAGE_SIZE = 100
+PRODUCT_COLUMNS = (
+    ("商品编号", "product_id"),
+    ("商品名称", "name"),
+    ("分类", "category"),
+    ("单价（元）", "price"),
+    ("库存", "stock"),
+    ("总价值（元）", "total_value"),
+)
+
+# 时段销售报表：粒度选项 -> 汇总粒度、时段显示格式；点选某个时段时最多列出的订单数
+ROLLUP_OPTIONS = {
+    "按天": ("day", "%Y-%m-%d"),
+    "按小时": ("hour", "%Y-%m-%d %H:00"),
+}
+PERIOD_ORDER_LIMIT = 200
+
+# 客户订单查询每页显示的订单数
+CUSTOMER_PAGE_SIZE = 50
+
+# 商品选择框：停止输入多少毫秒后搜索，最多提示几个商品
+PICKER_DELAY_MS = 150
+PICKER_LIMIT = 15
+
+def load_mall_system(root) -> MallSystem:
+    """加载业务数据：显示进度条，加载完成后移除"""
+    loading_frame = ttk.Frame(root, padding="50")
+    loading_frame.pack()
+    ttk.Label(loading_frame, text="正在加载数据，请稍候...", font=("宋体", 14)).pack(pady=10)
+    progress_var = tk.DoubleVar()
+    ttk.Progressbar(loading_frame, variable=progress_var, maximum=100, length=400).pack(pady=10)
+
+    def on_progress(done, total):
+        if total:
+            progress_var.set(done * 100 / total)
+        root.update()  # 加载在主线程进行，手动刷新界面
+
+    system = MallSystem(progress_callback=on_progress)
+    loading_frame.destroy()
+    return system
+
+class ProductPicker:
+    """商品选择框：输入商品名称/分类/编号的任意部分，下方弹出匹配的商品，选中后填入商品编号"""
+
+    def __init__(self, master, variable: tk.StringVar, token: str, width: int = 30,
+                 on_select: Optional[Callable[[Product], None]] = None):
+        self.variable = variable
+        self.token = token
+        self.on_select = on_select
+        self.width = width
+        self.entry = ttk.Entry(master, textvariable=variable, font=("宋体", 12), width=width)
+        self.entry.bind("<KeyRelease>", self.on_key)
+        self.entry.bind("<Down>", self.focus_list)
+        self.entry.bind("<Escape>", lambda event: self.hide())
+        self.entry.bind("<FocusOut>", lambda event: self.entry.after(200, self.hide_if_unfocused))
+        self.popup = None
+        self.listbox = None
+        self.products: List[Product] = []
+        self.pending = None
+
+    # 布局方法转给输入框
+    def grid(self, **kwargs):
+        self.entry.grid(**kwargs)
+
+    def pack(self, **kwargs):
+        self.entry.pack(**kwargs)
+
+    def on_key(self, event):
+        if event.keysym in ("Down", "Up", "Escape", "Return", "Tab"):
+            return
+        # 停止输入一小段时间后再搜索，连续输入时不必每个字都查一次
+        if self.pending:
+            self.entry.after_cancel(self.pending)
+        self.pending = self.entry.after(PICKER_DELAY_MS, self.refresh)
+
+    def refresh(self):
+        self.pending = None
+        keyword = self.variable.get().strip()
+        self.products = mall_system.search_products(self.token, keyword, PICKER_LIMIT) if keyword else []
+        if not self.products:
+            self.hide()
+            return
+        if self.popup is None:
+            # 无边框的弹出列表，紧贴在输入框下方
+            self.popup = tk.Toplevel(self.entry)
+            self.popup.overrideredirect(True)
+            self.listbox = tk.Listbox(self.popup, font=("宋体", 11), width=self.width + 20,
+                                      height=PICKER_LIMIT, activestyle="dotbox")
+            self.listbox.pack()
+            self.listbox.bind("<Return>", self.choose)
+            self.listbox.bind("<Double-Button-1>", self.choose)
+            self.listbox.bind("<Escape>", lambda event: self.hide())
+            self.listbox.bind("<FocusOut>", lambda event: self.entry.after(200, self.hide_if_unfocused))
+        self.popup.geometry(f"+{self.entry.winfo_rootx()}+{self.entry.winfo_rooty() + self.entry.winfo_height()}")
+        self.listbox.delete(0, tk.END)
+        for product in self.products:
+            self.listbox.insert(tk.END, f"{product.product_id}  {product.name}（{product.category}）库存{product.stock}")
+        self.listbox.configure(height=len(self.products))
+
+    def focus_list(self, event):
+        if self.listbox is not None and self.products:
+            self.listbox.focus_set()
+            self.listbox.selection_clear(0, tk.END)
+            self.listbox.selection_set(0)
+            self.listbox.activate(0)
+        return "break"
+
+    def choose(self, event=None):
+        selection = self.listbox.curselection() if self.listbox is not None else ()
+        if not selection:
+            return
+        product = self.products[selection[0]]
+        self.variable.set(product.product_id)
+        self.hide()
+        self.entry.focus_set()
+        self.entry.icursor(tk.END)
+        if self.on_select:
+            self.on_select(product)
+
+    def hide_if_unfocused(self):
+        focus = self.entry.focus_get()
+        if focus is not self.entry and focus is not self.listbox:
+            self.hide()
+
+    def hide(self):
+        if self.popup is not None:
+            self.popup.destroy()
+            self.popup = None
+            self.listbox = None
 
 class MallGUI:
     def __init__(self, root):
@@ -13,6 +148,7 @@ class MallGUI:
         self.root.title("在线商城订单管理系统")
         self.root.geometry("1000x700")  # 窗口大小
         self.current_user = None  # 当前登录用户
+        self.token = None  # 登录后获得的会话令牌，调用业务方法时传入
 
         # 初始化登录页（默认显示）
         self.show_login_page()
@@ -51,8 +187,8 @@ class MallGUI:
             return
 
         # 调用原有登录逻辑
-        login_success = mall_system.login(username, password)
-        if login_success:
+        self.token = mall_system.login(username, password)
+        if self.token:
             self.current_user = username
             messagebox.showinfo("成功", f"欢迎{username}登录系统！")
             self.show_main_page()  # 登录成功后显示主功能页
@@ -119,7 +255,7 @@ class MallGUI:
             return
 
         # 调用业务层的modify_user方法
-        success, msg = mall_system.modify_user(old_username, new_username, new_password)
+        success, msg = mall_system.modify_user(self.token, old_username, new_username, new_password)
 
         # 显示结果
         if success:
@@ -143,19 +279,23 @@ class MallGUI:
         # 功能按钮（按原有菜单顺序）
         functions = [
             ("1. 添加商品", self.show_add_product),
-            ("2. 查看商品", self.show_view_products),
-            ("3. 删除商品", self.show_delete_product),
-            ("4. 修改商品", self.show_modify_product),
-            ("5. 创建订单", self.show_create_order),
-            ("6. 查询订单", self.show_query_order),
-            ("7. 撤销订单", self.show_cancel_order),
-            ("8. 订单统计", self.show_statistics),
-            ("9. 手动备份", self.backup_data),
-            ("10. 恢复数据", self.restore_data),
-            ("11. 查看日志", self.show_logs),
-            ("12. 清理日志", self.clear_logs),
-            ("13. 修改用户信息", self.show_modify_user),  # 新增这一行
-            ("14. 退出系统", self.exit_system)
+            ("2. 批量导入商品", self.show_import_products),
+            ("3. 查看商品", self.show_view_products),
+            ("4. 删除商品", self.show_delete_product),
+            ("5. 修改商品", self.show_modify_product),
+            ("6. 创建订单", self.show_create_order),
+            ("7. 查询订单", self.show_query_order),
+            ("8. 撤销订单", self.show_cancel_order),
+            ("9. 订单统计", self.show_statistics),
+            ("10. 手动备份", self.backup_data),
+            ("11. 恢复数据", self.restore_data),
+            ("12. 查看日志", self.show_logs),
+            ("13. 清理日志", self.clear_logs),
+            ("14. 修改用户信息", self.show_modify_user),  # 新增这一行
+            ("15. 性能统计", self.show_performance),
+            ("16. 时段销售报表", self.show_sales_report),
+            ("17. 客户订单查询", self.show_customer_orders),
+            ("18. 退出系统", self.exit_system)
         ]
 
         for text, cmd in functions:
@@ -202,7 +342,7 @@ class MallGUI:
         stock = self.form_vars["stock"].get().strip()
 
         # 调用原有添加商品逻辑
-        success, msg = mall_system.add_product(product_id, name, category, price, stock)
+        success, msg = mall_system.add_product(self.token, product_id, name, category, price, stock)
         if success:
             messagebox.showinfo("成功", msg)
             # 清空表单
@@ -211,6 +351,55 @@ class MallGUI:
         else:
             messagebox.showerror("失败", msg)
 
+    def show_import_products(self):
+        # 清空内容区域
+        for widget in self.content_frame.winfo_children():
+            widget.destroy()
+
+        # 标题
+        ttk.Label(self.content_frame, text="批量导入商品（CSV）", font=("宋体", 16)).pack(pady=10)
+        ttk.Label(self.content_frame, text="CSV表头：product_id,name,category,price,stock（或 商品编号,商品名称,商品分类,单价,库存）",
+                  font=("宋体", 10)).pack(pady=5)
+
+        # 文件选择
+        file_frame = ttk.Frame(self.content_frame)
+        file_frame.pack(pady=5)
+        self.import_path_var = tk.StringVar()
+        ttk.Entry(file_frame, textvariable=self.import_path_var, font=("宋体", 12), width=50).grid(row=0, column=0, padx=5)
+        ttk.Button(file_frame, text="浏览...", command=self.choose_import_file).grid(row=0, column=1)
+
+        self.import_skip_var = tk.BooleanVar()
+        ttk.Checkbutton(self.content_frame, text="跳过错误行（不勾选时有任何错误都不导入）",
+                        variable=self.import_skip_var).pack(pady=5)
+        ttk.Button(self.content_frame, text="导入", command=self.import_products_submit).pack(pady=5)
+
+        # 逐行错误显示区域
+        self.import_result_text = st.ScrolledText(self.content_frame, width=80, height=15, font=("宋体", 10))
+        self.import_result_text.pack(pady=10)
+
+    def choose_import_file(self):
+        path = filedialog.askopenfilename(filetypes=[("CSV文件", "*.csv"), ("所有文件", "*.*")])
+        if path:
+            self.import_path_var.set(path)
+
+    def import_products_submit(self):
+        path = self.import_path_var.get().strip()
+        if not path:
+            messagebox.showwarning("警告", "请选择CSV文件！")
+            return
+
+        success, msg, errors = mall_system.bulk_import_products(self.token, path, self.import_skip_var.get())
+        self.import_result_text.delete(1.0, tk.END)
+        self.import_result_text.insert(tk.END, msg + "\n")
+        # 错误行很多时只显示前1000条，避免文本框卡顿
+        self.import_result_text.insert(tk.END, "".join(error + "\n" for error in errors[:1000]))
+        if len(errors) > 1000:
+            self.import_result_text.insert(tk.END, f"……另有{len(errors) - 1000}行错误未显示\n")
+        if success:
+            messagebox.showinfo("成功", msg)
+        else:
+            messagebox.showerror("失败", msg)
+
     def show_view_products(self):
         # 清空内容区域
         for widget in self.content_frame.winfo_children():
@@ -219,35 +408,115 @@ class MallGUI:
         # 标题
         ttk.Label(self.content_frame, text="所有商品信息", font=("宋体", 16)).pack(pady=10)
 
-        # 获取商品数据
-        products = mall_system.get_all_products()
-        if not products:
-            ttk.Label(self.content_frame, text="系统中暂无商品信息！", font=("宋体", 12)).pack(pady=20)
-            return
+        # 筛选：匹配商品编号/名称/分类
+        filter_frame = ttk.Frame(self.content_frame)
+        filter_frame.pack(pady=5)
+        ttk.Label(filter_frame, text="关键词：", font=("宋体", 12)).grid(row=0, column=0)
+        self.product_keyword_var = tk.StringVar()
+        keyword_entry = ttk.Entry(filter_frame, textvariable=self.product_keyword_var, font=("宋体", 12), width=25)
+        keyword_entry.grid(row=0, column=1, padx=5)
+        keyword_entry.bind("<Return>", lambda event: self.filter_products())
+        ttk.Button(filter_frame, text="筛选", command=self.filter_products).grid(row=0, column=2, padx=5)
+
+        # 翻页栏
+        page_frame = ttk.Frame(self.content_frame)
+        page_frame.pack(side=tk.BOTTOM, pady=5)
+        ttk.Button(page_frame, text="首页", command=lambda: self.turn_product_page("first")).pack(side=tk.LEFT, padx=3)
+        ttk.Button(page_frame, text="上一页", command=lambda: self.turn_product_page("prev")).pack(side=tk.LEFT, padx=3)
+        self.product_page_label = ttk.Label(page_frame, font=("宋体", 12))
+        self.product_page_label.pack(side=tk.LEFT, padx=10)
+        ttk.Button(page_frame, text="下一页", command=lambda: self.turn_product_page("next")).pack(side=tk.LEFT, padx=3)
+        ttk.Button(page_frame, text="末页", command=lambda: self.turn_product_page("last")).pack(side=tk.LEFT, padx=3)
+
+        # 创建表格：只放当前页的商品，点击表头按该列排序（再次点击切换升序/降序）
+        self.product_tree = ttk.Treeview(self.content_frame, columns=[column for column, _ in PRODUCT_COLUMNS],
+                                         show="headings", height=15)
+        for column, field in PRODUCT_COLUMNS:
+            self.product_tree.heading(column, text=column, command=lambda field=field: self.sort_products(field))
+            self.product_tree.column(column, width=120)
+        # 滚轮滚到当前页底部/顶部时自动翻到下一页/上一页
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.product_tree.bind(sequence, self.on_product_scroll)
 
-        # 创建表格
-        columns = ("商品编号", "商品名称", "分类", "单价（元）", "库存", "总价值（元）")
-        tree = ttk.Treeview(self.content_frame, columns=columns, show="headings", height=15)
+        # 滚动条
+        scrollbar = ttk.Scrollbar(self.content_frame, orient=tk.VERTICAL, command=self.product_tree.yview)
+        self.product_tree.configure(yscrollcommand=scrollbar.set)
 
-        # 设置表头
-        for col in columns:
-            tree.heading(col, text=col)
-            tree.column(col, width=120)
+        # 布局
+        self.product_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
-        # 填充数据
+        self.product_offset = 0
+        self.product_total = 0
+        self.product_sort = (None, False)  # (排序字段, 是否降序)
+        self.load_product_page()
+
+    def load_product_page(self, scroll_to_end: bool = False):
+        """查询并显示当前页：排序和筛选在Service层完成，界面只保留一页数据"""
+        sort_by, descending = self.product_sort
+        keyword = self.product_keyword_var.get().strip() or None
+        products, self.product_total = mall_system.get_products_page(
+            self.token, self.product_offset, PRODUCT_PAGE_SIZE, sort_by, descending, keyword)
+        if self.product_offset and not products and self.product_total:
+            # 商品被删除后当前页已超出范围，回到最后一页
+            self.product_offset = (self.product_total - 1) // PRODUCT_PAGE_SIZE * PRODUCT_PAGE_SIZE
+            products, self.product_total = mall_system.get_products_page(
+                self.token, self.product_offset, PRODUCT_PAGE_SIZE, sort_by, descending, keyword)
+
+        self.product_tree.delete(*self.product_tree.get_children())
         for product in products:
-            tree.insert("", tk.END, values=(
+            self.product_tree.insert("", tk.END, values=(
                 product.product_id, product.name, product.category,
                 round(product.price, 2), product.stock, product.total_value
             ))
-
-        # 滚动条
-        scrollbar = ttk.Scrollbar(self.content_frame, orient=tk.VERTICAL, command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
-
-        # 布局
-        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        if products:
+            self.product_tree.yview_moveto(1.0 if scroll_to_end else 0.0)
+
+        # 表头显示排序方向
+        for column, field in PRODUCT_COLUMNS:
+            arrow = (" ▼" if descending else " ▲") if field == sort_by else ""
+            self.product_tree.heading(column, text=column + arrow)
+        if self.product_total:
+            pages = (self.product_total - 1) // PRODUCT_PAGE_SIZE + 1
+            page = self.product_offset // PRODUCT_PAGE_SIZE + 1
+            self.product_page_label.config(text=f"第{page}/{pages}页，共{self.product_total}个商品")
+        else:
+            self.product_page_label.config(text="没有符合条件的商品" if keyword else "系统中暂无商品信息！")
+
+    def turn_product_page(self, where: str, scroll_to_end: bool = False) -> bool:
+        """翻页：where为first/prev/next/last，返回是否翻到了新的一页"""
+        last = max(0, (self.product_total - 1) // PRODUCT_PAGE_SIZE * PRODUCT_PAGE_SIZE)
+        offset = {
+            "first": 0,
+            "prev": max(0, self.product_offset - PRODUCT_PAGE_SIZE),
+            "next": min(last, self.product_offset + PRODUCT_PAGE_SIZE),
+            "last": last,
+        }[where]
+        if offset == self.product_offset:
+            return False
+        self.product_offset = offset
+        self.load_product_page(scroll_to_end)
+        return True
+
+    def on_product_scroll(self, event):
+        down = event.num == 5 or event.delta < 0
+        top, bottom = self.product_tree.yview()
+        if down and bottom >= 1.0:
+            if self.turn_product_page("next"):
+                return "break"
+        elif not down and top <= 0.0:
+            if self.turn_product_page("prev", scroll_to_end=True):
+                return "break"
+
+    def sort_products(self, field: str):
+        sort_by, descending = self.product_sort
+        self.product_sort = (field, not descending if field == sort_by else False)
+        self.product_offset = 0
+        self.load_product_page()
+
+    def filter_products(self):
+        self.product_offset = 0
+        self.load_product_page()
 
     def show_delete_product(self):
         # 清空内容区域
@@ -272,7 +541,7 @@ class MallGUI:
             return
 
         if messagebox.askyesno("确认", f"确定要删除商品{product_id}吗？"):
-            success, msg = mall_system.delete_product(product_id)
+            success, msg = mall_system.delete_product(self.token, product_id)
             if success:
                 messagebox.showinfo("成功", msg)
                 self.delete_id_var.set("")
@@ -287,10 +556,11 @@ class MallGUI:
         # 标题
         ttk.Label(self.content_frame, text="修改商品信息", font=("宋体", 16)).pack(pady=10)
 
-        # 商品编号输入
-        ttk.Label(self.content_frame, text="请输入商品编号：", font=("宋体", 12)).pack(pady=10)
+        # 商品编号输入：可输入名称/分类的一部分，从提示中选择商品后直接查询
+        ttk.Label(self.content_frame, text="请输入商品编号（或名称、分类的一部分）：", font=("宋体", 12)).pack(pady=10)
         self.modify_id_var = tk.StringVar()
-        ttk.Entry(self.content_frame, textvariable=self.modify_id_var, font=("宋体", 12), width=30).pack(pady=5)
+        ProductPicker(self.content_frame, self.modify_id_var, self.token,
+                      on_select=lambda product: self.query_product_for_modify()).pack(pady=5)
         ttk.Button(self.content_frame, text="查询商品", command=self.query_product_for_modify).pack(pady=5)
 
         # 修改字段区域（默认隐藏）
@@ -305,7 +575,7 @@ class MallGUI:
             return
 
         # 查找商品
-        product = next((p for p in mall_system.get_all_products() if p.product_id == product_id), None)
+        product = mall_system.get_product(self.token, product_id)
         if not product:
             messagebox.showerror("失败", "商品不存在！")
             return
@@ -329,7 +599,7 @@ class MallGUI:
             messagebox.showwarning("警告", "新值不能为空！")
             return
 
-        success, msg = mall_system.modify_product(product_id, field, new_value)
+        success, msg = mall_system.modify_product(self.token, product_id, field, new_value)
         if success:
             messagebox.showinfo("成功", msg)
             self.modify_new_var.set("")
@@ -356,7 +626,11 @@ class MallGUI:
             ttk.Label(form_frame, text=label_text, font=("宋体", 12)).grid(row=i, column=0, sticky=tk.E, padx=10, pady=10)
             var = tk.StringVar()
             self.order_form_vars[var_name] = var
-            entry = ttk.Entry(form_frame, textvariable=var, font=("宋体", 12), width=30)
+            if var_name == "product_id":
+                # 商品编号支持边输入边提示
+                entry = ProductPicker(form_frame, var, self.token)
+            else:
+                entry = ttk.Entry(form_frame, textvariable=var, font=("宋体", 12), width=30)
             entry.grid(row=i, column=1, padx=10, pady=10)
 
         # 提交按钮
@@ -368,7 +642,7 @@ class MallGUI:
         product_id = self.order_form_vars["product_id"].get().strip()
         buy_count = self.order_form_vars["buy_count"].get().strip()
 
-        success, msg = mall_system.create_order(order_id, phone, product_id, buy_count)
+        success, msg = mall_system.create_order(self.token, order_id, phone, product_id, buy_count)
         if success:
             messagebox.showinfo("成功", msg)
             for var in self.order_form_vars.values():
@@ -400,14 +674,13 @@ class MallGUI:
             messagebox.showwarning("警告", "订单编号不能为空！")
             return
 
-        order = mall_system.get_order(order_id)
-        products = mall_system.get_all_products()
+        order = mall_system.get_order(self.token, order_id)
         if not order:
             self.order_detail_text.insert(tk.END, "订单不存在！")
             return
 
         # 查找商品名称
-        product = next((p for p in products if p.product_id == order.product_id), None)
+        product = mall_system.get_product(self.token, order.product_id)
         product_name = product.name if product else "未知商品"
 
         # 显示详情
@@ -442,7 +715,7 @@ class MallGUI:
             return
 
         if messagebox.askyesno("确认", f"确定要撤销订单{order_id}吗？（将恢复商品库存）"):
-            success, msg = mall_system.cancel_order(order_id)
+            success, msg = mall_system.cancel_order(self.token, order_id)
             if success:
                 messagebox.showinfo("成功", msg)
                 self.cancel_order_id_var.set("")
@@ -459,7 +732,7 @@ class MallGUI:
         ttk.Label(self.content_frame, text="订单统计分析", font=("宋体", 16)).pack(pady=10)
 
         # 获取统计数据
-        stats = mall_system.get_order_statistics()
+        stats = mall_system.get_order_statistics(self.token)
         if not stats:
             ttk.Label(self.content_frame, text="暂无订单数据，无法统计！", font=("宋体", 12)).pack(pady=20)
             return
@@ -493,7 +766,7 @@ class MallGUI:
 
     def backup_data(self):
         if messagebox.askyesno("确认", "确定要手动备份数据吗？（将覆盖现有备份）"):
-            success, msg = mall_system.backup_system_data()
+            success, msg = mall_system.backup_system_data(self.token)
             if success:
                 messagebox.showinfo("成功", msg)
             else:
@@ -501,7 +774,7 @@ class MallGUI:
 
     def restore_data(self):
         if messagebox.askyesno("确认", "确定要从备份恢复数据吗？（将覆盖当前数据）"):
-            success, msg = mall_system.restore_system_data()
+            success, msg = mall_system.restore_system_data(self.token)
             if success:
                 messagebox.showinfo("成功", msg)
             else:
@@ -519,6 +792,17 @@ class MallGUI:
         ttk.Label(self.content_frame, text="查询关键词（可选）：", font=("宋体", 12)).pack(pady=5)
         self.log_keyword_var = tk.StringVar()
         ttk.Entry(self.content_frame, textvariable=self.log_keyword_var, font=("宋体", 12), width=30).pack(pady=5)
+        # 按条件查询（走日志索引，任一条件非空时生效）
+        filter_frame = ttk.Frame(self.content_frame)
+        filter_frame.pack(pady=5)
+        ttk.Label(filter_frame, text="操作类型：", font=("宋体", 12)).grid(row=0, column=0)
+        self.log_operation_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.log_operation_var, font=("宋体", 12), width=15).grid(row=0, column=1)
+        ttk.Label(filter_frame, text="日期(YYYY-MM-DD)：", font=("宋体", 12)).grid(row=0, column=2)
+        self.log_day_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.log_day_var, font=("宋体", 12), width=12).grid(row=0, column=3)
+        self.log_fail_only_var = tk.BooleanVar()
+        ttk.Checkbutton(filter_frame, text="仅失败", variable=self.log_fail_only_var).grid(row=0, column=4, padx=5)
         ttk.Button(self.content_frame, text="查询", command=self.query_logs_submit).pack(pady=5)
 
         # 日志显示区域
@@ -527,14 +811,242 @@ class MallGUI:
 
     def query_logs_submit(self):
         keyword = self.log_keyword_var.get().strip()
-        logs = mall_system.get_recent_logs(keyword)
+        operation = self.log_operation_var.get().strip()
+        day = self.log_day_var.get().strip()
+        failed_only = self.log_fail_only_var.get()
+        if operation or day or failed_only:
+            logs = mall_system.query_logs(self.token, operation=operation or None, day=day or None,
+                                          keyword=keyword or None, failed_only=failed_only)
+        else:
+            logs = mall_system.get_recent_logs(self.token, keyword)
         self.log_text.delete(1.0, tk.END)
         for i, log in enumerate(logs, 1):
             self.log_text.insert(tk.END, f"{i}. {log}\n")
 
+    def show_performance(self):
+        # 清空内容区域
+        for widget in self.content_frame.winfo_children():
+            widget.destroy()
+
+        # 标题
+        ttk.Label(self.content_frame, text="性能统计（仅超级管理员可用）", font=("宋体", 16)).pack(pady=10)
+        ttk.Button(self.content_frame, text="刷新", command=self.show_performance).pack(pady=5)
+
+        metrics = mall_system.get_performance_metrics(self.token)
+        if not metrics:
+            ttk.Label(self.content_frame, text="暂无统计数据或权限不足！", font=("宋体", 12)).pack(pady=20)
+            return
+
+        # 创建表格（耗时单位：毫秒）
+        columns = ("指标", "次数", "平均(ms)", "P50(ms)", "P95(ms)", "P99(ms)", "最大(ms)", "字节数")
+        tree = ttk.Treeview(self.content_frame, columns=columns, show="headings", height=15)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=160 if col == "指标" else 80)
+
+        for name, data in metrics.items():
+            tree.insert("", tk.END, values=(
+                name, data["count"],
+                *(round(data[key] * 1000, 3) for key in ("mean", "p50", "p95", "p99", "max")),
+                data["bytes"]
+            ))
+
+        # 滚动条
+        scrollbar = ttk.Scrollbar(self.content_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+    def show_sales_report(self):
+        # 清空内容区域
+        for widget in self.content_frame.winfo_children():
+            widget.destroy()
+
+        # 标题
+        ttk.Label(self.content_frame, text="时段销售报表", font=("宋体", 16)).pack(pady=10)
+
+        # 条件：粒度、时间范围（YYYY-MM-DD或YYYY-MM-DD HH:MM:SS，可留空）、分类
+        filter_frame = ttk.Frame(self.content_frame)
+        filter_frame.pack(pady=5)
+        self.rollup_granularity_var = tk.StringVar(value="按天")
+        ttk.Combobox(filter_frame, textvariable=self.rollup_granularity_var, values=list(ROLLUP_OPTIONS),
+                     state="readonly", width=8).grid(row=0, column=0, padx=5)
+        ttk.Label(filter_frame, text="从：", font=("宋体", 12)).grid(row=0, column=1)
+        self.rollup_start_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.rollup_start_var, font=("宋体", 12), width=19).grid(row=0, column=2)
+        ttk.Label(filter_frame, text="到：", font=("宋体", 12)).grid(row=0, column=3)
+        self.rollup_end_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.rollup_end_var, font=("宋体", 12), width=19).grid(row=0, column=4)
+        ttk.Label(filter_frame, text="分类：", font=("宋体", 12)).grid(row=0, column=5)
+        self.rollup_category_var = tk.StringVar(value="全部")
+        categories = ["全部"] + sorted(mall_system.get_product_categories(self.token))
+        ttk.Combobox(filter_frame, textvariable=self.rollup_category_var, values=categories,
+                     state="readonly", width=12).grid(row=0, column=6, padx=5)
+        ttk.Button(filter_frame, text="查询", command=self.query_sales_report).grid(row=0, column=7, padx=5)
+
+        # 上方为各时段汇总，双击某个时段在下方列出该时段的订单
+        columns = ("时段", "订单数", "销售数量", "销售额（元）")
+        self.rollup_tree = ttk.Treeview(self.content_frame, columns=columns, show="headings", height=12)
+        for col in columns:
+            self.rollup_tree.heading(col, text=col)
+            self.rollup_tree.column(col, width=160)
+        self.rollup_tree.bind("<Double-1>", self.show_period_orders)
+        self.rollup_tree.pack(fill=tk.BOTH, expand=True)
+
+        self.period_order_label = ttk.Label(self.content_frame, text="双击时段查看该时段的订单", font=("宋体", 12))
+        self.period_order_label.pack(pady=5)
+        columns = ("订单编号", "下单时间", "手机号", "商品编号", "购买数量", "订单金额（元）")
+        self.period_order_tree = ttk.Treeview(self.content_frame, columns=columns, show="headings", height=8)
+        for col in columns:
+            self.period_order_tree.heading(col, text=col)
+            self.period_order_tree.column(col, width=120)
+        self.period_order_tree.pack(fill=tk.BOTH, expand=True)
+
+        self.query_sales_report()
+
+    def query_sales_report(self):
+        start = self.rollup_start_var.get().strip()
+        end = self.rollup_end_var.get().strip()
+        try:
+            for value in (start, end):
+                if value:
+                    parse_time_bound(value)
+        except ValueError:
+            messagebox.showwarning("警告", "时间格式应为YYYY-MM-DD或YYYY-MM-DD HH:MM:SS！")
+            return
+
+        granularity, period_format = ROLLUP_OPTIONS[self.rollup_granularity_var.get()]
+        category = self.rollup_category_var.get()
+        rollup = mall_system.get_sales_rollup(self.token, granularity, start or None, end or None,
+                                              None if category == "全部" else category)
+        self.rollup_tree.delete(*self.rollup_tree.get_children())
+        self.period_order_tree.delete(*self.period_order_tree.get_children())
+        total_orders, total_count, total_amount = 0, 0, 0.0
+        for item in rollup:
+            # 时段起点作为行标识，双击时据此查询订单
+            self.rollup_tree.insert("", tk.END, iid=item["period"].strftime(TIME_FORMAT), values=(
+                item["period"].strftime(period_format), item["order_count"], item["sales_count"],
+                round(item["sales_amount"], 2)
+            ))
+            total_orders += item["order_count"]
+            total_count += item["sales_count"]
+            total_amount += item["sales_amount"]
+        self.rollup_tree.insert("", tk.END, values=("总计", total_orders, total_count, round(total_amount, 2)))
+
+    def show_period_orders(self, event):
+        period = self.rollup_tree.identify_row(event.y)
+        if not period or not period[0].isdigit():
+            return  # 总计行
+        granularity, period_format = ROLLUP_OPTIONS[self.rollup_granularity_var.get()]
+        start = datetime.datetime.strptime(period, TIME_FORMAT)
+        end = start + datetime.timedelta(hours=1 if granularity == "hour" else 24, seconds=-1)
+        orders, total = mall_system.get_orders_between(self.token, period, end.strftime(TIME_FORMAT),
+                                                       0, PERIOD_ORDER_LIMIT)
+        # 时间索引不区分分类：选了分类时只显示该分类商品的订单
+        category = self.rollup_category_var.get()
+        if category != "全部":
+            orders = [order for order in orders
+                      if getattr(mall_system.get_product(self.token, order.product_id), "category", None) == category]
+
+        self.period_order_tree.delete(*self.period_order_tree.get_children())
+        for order in orders:
+            self.period_order_tree.insert("", tk.END, values=(
+                order.order_id, order.create_time.strftime(TIME_FORMAT), order.phone, order.product_id,
+                order.buy_count, round(order.total_amount, 2)
+            ))
+        shown = f"前{PERIOD_ORDER_LIMIT}个" if total > PERIOD_ORDER_LIMIT else f"共{total}个"
+        self.period_order_label.config(text=f"{start.strftime(period_format)} 的订单（{shown}，按下单时间排列）")
+
+    def show_customer_orders(self):
+        # 清空内容区域
+        for widget in self.content_frame.winfo_children():
+            widget.destroy()
+
+        # 标题
+        ttk.Label(self.content_frame, text="客户订单查询", font=("宋体", 16)).pack(pady=10)
+
+        # 手机号输入
+        search_frame = ttk.Frame(self.content_frame)
+        search_frame.pack(pady=5)
+        ttk.Label(search_frame, text="客户手机号：", font=("宋体", 12)).grid(row=0, column=0)
+        self.customer_phone_var = tk.StringVar()
+        phone_entry = ttk.Entry(search_frame, textvariable=self.customer_phone_var, font=("宋体", 12), width=20)
+        phone_entry.grid(row=0, column=1, padx=5)
+        phone_entry.bind("<Return>", lambda event: self.query_customer_orders())
+        ttk.Button(search_frame, text="查询", command=self.query_customer_orders).grid(row=0, column=2, padx=5)
+
+        # 客户汇总：订单数、累计消费额
+        self.customer_summary_label = ttk.Label(self.content_frame, font=("宋体", 12))
+        self.customer_summary_label.pack(pady=5)
+
+        # 翻页栏
+        page_frame = ttk.Frame(self.content_frame)
+        page_frame.pack(side=tk.BOTTOM, pady=5)
+        ttk.Button(page_frame, text="上一页", command=lambda: self.turn_customer_page(-1)).pack(side=tk.LEFT, padx=3)
+        self.customer_page_label = ttk.Label(page_frame, font=("宋体", 12))
+        self.customer_page_label.pack(side=tk.LEFT, padx=10)
+        ttk.Button(page_frame, text="下一页", command=lambda: self.turn_customer_page(1)).pack(side=tk.LEFT, padx=3)
+
+        # 订单表格（从新到旧）
+        columns = ("订单编号", "下单时间", "商品编号", "购买数量", "下单单价（元）", "订单金额（元）")
+        self.customer_order_tree = ttk.Treeview(self.content_frame, columns=columns, show="headings", height=15)
+        for col in columns:
+            self.customer_order_tree.heading(col, text=col)
+            self.customer_order_tree.column(col, width=120)
+        scrollbar = ttk.Scrollbar(self.content_frame, orient=tk.VERTICAL, command=self.customer_order_tree.yview)
+        self.customer_order_tree.configure(yscrollcommand=scrollbar.set)
+        self.customer_order_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.customer_phone = None
+        self.customer_offset = 0
+        self.customer_total = 0
+
+    def query_customer_orders(self):
+        phone = self.customer_phone_var.get().strip()
+        if not check_phone(phone):
+            messagebox.showwarning("警告", "手机号必须是11位数字！")
+            return
+        self.customer_phone = phone
+        self.customer_offset = 0
+        self.load_customer_page()
+
+    def load_customer_page(self):
+        orders, totals = mall_system.get_orders_by_phone(self.token, self.customer_phone, self.customer_offset,
+                                                         CUSTOMER_PAGE_SIZE)
+        self.customer_order_tree.delete(*self.customer_order_tree.get_children())
+        if not totals:
+            self.customer_summary_label.config(text="查询失败：权限不足")
+            self.customer_page_label.config(text="")
+            return
+        self.customer_total = totals["order_count"]
+        for order in orders:
+            self.customer_order_tree.insert("", tk.END, values=(
+                order.order_id, order.create_time.strftime(TIME_FORMAT), order.product_id, order.buy_count,
+                round(order.product_price, 2), round(order.total_amount, 2)
+            ))
+        if self.customer_total:
+            self.customer_summary_label.config(
+                text=f"客户{self.customer_phone}：共{self.customer_total}个订单，累计消费{totals['total_spend']:.2f}元")
+            pages = (self.customer_total - 1) // CUSTOMER_PAGE_SIZE + 1
+            page = self.customer_offset // CUSTOMER_PAGE_SIZE + 1
+            self.customer_page_label.config(text=f"第{page}/{pages}页")
+        else:
+            self.customer_summary_label.config(text=f"客户{self.customer_phone}暂无订单")
+            self.customer_page_label.config(text="")
+
+    def turn_customer_page(self, step: int):
+        """翻页：step为-1（上一页）或1（下一页）"""
+        offset = self.customer_offset + step * CUSTOMER_PAGE_SIZE
+        if self.customer_phone is None or offset < 0 or offset >= self.customer_total:
+            return
+        self.customer_offset = offset
+        self.load_customer_page()
+
     def clear_logs(self):
-        if messagebox.askyesno("确认", "确定要清理系统日志吗？（日志将永久删除）"):
-            success, msg = mall_system.clear_logs()
+        if messagebox.askyesno("确认", "确定要清理系统日志吗？（当前日志将压缩归档，超出保留个数的旧归档会被删除）"):
+            success, msg = mall_system.clear_logs(self.token)
             if success:
                 messagebox.showinfo("成功", msg)
             else:
@@ -542,11 +1054,13 @@ class MallGUI:
 
     def exit_system(self):
         if messagebox.askyesno("确认", "确定要退出系统吗？"):
+            mall_system.logout(self.token)
             mall_system.exit_system()
             self.root.destroy()
 
 # 启动界面
 if __name__ == "__main__":
     root = tk.Tk()
+    mall_system = load_mall_system(root)
     app = MallGUI(root)
     root.mainloop()
\ No newline at end of file
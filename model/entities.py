@@ -1,12 +1,48 @@
 from typing import Dict
 import datetime
+import sys
+
+# 下单时间统一存为整数秒（本地时间，以1970-01-01 00:00:00为起点），比datetime对象省内存
+_EPOCH = datetime.datetime(1970, 1, 1)
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def datetime_to_ts(value: datetime.datetime) -> int:
+    """datetime转为整数秒（舍去微秒）"""
+    delta = value - _EPOCH
+    return delta.days * 86400 + delta.seconds
+
+def ts_to_datetime(ts: int) -> datetime.datetime:
+    """整数秒转为datetime"""
+    return _EPOCH + datetime.timedelta(seconds=ts)
+
+def parse_time_str(value: str) -> int:
+    """解析"YYYY-MM-DD HH:MM:SS"格式的时间字符串为整数秒（格式错误抛出ValueError）"""
+    if len(value) != 19 or value[4] != "-" or value[7] != "-" or value[10] != " " \
+            or value[13] != ":" or value[16] != ":":
+        raise ValueError(f"时间格式错误：{value}")
+    # 直接按位置切片构造，比strptime快一个数量级
+    return datetime_to_ts(datetime.datetime(
+        int(value[0:4]), int(value[5:7]), int(value[8:10]),
+        int(value[11:13]), int(value[14:16]), int(value[17:19])
+    ))
+
+def parse_time_bound(value: str, end: bool = False) -> int:
+    """解析查询时间范围的一端："YYYY-MM-DD HH:MM:SS"，或只写日期"YYYY-MM-DD"（作为上界时取当天最后一秒）"""
+    value = value.strip()
+    if len(value) == 10:
+        return parse_time_str(value + " 00:00:00") + (86399 if end else 0)
+    return parse_time_str(value)
 
 class User:
     """用户实体：封装管理员信息"""
+    __slots__ = ("username", "password", "is_super", "login_fail_count", "lock_time")
+
     def __init__(self, username: str, password: str, is_super: bool = False):
         self.username = username
         self.password = password
         self.is_super = is_super
+        # 登录失败锁定已改由SessionManager按（账号, 客户端）记录（见service/session.py），
+        # 这两个字段不再使用，只为兼容已有数据文件格式（JSON/SQLite/二进制快照）照常读写
         self.login_fail_count = 0
         self.lock_time = 0
 
@@ -22,10 +58,12 @@ class User:
 
 class Product:
     """商品实体：封装商品信息"""
+    __slots__ = ("product_id", "name", "category", "price", "stock")
+
     def __init__(self, product_id: str, name: str, category: str, price: float, stock: int):
-        self.product_id = product_id
+        self.product_id = sys.intern(product_id)  # 订单中大量重复引用，驻留后共用同一个字符串
         self.name = name
-        self.category = category
+        self.category = sys.intern(category)
         self.price = price
         self.stock = stock
 
@@ -44,15 +82,26 @@ class Product:
         return round(self.price * self.stock, 2)
 
 class Order:
-    """订单实体：封装订单信息"""
+    """订单实体：封装订单信息（使用__slots__，百万级历史订单时节省内存）"""
+    __slots__ = ("order_id", "phone", "product_id", "buy_count", "product_price", "total_amount", "create_ts")
+
     def __init__(self, order_id: str, phone: str, product_id: str, buy_count: int, product_price: float):
         self.order_id = order_id
-        self.phone = phone
-        self.product_id = product_id
+        self.phone = sys.intern(phone)  # 同一客户的订单共用手机号字符串
+        self.product_id = sys.intern(product_id)
         self.buy_count = buy_count
         self.product_price = product_price      #历史订单的金额应该按下单时的价格算，所以必须单独存下单时的价格
         self.total_amount = round(product_price * buy_count, 2)
-        self.create_time = datetime.datetime.now()
+        self.create_ts = datetime_to_ts(datetime.datetime.now())  # 下单时间（整数秒）
+
+    @property
+    def create_time(self) -> datetime.datetime:
+        """下单时间：按需由整数秒转换为datetime，供View层格式化显示"""
+        return ts_to_datetime(self.create_ts)
+
+    @create_time.setter
+    def create_time(self, value: datetime.datetime) -> None:
+        self.create_ts = datetime_to_ts(value)
 
     def to_dict(self) -> Dict:
         return {
@@ -62,5 +111,5 @@ class Order:
             "buy_count": self.buy_count,
             "product_price": self.product_price,
             "total_amount": self.total_amount,
-            "create_time": self.create_time.strftime("%Y-%m-%d %H:%M:%S")       #因为时间对象不能直接存到 JSON，必须转成字符串
+            "create_time": self.create_time.strftime(TIME_FORMAT)       #因为时间对象不能直接存到 JSON，必须转成字符串
         }
\ No newline at end of file
@@ -0,0 +1,211 @@
+from typing import Dict, Iterable, List, Optional
+from model.entities import Order, ts_to_datetime
+
+# NumPy为可选依赖：安装后销售报表由列存引擎向量化计算，未安装时MallSystem使用增量维护的汇总
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NUMPY_AVAILABLE = np is not None
+
+# 报表时段粒度 -> 时段长度（秒），与订单时间索引的汇总粒度一致
+HISTOGRAM_GRANULARITIES = {"hour": 3600, "day": 86400}
+# 列存的初始容量，写满后翻倍
+INITIAL_CAPACITY = 1024
+
+
+class OrderColumns:
+    """订单列存：每个订单一行，商品编号/分类映射为整数编码，各列为NumPy数组。
+    下单时追加一行，撤单时只把该行标记为无效（无效行过半时压缩），商品改分类/删除时只改商品->分类编码表。
+    统计用bincount按编码分组求和，不遍历Order对象。非线程安全，由调用方在提交锁内调用"""
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        if np is None:
+            raise RuntimeError("未安装NumPy，无法使用列存统计引擎")
+        self._rows: Dict[str, int] = {}  # 订单编号 -> 行号
+        self._size = 0                   # 已使用的行数（含无效行）
+        self._product = np.empty(capacity, dtype=np.int32)
+        self._count = np.empty(capacity, dtype=np.int64)
+        self._price = np.empty(capacity, dtype=np.float64)
+        self._amount = np.empty(capacity, dtype=np.float64)
+        self._ts = np.empty(capacity, dtype=np.int64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        # 商品编码 -> 商品编号，分类编码 -> 分类；商品当前分类的编码（-1表示商品已删除）
+        self._product_codes: Dict[str, int] = {}
+        self._product_ids: List[str] = []
+        self._category_codes: Dict[str, int] = {}
+        self._categories: List[str] = []
+        self._category_of = np.full(INITIAL_CAPACITY, -1, dtype=np.int32)
+
+    @classmethod
+    def build(cls, orders: Iterable[Order], categories: Dict[str, str]) -> "OrderColumns":
+        """全量构建：categories为商品编号 -> 当前分类（不在其中的商品视为已删除）"""
+        order_ids, products, counts, prices, amounts, times = [], [], [], [], [], []
+        product_codes: Dict[str, int] = {}
+        for order in orders:
+            code = product_codes.get(order.product_id)
+            if code is None:
+                code = product_codes[order.product_id] = len(product_codes)
+            order_ids.append(order.order_id)
+            products.append(code)
+            counts.append(order.buy_count)
+            prices.append(order.product_price)
+            amounts.append(order.total_amount)
+            times.append(order.create_ts)
+
+        columns = cls(max(INITIAL_CAPACITY, len(order_ids)))
+        size = columns._size = len(order_ids)
+        columns._rows = dict(zip(order_ids, range(size)))
+        columns._product[:size] = products
+        columns._count[:size] = counts
+        columns._price[:size] = prices
+        columns._amount[:size] = amounts
+        columns._ts[:size] = times
+        columns._alive[:size] = True
+        for product_id in product_codes:
+            columns._product_code(product_id)
+            columns.set_category(product_id, categories.get(product_id))
+        return columns
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _product_code(self, product_id: str) -> int:
+        code = self._product_codes.get(product_id)
+        if code is None:
+            code = self._product_codes[product_id] = len(self._product_ids)
+            self._product_ids.append(product_id)
+            if code >= len(self._category_of):
+                grown = np.full(len(self._category_of) * 2, -1, dtype=np.int32)
+                grown[:code] = self._category_of[:code]
+                self._category_of = grown
+        return code
+
+    def _category_code(self, category: str) -> int:
+        code = self._category_codes.get(category)
+        if code is None:
+            code = self._category_codes[category] = len(self._categories)
+            self._categories.append(category)
+        return code
+
+    def _resize(self, capacity: int) -> None:
+        for name in ("_product", "_count", "_price", "_amount", "_ts", "_alive"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def add(self, order: Order, category: Optional[str]) -> None:
+        """追加订单：category为商品当前分类（商品已删除时为None）"""
+        if self._size == len(self._alive):
+            self._resize(len(self._alive) * 2)
+        row = self._size
+        self._size += 1
+        self._rows[order.order_id] = row
+        self._product[row] = self._product_code(order.product_id)
+        self._count[row] = order.buy_count
+        self._price[row] = order.product_price
+        self._amount[row] = order.total_amount
+        self._ts[row] = order.create_ts
+        self._alive[row] = True
+        self.set_category(order.product_id, category)
+
+    def remove(self, order_id: str) -> None:
+        row = self._rows.pop(order_id, None)
+        if row is None:
+            return
+        self._alive[row] = False
+        if self._size > INITIAL_CAPACITY and len(self._rows) < self._size // 2:
+            self._compact()
+
+    def _compact(self) -> None:
+        """去掉无效行：保持原有顺序，重新编排行号"""
+        alive = self._alive[:self._size]
+        size = int(alive.sum())
+        for name in ("_product", "_count", "_price", "_amount", "_ts"):
+            column = getattr(self, name)
+            column[:size] = column[:self._size][alive]
+        order_ids = sorted(self._rows, key=self._rows.get)
+        self._rows = dict(zip(order_ids, range(size)))
+        self._alive[:size] = True
+        self._alive[size:self._size] = False
+        self._size = size
+
+    def set_category(self, product_id: str, category: Optional[str]) -> None:
+        """商品加入/改分类（category为新分类）或删除（category为None）"""
+        code = self._product_codes.get(product_id)
+        if code is None:
+            return  # 商品还没有订单，下单时再登记
+        self._category_of[code] = -1 if category is None else self._category_code(category)
+
+    def report(self, top_n: int = 10, granularity: str = "day", category: Optional[str] = None) -> Dict:
+        """销售报表，格式同MallSystem.get_sales_report：
+        by_category为各分类的销售数量/销售额（与get_order_statistics一致，只统计现存商品）；
+        top_products、histogram、订单数、销售额、客单价限定在category内（None为全部订单，含已删除商品的订单）"""
+        alive = self._alive[:self._size]
+        products = self._product[:self._size][alive]
+        counts = self._count[:self._size][alive]
+        amounts = self._amount[:self._size][alive]
+        times = self._ts[:self._size][alive]
+        n_products = len(self._product_ids)
+        category_of = self._category_of[:n_products]
+
+        # 按商品分组：订单数、销售数量、销售额
+        product_orders = np.bincount(products, minlength=n_products)
+        product_counts = np.bincount(products, weights=counts, minlength=n_products)
+        product_amounts = np.bincount(products, weights=amounts, minlength=n_products)
+
+        # 按商品当前分类汇总（已删除商品的编码为-1，不计入）
+        existing = category_of >= 0
+        n_categories = len(self._categories)
+        category_orders = np.bincount(category_of[existing], weights=product_orders[existing], minlength=n_categories)
+        category_counts = np.bincount(category_of[existing], weights=product_counts[existing], minlength=n_categories)
+        category_amounts = np.bincount(category_of[existing], weights=product_amounts[existing],
+                                       minlength=n_categories)
+        by_category = {self._categories[code]: {"sales_count": int(category_counts[code]),
+                                                "sales_amount": round(float(category_amounts[code]), 2)}
+                       for code in np.flatnonzero(category_orders)}
+
+        # 限定分类：商品编码 -> 是否属于该分类，再选出对应的订单行
+        if category is not None:
+            code = self._category_codes.get(category, -2)
+            in_scope = category_of == code
+            rows = in_scope[products]
+            counts, amounts, times = counts[rows], amounts[rows], times[rows]
+        else:
+            in_scope = np.ones(n_products, dtype=bool)
+
+        # 销售额最高的商品：先用partition找出第top_n名的金额，只对不低于它的少数商品精确排序（同额按编号）
+        rounded = np.round(product_amounts, 2)
+        candidates = np.flatnonzero(in_scope & (product_orders > 0))
+        if top_n > 0 and len(candidates) > top_n:
+            threshold = np.partition(rounded[candidates], len(candidates) - top_n)[len(candidates) - top_n]
+            candidates = candidates[rounded[candidates] >= threshold]
+        ranked = sorted(candidates.tolist(), key=lambda code: (-rounded[code], self._product_ids[code]))[:max(0, top_n)]
+        top_products = [{"product_id": self._product_ids[code], "order_count": int(product_orders[code]),
+                         "sales_count": int(product_counts[code]), "sales_amount": float(rounded[code])}
+                        for code in ranked]
+
+        # 按时段分组：时段起点去重后得到每行的时段下标
+        seconds = HISTOGRAM_GRANULARITIES[granularity]
+        periods, period_index = np.unique(times - times % seconds, return_inverse=True)
+        period_orders = np.bincount(period_index, minlength=len(periods))
+        period_counts = np.bincount(period_index, weights=counts, minlength=len(periods))
+        period_amounts = np.bincount(period_index, weights=amounts, minlength=len(periods))
+        histogram = [{"period": ts_to_datetime(int(period)), "order_count": int(orders),
+                      "sales_count": int(count), "sales_amount": round(float(amount), 2)}
+                     for period, orders, count, amount in zip(periods, period_orders, period_counts, period_amounts)]
+
+        order_count = len(counts)
+        sales_amount = float(amounts.sum())
+        return {
+            "by_category": by_category,
+            "top_products": top_products,
+            "histogram": histogram,
+            "order_count": order_count,
+            "sales_count": int(counts.sum()),
+            "sales_amount": round(sales_amount, 2),
+            "average_order_value": round(sales_amount / order_count, 2) if order_count else 0.0,
+            "engine": "numpy",
+        }
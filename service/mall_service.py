@@ -1,35 +1,266 @@
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Callable, Iterable
+from collections.abc import MutableMapping
+import functools
+import heapq
+import itertools
+import threading
 import time
-from model.entities import User, Product, Order
-from dao.data_handler import load_data, save_data, backup_data, restore_data
+from model.entities import User, Product, Order, ts_to_datetime, parse_time_bound
+from dao.data_handler import load_data, save_data, save_changes, backup_data, restore_data
+from dao.journal import put_record, delete_record
 from utils.validator import check_password_strength, check_phone, check_positive_number
-from utils.log_config import logger
-import os
+from utils.csv_reader import iter_csv_rows
+from utils.concurrency import ReadWriteLock, StripedLock
+from service.session import Session, SessionManager
+from service.product_index import ProductIndex, INDEXED_FIELDS
+from service.product_search import ProductSearchIndex
+from service.order_index import OrderTimeIndex, CustomerOrderIndex, ROLLUP_GRANULARITIES
+from service.analytics import OrderColumns, NUMPY_AVAILABLE
+from service.result_cache import ResultCache
+from utils.log_config import logger, LOG_FILE, flush_log, rotate_log
+from utils.metrics import registry
+from utils.log_reader import tail_lines, query_logs, remove_index
 from typing import List, Tuple, Optional, Dict
 
+# 批量提交（group commit）：开启后变更先记在内存，由后台线程每隔GROUP_COMMIT_INTERVAL秒
+# 或累计GROUP_COMMIT_MAX_CHANGES个操作后统一写一次；exit_system和flush()会立即写入
+GROUP_COMMIT_ENABLED = False
+GROUP_COMMIT_INTERVAL = 1.0
+GROUP_COMMIT_MAX_CHANGES = 20
+
+# 商品分段锁的段数：不同商品的库存修改大多落在不同的段上，可以并行
+PRODUCT_LOCK_STRIPES = 64
+
+# 分页查询商品时可排序的字段 -> 取值函数（相同时再按商品编号排序，翻页顺序稳定）
+PRODUCT_SORT_KEYS = {
+    "product_id": lambda product: product.product_id,
+    "name": lambda product: (product.name, product.product_id),
+    "category": lambda product: (product.category, product.product_id),
+    "price": lambda product: (product.price, product.product_id),
+    "stock": lambda product: (product.stock, product.product_id),
+    "total_value": lambda product: (product.total_value, product.product_id),
+}
+
+# 锁的获取顺序：商品目录读写锁 -> 提交锁 -> 商品分段锁；持有分段锁时不能再获取提交锁
+def _serialized(method):
+    """装饰器：增删商品/用户、恢复、退出等整体性操作独占执行（目录写锁+提交锁）"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._catalog_lock.write_locked(), self._commit_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def _shared(method):
+    """装饰器：只读取商品目录或修改单个商品/订单的操作共享执行（目录读锁），可以多线程并行"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._catalog_lock.read_locked():
+            return method(self, *args, **kwargs)
+    return wrapper
+
 class MallSystem:
-    """商城系统业务核心：处理权限、商品、订单等业务逻辑"""
-    def __init__(self):
-        # 初始化数据
-        self.users: List[User] = []
-        self.products: List[Product] = []
-        self.orders: List[Order] = []
-        self.current_user: Optional[User] = None
-        #先定义空列表，再赋值
-        self._load_initial_data()
+    """商城系统业务核心：处理权限、商品、订单等业务逻辑。
+    login返回会话令牌，之后的业务方法都以令牌作为第一个参数，一个实例可同时服务多个操作人"""
+    def __init__(self, progress_callback: Optional[Callable[[int, int], None]] = None):
+        # 初始化数据：按主键索引的字典（保持插入顺序），查找/删除都是O(1)
+        self._users: Dict[str, User] = {}
+        self._products: Dict[str, Product] = {}
+        self._orders: Dict[str, Order] = {}
+        # 销售汇总：[订单数, 销售数量, 销售额]，下单/撤单/改分类时增量维护
+        self._product_sales: Dict[str, List] = {}   # 商品编号 -> 汇总（含已删除商品的订单）
+        self._category_sales: Dict[str, List] = {}  # 分类 -> 汇总（只统计现存商品）
+        # 商品二级索引：按分类分桶，单价/库存/总价值/编号有序，库存必须通过它的adjust_stock修改
+        self._product_index = ProductIndex()
+        # 商品搜索索引：名称/分类/编号的子串和前缀查询，第一次搜索时构建
+        self._product_search = ProductSearchIndex()
+        # 订单时间索引及按小时/按天的销售汇总：第一次按时间查询时才构建（启动时不必遍历全部订单），之后增量维护
+        self._order_times: Optional[OrderTimeIndex] = None
+        # 客户订单索引（手机号 -> 订单、累计消费额）：同样在第一次按手机号查询时构建
+        self._customer_orders: Optional[CustomerOrderIndex] = None
+        # 订单列存（需要NumPy）：销售报表向量化计算，第一次生成报表时构建
+        self._analytics: Optional[OrderColumns] = None
+        # 查询结果缓存：用户/商品/库存/订单各有版本号，下列派生索引的维护函数在修改后递增版本号
+        self._cache = ResultCache()
+        self._sessions = SessionManager()  # 令牌 -> 会话（操作人、缓存的权限、空闲时间）
+        # 并发控制：目录读写锁保护商品/用户字典的结构，提交锁保护订单字典、销售汇总和持久化（串行写入），
+        # 商品分段锁保护单个商品的库存等字段
+        self._catalog_lock = ReadWriteLock()
+        self._commit_lock = threading.RLock()
+        self._product_locks = StripedLock(PRODUCT_LOCK_STRIPES)
+        # 批量提交：待写入的变更及对应的回滚函数（写入失败时按相反顺序回滚）
+        self._pending_changes: List[Dict] = []
+        self._pending_rollbacks: List[Callable[[], None]] = []
+        self._rollback_required = False  # 批量写入失败、等待获取目录写锁回滚时为True，期间不再写入
+        self._flush_event = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        #先定义空字典，再赋值
+        self._load_initial_data(progress_callback)
         self._init_default_users()  # 初始化默认管理员
+        if GROUP_COMMIT_ENABLED:
+            self._flusher = threading.Thread(target=self._flush_loop, name="mall-group-commit", daemon=True)
+            self._flusher.start()
+
+    # 列表形式的访问接口：赋值时重建索引（加载、恢复数据时使用）
+    @property
+    def users(self) -> List[User]:
+        return list(self._users.values())
+
+    @users.setter
+    def users(self, users: List[User]) -> None:
+        self._users = {u.username: u for u in users}
+
+    @property
+    def products(self) -> List[Product]:
+        return list(self._products.values())
+
+    @products.setter
+    def products(self, products: List[Product]) -> None:
+        self._products = {p.product_id: p for p in products}
+
+    @property
+    def orders(self) -> List[Order]:
+        with self._commit_lock:
+            return list(self._orders.values())
+
+    @orders.setter
+    def orders(self, orders: List[Order]) -> None:
+        # 二进制快照加载的订单已是按编号访问的映射（按需构造），直接使用
+        self._orders = orders if isinstance(orders, MutableMapping) else {o.order_id: o for o in orders}
+
+    def _load_initial_data(self, progress_callback: Optional[Callable[[int, int], None]] = None) -> None:
+        """加载初始数据：调用DAO层接口，progress_callback(已完成, 总量)报告加载进度"""
+        self.users, self.products, self.orders = load_data(progress_callback)
+        self._rebuild_indexes()
+
+    # ------------------------------ 派生索引维护 ------------------------------
+    def _rebuild_indexes(self) -> None:
+        """重建派生索引：加载、恢复数据后调用一次"""
+        self._cache.bump()  # 全部数据已替换（调用方独占执行，不会与查询交错）
+        self._product_index.rebuild(self._products.values())
+        self._product_search.reset()
+        self._order_times = None
+        self._customer_orders = None
+        self._analytics = None
+        self._product_sales = {}
+        self._category_sales = {}
+        if hasattr(self._orders, "product_sales"):
+            # 二进制快照自带商品销售汇总，不必逐个构造订单
+            for product_id, sales in self._orders.product_sales().items():
+                self._add_product_sales(product_id, *sales)
+            return
+        # 其余派生索引此时都未构建，只需累加销售汇总
+        for order in self._orders.values():
+            self._add_product_sales(order.product_id, 1, order.buy_count, order.total_amount)
+
+    def _index_order(self, order: Order) -> None:
+        """订单加入索引：累加商品和分类的销售汇总"""
+        self._add_product_sales(order.product_id, 1, order.buy_count, order.total_amount)
+        if self._order_times is not None:
+            product = self._products.get(order.product_id)
+            self._order_times.add(order, product.category if product else None)
+        if self._customer_orders is not None:
+            self._customer_orders.add(order)
+        if self._analytics is not None:
+            product = self._products.get(order.product_id)
+            self._analytics.add(order, product.category if product else None)
+        self._cache.bump("orders")
+
+    def _unindex_order(self, order: Order) -> None:
+        """订单移出索引：扣减商品和分类的销售汇总"""
+        self._add_product_sales(order.product_id, -1, -order.buy_count, -order.total_amount)
+        if self._order_times is not None:
+            product = self._products.get(order.product_id)
+            self._order_times.remove(order, product.category if product else None)
+        if self._customer_orders is not None:
+            self._customer_orders.remove(order)
+        if self._analytics is not None:
+            self._analytics.remove(order.order_id)
+        self._cache.bump("orders")
+
+    def _index_product(self, product: Product, catalog: bool = True) -> None:
+        """商品加入索引：该商品已有订单的销售额计入其分类；catalog=False时由调用方批量加入商品二级索引"""
+        if catalog:
+            self._product_index.add(product)
+            self._product_search.add(product)
+        sales = self._product_sales.get(product.product_id)
+        if sales:
+            self._add_category_sales(product.category, *sales)
+            if self._order_times is not None:
+                self._order_times.attach_product(product.product_id, product.category)
+            if self._analytics is not None:
+                self._analytics.set_category(product.product_id, product.category)
+        self._cache.bump("products")
+
+    def _unindex_product(self, product: Product, catalog: bool = True) -> None:
+        """商品移出索引（删除或修改前调用）：从分类汇总中扣除该商品的销售额"""
+        if catalog:
+            self._product_index.remove(product)
+            self._product_search.remove(product.product_id)
+        sales = self._product_sales.get(product.product_id)
+        if sales:
+            self._add_category_sales(product.category, -sales[0], -sales[1], -sales[2])
+            if self._order_times is not None:
+                self._order_times.detach_product(product.product_id, product.category)
+            if self._analytics is not None:
+                self._analytics.set_category(product.product_id, None)
+        self._cache.bump("products")
+
+    def _order_time_index(self) -> OrderTimeIndex:
+        """订单时间索引（调用方持有提交锁）：尚未构建时遍历全部订单构建一次"""
+        if self._order_times is None:
+            categories = {product_id: product.category for product_id, product in self._products.items()}
+            self._order_times = OrderTimeIndex.build(self._orders.values(), categories)
+        return self._order_times
+
+    def _customer_order_index(self) -> CustomerOrderIndex:
+        """客户订单索引（调用方持有提交锁）：尚未构建时遍历全部订单构建一次"""
+        if self._customer_orders is None:
+            self._customer_orders = CustomerOrderIndex.build(self._orders.values())
+        return self._customer_orders
 
-    def _load_initial_data(self) -> None:
-        """加载初始数据：调用DAO层接口"""
-        self.users, self.products, self.orders = load_data()
+    def _order_columns(self) -> OrderColumns:
+        """订单列存（调用方持有提交锁，且已安装NumPy）：尚未构建时遍历全部订单构建一次"""
+        if self._analytics is None:
+            categories = {product_id: product.category for product_id, product in self._products.items()}
+            self._analytics = OrderColumns.build(self._orders.values(), categories)
+        return self._analytics
+
+    def _adjust_stock(self, product: Product, delta: int) -> None:
+        """加减库存（调用方持有该商品的锁）：经商品二级索引修改，改完后使依赖库存的缓存结果失效"""
+        self._product_index.adjust_stock(product, delta)
+        self._cache.bump("stock")
+
+    def _cached(self, key: tuple, collections: Iterable[str], compute: Callable[[], object]) -> tuple:
+        """查询结果缓存：返回（结果，是否命中），collections为结果依赖的数据集合，见service/result_cache.py"""
+        return self._cache.get_or_compute(key, collections, compute)
+
+    def _add_product_sales(self, product_id: str, orders: int, count: int, amount: float) -> None:
+        sales = self._product_sales.setdefault(product_id, [0, 0, 0.0])
+        sales[0] += orders
+        sales[1] += count
+        sales[2] += amount
+        if sales[0] <= 0:
+            del self._product_sales[product_id]
+        product = self._products.get(product_id)
+        if product:
+            self._add_category_sales(product.category, orders, count, amount)
+
+    def _add_category_sales(self, category: str, orders: int, count: int, amount: float) -> None:
+        sales = self._category_sales.setdefault(category, [0, 0, 0.0])
+        sales[0] += orders
+        sales[1] += count
+        sales[2] += amount
+        if sales[0] <= 0:
+            del self._category_sales[category]  # 分类下已没有订单，与全量统计保持一致
 
     def _init_default_users(self) -> None:
         """初始化默认管理员（无用户数据时）"""
-        if not self.users:
+        if not self._users:
             # 超级管理员（lsl/Lsl123）、普通管理员（user1/User123456）
             super_user = User("lsl", "Lsl123", is_super=True)
             normal_user = User("user1", "User123456", is_super=False)
-            self.users.extend([super_user, normal_user])
+            self._users[super_user.username] = super_user
+            self._users[normal_user.username] = normal_user
             save_data(self.users, self.products, self.orders)  # 保存到DAO
             logger.info("", extra={
                 "user": "system",
@@ -38,344 +269,997 @@ class MallSystem:
                 "result": "success: 初始化默认管理员账号"
             })
 
-    def _log_operation(self, operation: str, result: str, start_time: float) -> None:
-        """记录操作日志"""
-        response_time = round(time.time() - start_time, 4)
+    def _log_operation(self, operation: str, result: str, start_time: float, user: str = "anonymous") -> None:
+        """记录操作日志：start_time为time.perf_counter()的返回值，耗时同时计入指标 service.<操作类型>"""
+        seconds = time.perf_counter() - start_time
+        registry.observe(f"service.{operation}", seconds)
+        response_time = round(seconds, 4)
         logger.info("", extra={
-            "user": self.current_user.username if self.current_user else "anonymous",
+            "user": user,
             "operation": operation,
             "response_time": f"{response_time}s",
             "result": result
         })
 
+    def _persist(self, changes: List[Dict], rollback: Callable[[], None]) -> bool:
+        """持久化本次变更：由DAO层决定追加日志还是整体保存。
+        批量提交模式下只登记变更并返回True，真正写入失败时由后台线程调用rollback撤销内存修改"""
+        if not GROUP_COMMIT_ENABLED:
+            # 传字典视图而不是列表，只有写快照时才会遍历
+            return save_changes(changes, self._users.values(), self._products.values(), self._orders.values())
+
+        with self._commit_lock:
+            self._pending_changes.extend(changes)
+            self._pending_rollbacks.append(rollback)
+            if len(self._pending_rollbacks) >= GROUP_COMMIT_MAX_CHANGES:
+                self._flush_event.set()  # 达到数量上限，提前唤醒后台线程
+        return True
+
+    def _flush_loop(self) -> None:
+        """后台写入线程：定时或被唤醒后写入待提交的变更"""
+        while True:
+            self._flush_event.wait(GROUP_COMMIT_INTERVAL)
+            self._flush_event.clear()
+            self.flush()
+
+    def flush(self) -> bool:
+        """立即写入所有待提交的变更：返回是否成功（失败时已回滚对应的内存修改）"""
+        with self._catalog_lock.read_locked(), self._commit_lock:
+            if not self._rollback_required:
+                if not self._pending_rollbacks:
+                    return True
+                start_time = time.perf_counter()
+                changes, rollbacks = self._pending_changes, self._pending_rollbacks
+                self._pending_changes, self._pending_rollbacks = [], []
+                if save_changes(changes, self._users.values(), self._products.values(), self._orders.values()):
+                    self._log_operation("flush", f"success: 批量写入{len(rollbacks)}个操作", start_time, "system")
+                    return True
+                # 写入失败：回滚会增删商品/用户字典，必须持有目录写锁（读锁不能升级，先释放）。
+                # 释放期间不再写入任何变更，直到回滚完成
+                self._pending_rollbacks = rollbacks
+                self._rollback_required = True
+            start_time = time.perf_counter()
+
+        with self._catalog_lock.write_locked(), self._commit_lock:
+            if not self._rollback_required:
+                return False  # 已由其他线程回滚
+            # 释放读锁期间提交的操作可能依赖要回滚的修改，一并回滚：从最后一个操作开始依次撤销，内存与文件保持一致
+            rollbacks = self._pending_rollbacks
+            self._pending_changes, self._pending_rollbacks = [], []
+            self._rollback_required = False
+            for rollback in reversed(rollbacks):
+                rollback()
+        self._log_operation("flush", f"fail: 批量写入失败，已回滚{len(rollbacks)}个操作", start_time, "system")
+        return False
+
     # ------------------------------ 权限管理业务 ------------------------------
-    def login(self, username: str, password: str) -> bool:
-        """管理员登录：返回是否成功"""
-        start_time = time.time()
-        user = next((u for u in self.users if u.username == username), None)
-        """ user = None
-            for u in self.users:
-                if u.username == username:
-                    user = u
-                    break
-        """
+    @_shared
+    def login(self, username: str, password: str, client: str = "local") -> Optional[str]:
+        """管理员登录：成功返回会话令牌（后续业务方法的第一个参数），失败返回None。
+        client标识登录来源（如客户端地址），连续输错密码只锁定该来源上的这个账号"""
+        start_time = time.perf_counter()
+        user = self._users.get(username)
         if not user:
-            self._log_operation("login", "fail: 用户名不存在", start_time)
-            return False
+            self._log_operation("login", "fail: 用户名不存在", start_time, username)
+            return None
 
-        #3次失败锁定30秒
-        current_time = time.time()
-        if user.login_fail_count >= 3 and current_time - user.lock_time < 30:
-            remaining = 30 - (current_time - user.lock_time)
-            self._log_operation("login", f"fail: 账号锁定，剩余{remaining:.0f}秒", start_time)
-            return False
+        remaining = self._sessions.lock_remaining(username, client)
+        if remaining > 0:
+            self._log_operation("login", f"fail: 账号锁定，剩余{remaining:.0f}秒", start_time, username)
+            return None
 
         if user.password == password:
-            user.login_fail_count = 0  # 重置失败次数
-            self.current_user = user
-            self._log_operation("login", f"success: {username}登录", start_time)
-            return True
+            session = self._sessions.open(username, user.is_super, client)
+            self._log_operation("login", f"success: {username}登录", start_time, username)
+            return session.token
         else:
-            user.login_fail_count += 1
-            user.lock_time = current_time
-            remaining = 3 - user.login_fail_count
-            self._log_operation("login", f"fail: 密码错误，剩余{remaining}次", start_time)
+            remaining = self._sessions.record_failure(username, client)
+            self._log_operation("login", f"fail: 密码错误，剩余{remaining}次", start_time, username)
+            return None
+
+    def logout(self, token: Optional[str]) -> bool:
+        """退出登录：注销令牌，返回令牌是否有效"""
+        start_time = time.perf_counter()
+        session = self._sessions.close(token)
+        if not session:
+            self._log_operation("logout", "fail: 会话不存在或已过期", start_time)
             return False
+        self._log_operation("logout", f"success: {session.username}退出", start_time, session.username)
+        return True
+
+    def get_session(self, token: Optional[str]) -> Optional[Session]:
+        """查询令牌对应的会话（会刷新空闲时间）：None表示未登录或已过期"""
+        return self._sessions.get(token)
 
-    def check_permission(self, require_super: bool = False) -> bool:
-        """权限检查：require_super=True需超级管理员"""
-        if not self.current_user:
+    def check_permission(self, token: Optional[str], require_super: bool = False) -> Optional[Session]:
+        """权限检查：返回令牌对应的会话，未登录/已过期/权限不足返回None；require_super=True需超级管理员"""
+        session = self._sessions.get(token)
+        if not session:
             logger.warning("", extra={
                 "user": "anonymous",
                 "operation": "check_permission",
                 "response_time": "0.0s",
-                "result": "fail: 未登录"
+                "result": "fail: 未登录或会话已过期"
             })
-            return False
-        if require_super and not self.current_user.is_super:
+            return None
+        if require_super and not session.is_super:
             logger.warning("", extra={
-                "user": self.current_user.username,
+                "user": session.username,
                 "operation": "check_permission",
                 "response_time": "0.0s",
                 "result": "fail: 普通管理员无权限"
             })
-            return False
-        return True
+            return None
+        return session
 
-    def modify_user(self, old_username: str, new_username: str, new_password: str) -> Tuple[bool, str]:
+    @_serialized
+    def modify_user(self, token: Optional[str], old_username: str, new_username: str,
+                    new_password: str) -> Tuple[bool, str]:
         """修改用户信息"""
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         # 权限检查,只有超级管理员能修改
-        if not self.check_permission(require_super=True):
+        session = self.check_permission(token, require_super=True)
+        if not session:
             self._log_operation("modify_user", "fail: 无权限", start_time)
             return False, "无权限修改用户信息"
 
         # 查找用户
-        user = next((u for u in self.users if u.username == old_username), None)
+        user = self._users.get(old_username)
         if not user:
-            self._log_operation("modify_user", f"fail: 用户{old_username}不存在", start_time)
+            self._log_operation("modify_user", f"fail: 用户{old_username}不存在", start_time, session.username)
             return False, "用户不存在"
 
         # 检查新用户名是否已被占用
-        if new_username != old_username and any(u.username == new_username for u in self.users):
-            self._log_operation("modify_user", f"fail: 新用户名{new_username}已存在", start_time)
+        if new_username != old_username and new_username in self._users:
+            self._log_operation("modify_user", f"fail: 新用户名{new_username}已存在", start_time, session.username)
             return False, "新用户名已被占用"
 
         # 验证新密码强度
         if not check_password_strength(new_password):
-            self._log_operation("modify_user", "fail: 密码强度不足", start_time)
+            self._log_operation("modify_user", "fail: 密码强度不足", start_time, session.username)
             return False, "密码需包含大小写字母+数字，长度≥8位"
 
-        # 更新用户信息（修改内存中的self.users列表）
+        # 更新用户信息（修改内存中的用户索引）
+        old_password = user.password
         user.username = new_username  # 修改用户名
         user.password = new_password  # 修改密码
+        del self._users[old_username]
+        self._users[new_username] = user
+
+        def rollback():
+            del self._users[new_username]
+            user.username = old_username
+            user.password = old_password
+            self._users[old_username] = user
 
         # 保存到文件
-        save_success = save_data(self.users, self.products, self.orders)
+        save_success = self._persist([put_record("users", old_username, user.to_dict())], rollback)
         if not save_success:
-            self._log_operation("modify_user", "fail: 数据保存失败", start_time)
+            rollback()
+            self._log_operation("modify_user", "fail: 数据保存失败", start_time, session.username)
             return False, "修改失败，数据保存出错"
 
+        # 密码已修改：该用户的其他会话全部失效（当前操作的会话除外），保留的会话同步新用户名
+        self._sessions.close_where(lambda other: other.username == old_username, keep=token)
+        self._sessions.rename_user(old_username, new_username)
+
         # 记录日志
-        self._log_operation("modify_user", f"success: {old_username}修改为{new_username}", start_time)
+        self._log_operation("modify_user", f"success: {old_username}修改为{new_username}", start_time, session.username)
         return True, "修改成功"
     # ------------------------------ 商品管理业务 ------------------------------
-    def add_product(self, product_id: str, name: str, category: str, price: str, stock: str) -> Tuple[bool, str]:
+    @_serialized
+    def add_product(self, token: Optional[str], product_id: str, name: str, category: str, price: str,
+                    stock: str) -> Tuple[bool, str]:
         """添加商品：返回（是否成功，提示信息）"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         # 权限检查（普通管理员可操作）
-        if not self.check_permission(require_super=False):
+        session = self.check_permission(token, require_super=False)
+        if not session:
             self._log_operation("add_product", "fail: 权限不足", start_time)
             return False, "权限不足：请先登录"
 
         # 验证商品编号唯一
-        if any(p.product_id == product_id for p in self.products):
-            """for p in self.products:
-                    if p.product_id == product_id:
-                    重复
-            """
-            self._log_operation("add_product", f"fail: 商品编号{product_id}重复", start_time)
+        if product_id in self._products:
+            self._log_operation("add_product", f"fail: 商品编号{product_id}重复", start_time, session.username)
             return False, "商品编号已存在，请重新输入"
 
         # 验证单价
         if not check_positive_number(price, is_int=False):
-            self._log_operation("add_product", f"fail: 单价{price}无效", start_time)
+            self._log_operation("add_product", f"fail: 单价{price}无效", start_time, session.username)
             return False, "单价必须是大于0的数字"
 
         # 验证库存
         if not check_positive_number(stock, is_int=True):
-            self._log_operation("add_product", f"fail: 库存{stock}无效", start_time)
+            self._log_operation("add_product", f"fail: 库存{stock}无效", start_time, session.username)
             return False, "库存必须是大于0的整数"
 
         # 创建商品并保存
         product = Product(product_id, name, category, float(price), int(stock))
-        self.products.append(product)
-        save_success = save_data(self.users, self.products, self.orders)
+        self._products[product_id] = product
+        self._index_product(product)
+
+        def rollback():
+            self._unindex_product(product)
+            del self._products[product_id]
+
+        save_success = self._persist([put_record("products", product_id, product.to_dict())], rollback)
         if save_success:
-            self._log_operation("add_product", f"success: {product_id}", start_time)
+            self._log_operation("add_product", f"success: {product_id}", start_time, session.username)
             return True, "添加成功"
         else:
-            self.products.remove(product)  # 回滚
-            self._log_operation("add_product", "fail: 数据保存失败", start_time)
+            rollback()
+            self._log_operation("add_product", "fail: 数据保存失败", start_time, session.username)
             return False, "添加失败：数据保存异常"
 
-    def get_all_products(self) -> List[Product]:
+    @_serialized
+    def bulk_import_products(self, token: Optional[str], csv_path: str,
+                             skip_invalid: bool = False) -> Tuple[bool, str, List[str]]:
+        """批量导入商品：逐行读取CSV（列：product_id,name,category,price,stock），全部校验后一次写入。
+        skip_invalid=False时有任何错误行都不导入；True时跳过错误行导入其余商品。
+        返回（是否成功，提示信息，逐行错误说明）"""
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=False)
+        if not session:
+            self._log_operation("bulk_import_products", "fail: 权限不足", start_time)
+            return False, "权限不足：请先登录", []
+
+        products: List[Product] = []
+        errors: List[str] = []
+        seen = set()  # 文件内已出现的商品编号
+        try:
+            for line_no, row in iter_csv_rows(csv_path):
+                product_id = row["product_id"]
+                if not product_id:
+                    errors.append(f"第{line_no}行：商品编号为空")
+                    continue
+                if product_id in seen:
+                    errors.append(f"第{line_no}行：商品编号{product_id}在文件中重复")
+                    continue
+                seen.add(product_id)
+                if product_id in self._products:
+                    errors.append(f"第{line_no}行：商品编号{product_id}已存在")
+                    continue
+                # 与add_product相同的校验规则
+                if not check_positive_number(row["price"], is_int=False):
+                    errors.append(f"第{line_no}行：单价{row['price']}无效，必须是大于0的数字")
+                    continue
+                if not check_positive_number(row["stock"], is_int=True):
+                    errors.append(f"第{line_no}行：库存{row['stock']}无效，必须是大于0的整数")
+                    continue
+                products.append(Product(product_id, row["name"], row["category"], float(row["price"]),
+                                        int(row["stock"])))
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            self._log_operation("bulk_import_products", f"fail: {str(e)}", start_time, session.username)
+            return False, f"导入失败：{str(e)}", errors
+
+        if errors and not skip_invalid:
+            self._log_operation("bulk_import_products", f"fail: {len(errors)}行数据无效", start_time, session.username)
+            return False, f"导入失败：{len(errors)}行数据无效，未导入任何商品", errors
+        if not products:
+            self._log_operation("bulk_import_products", "fail: 没有可导入的商品", start_time, session.username)
+            return False, "导入失败：没有可导入的商品", errors
+
+        # 全部加入内存后只持久化一次（日志模式下是一条记录、一次fsync）
+        for product in products:
+            self._products[product.product_id] = product
+            self._index_product(product, catalog=False)
+        self._product_index.add_many(products)
+        self._product_search.add_many(products)
+
+        def rollback():
+            self._product_index.remove_many(products)
+            self._product_search.remove_many(product.product_id for product in products)
+            for product in products:
+                self._unindex_product(product, catalog=False)
+                del self._products[product.product_id]
+
+        save_success = self._persist(
+            [put_record("products", product.product_id, product.to_dict()) for product in products], rollback)
+        if save_success:
+            self._log_operation("bulk_import_products", f"success: 导入{len(products)}个，跳过{len(errors)}行",
+                                start_time, session.username)
+            msg = f"成功导入{len(products)}个商品" + (f"，跳过{len(errors)}行无效数据" if errors else "")
+            return True, msg, errors
+        else:
+            rollback()
+            self._log_operation("bulk_import_products", "fail: 数据保存失败", start_time, session.username)
+            return False, "导入失败：数据保存异常", errors
+
+    @_shared
+    def get_all_products(self, token: Optional[str]) -> List[Product]:
         """获取所有商品：供View层显示"""
-        start_time = time.time()
-        if not self.check_permission(require_super=False):
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=False)
+        if not session:
             self._log_operation("get_all_products", "fail: 权限不足", start_time)
             return []
-        self._log_operation("get_all_products", f"success: {len(self.products)}个商品", start_time)
+        self._log_operation("get_all_products", f"success: {len(self._products)}个商品", start_time, session.username)
         return self.products
 
-    def delete_product(self, product_id: str) -> Tuple[bool, str]:
+    @_shared
+    def get_products_page(self, token: Optional[str], offset: int = 0, limit: int = 100,
+                          sort_by: Optional[str] = None, descending: bool = False,
+                          keyword: Optional[str] = None) -> Tuple[List[Product], int]:
+        """分页查询商品：返回（第offset起的至多limit个商品，符合条件的商品总数）。
+        keyword匹配商品编号/名称/分类（不区分大小写），sort_by见PRODUCT_SORT_KEYS（None为添加顺序）。
+        不排序不过滤时只遍历到当前页为止，首屏耗时与商品总数无关"""
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=False)
+        if not session:
+            self._log_operation("get_products_page", "fail: 权限不足", start_time)
+            return [], 0
+        if sort_by is not None and sort_by not in PRODUCT_SORT_KEYS:
+            self._log_operation("get_products_page", f"fail: 不支持按{sort_by}排序", start_time, session.username)
+            return [], 0
+        offset, limit = max(0, offset), max(0, limit)
+        keyword = keyword.casefold() if keyword else None
+
+        def compute() -> Tuple[List[Product], int]:
+            if not keyword and sort_by in INDEXED_FIELDS:
+                # 按有索引的字段排序：直接从有序索引中取出当前页
+                return self._product_index.query(self._products, sort_by=sort_by, descending=descending,
+                                                 offset=offset, limit=limit)
+            products = self._products.values()
+            if keyword:
+                products = [product for product in products if keyword in product.product_id.casefold()
+                            or keyword in product.name.casefold() or keyword in product.category.casefold()]
+            if sort_by is None:
+                return list(itertools.islice(products, offset, offset + limit)), len(products)
+            # 只需要前offset+limit个，部分堆排序比整体排序省时
+            select = heapq.nlargest if descending else heapq.nsmallest
+            return select(offset + limit, products, key=PRODUCT_SORT_KEYS[sort_by])[offset:], len(products)
+
+        # 返回的是商品对象本身，库存总是最新的；只有按库存/总价值排序时页面内容才随库存变化
+        collections = ("products", "stock") if sort_by in ("stock", "total_value") else ("products",)
+        (page, total), hit = self._cached(("get_products_page", offset, limit, sort_by, descending, keyword),
+                                          collections, compute)
+        self._log_operation("get_products_page", f"success: {len(page)}/{total}个商品{'（缓存）' if hit else ''}",
+                            start_time, session.username)
+        return page, total
+
+    @_shared
+    def query_products(self, token: Optional[str], category: Optional[str] = None,
+                       price_range: Optional[Tuple[Optional[float], Optional[float]]] = None,
+                       min_stock: Optional[int] = None, sort_by: str = "product_id", descending: bool = False,
+                       offset: int = 0, limit: int = 100) -> Tuple[List[Product], int]:
+        """按条件查询商品：分类、单价区间[最低, 最高]（一端可为None）、最低库存，按sort_by排序后分页，
+        sort_by可选product_id/price/stock/total_value。返回（当前页商品，符合条件的总数）。
+        走分类桶和有序索引，排序字段即条件字段时为O(log n + k)，不扫描全部商品"""
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=False)
+        if not session:
+            self._log_operation("query_products", "fail: 权限不足", start_time)
+            return [], 0
+        if sort_by not in INDEXED_FIELDS:
+            self._log_operation("query_products", f"fail: 不支持按{sort_by}排序", start_time, session.username)
+            return [], 0
+        stock_dependent = min_stock is not None or sort_by in ("stock", "total_value")
+        (page, total), hit = self._cached(
+            ("query_products", category, price_range and tuple(price_range), min_stock, sort_by, descending,
+             max(0, offset), max(0, limit)),
+            ("products", "stock") if stock_dependent else ("products",),
+            lambda: self._product_index.query(self._products, category, price_range, min_stock, sort_by,
+                                              descending, max(0, offset), max(0, limit)))
+        self._log_operation("query_products", f"success: {len(page)}/{total}个商品{'（缓存）' if hit else ''}",
+                            start_time, session.username)
+        return page, total
+
+    @_shared
+    def get_product_categories(self, token: Optional[str]) -> Dict[str, int]:
+        """所有分类及其商品数（供筛选下拉框使用）"""
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=False)
+        if not session:
+            self._log_operation("get_product_categories", "fail: 权限不足", start_time)
+            return {}
+        categories, hit = self._cached(("get_product_categories",), ("products",),
+                                       self._product_index.category_counts)
+        self._log_operation("get_product_categories", f"success: {len(categories)}个分类{'（缓存）' if hit else ''}",
+                            start_time, session.username)
+        return categories
+
+    @_shared
+    def search_products(self, token: Optional[str], keyword: str, limit: int = 20) -> List[Product]:
+        """搜索商品：名称/分类/编号中包含keyword（不区分大小写，支持中文）的商品，按相关度返回前limit个。
+        名称匹配在前，前缀匹配在子串匹配之前，供界面边输入边提示"""
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=False)
+        if not session:
+            self._log_operation("search_products", "fail: 权限不足", start_time)
+            return []
+        products, hit = self._cached(
+            ("search_products", keyword.strip().casefold(), max(0, limit)), ("products",),
+            lambda: [self._products[product_id] for product_id in
+                     self._product_search.search(keyword, self._products.values(), max(0, limit))])
+        self._log_operation("search_products", f"success: {keyword} {len(products)}个商品{'（缓存）' if hit else ''}",
+                            start_time, session.username)
+        return products
+
+    @_shared
+    def get_product(self, token: Optional[str], product_id: str) -> Optional[Product]:
+        """查询商品：返回商品实体（None表示不存在）"""
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=False)
+        if not session:
+            self._log_operation("get_product", "fail: 权限不足", start_time)
+            return None
+        product = self._products.get(product_id)
+        if product:
+            self._log_operation("get_product", f"success: {product_id}", start_time, session.username)
+        else:
+            self._log_operation("get_product", f"fail: {product_id}不存在", start_time, session.username)
+        return product
+
+    @_serialized
+    def delete_product(self, token: Optional[str], product_id: str) -> Tuple[bool, str]:
         """删除商品：返回（是否成功，提示信息）- 需超级管理员"""
-        start_time = time.time()
-        if not self.check_permission(require_super=True):
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=True)
+        if not session:
             self._log_operation("delete_product", "fail: 权限不足", start_time)
             return False, "权限不足：仅超级管理员可删除"
 
         # 查找商品
-        product = next((p for p in self.products if p.product_id == product_id), None)
+        product = self._products.get(product_id)
         if not product:
-            self._log_operation("delete_product", f"fail: {product_id}不存在", start_time)
+            self._log_operation("delete_product", f"fail: {product_id}不存在", start_time, session.username)
             return False, "删除失败：商品不存在"
 
         # 删除并保存
-        self.products.remove(product)
-        save_success = save_data(self.users, self.products, self.orders)
+        self._unindex_product(product)
+        del self._products[product_id]
+
+        def rollback():
+            self._products[product_id] = product
+            self._index_product(product)
+
+        save_success = self._persist([delete_record("products", product_id)], rollback)
         if save_success:
-            self._log_operation("delete_product", f"success: {product_id}", start_time)
+            self._log_operation("delete_product", f"success: {product_id}", start_time, session.username)
             return True, "删除成功"
         else:
-            self.products.append(product)  # 回滚
-            self._log_operation("delete_product", "fail: 数据保存失败", start_time)
+            rollback()
+            self._log_operation("delete_product", "fail: 数据保存失败", start_time, session.username)
             return False, "删除失败：数据保存异常"
 
-    def modify_product(self, product_id: str, field: str, new_value: str) -> Tuple[bool, str]:
+    @_shared
+    def modify_product(self, token: Optional[str], product_id: str, field: str, new_value: str) -> Tuple[bool, str]:
         """修改商品：field=name/category/price/stock，返回（是否成功，提示信息）"""
-        start_time = time.time()
-        if not self.check_permission(require_super=False):
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=False)
+        if not session:
             self._log_operation("modify_product", "fail: 权限不足", start_time)
             return False, "权限不足：请先登录"
 
         # 查找商品
-        product = next((p for p in self.products if p.product_id == product_id), None)
+        product = self._products.get(product_id)
         if not product:
-            self._log_operation("modify_product", f"fail: {product_id}不存在", start_time)
+            self._log_operation("modify_product", f"fail: {product_id}不存在", start_time, session.username)
             return False, "修改失败：商品不存在"
 
-        # 验证新值并修改
+        # 验证新值
         try:
-            if field == "name":
-                product.name = new_value
-            elif field == "category":
-                product.category = new_value
+            if field in ("name", "category"):
+                value = new_value
             elif field == "price":
                 if not check_positive_number(new_value, is_int=False):
-                    self._log_operation("modify_product", f"fail: 单价{new_value}无效", start_time)
+                    self._log_operation("modify_product", f"fail: 单价{new_value}无效", start_time, session.username)
                     return False, "单价必须是大于0的数字"
-                product.price = float(new_value)
+                value = float(new_value)
             elif field == "stock":
                 if not check_positive_number(new_value, is_int=True):
-                    self._log_operation("modify_product", f"fail: 库存{new_value}无效", start_time)
+                    self._log_operation("modify_product", f"fail: 库存{new_value}无效", start_time, session.username)
                     return False, "库存必须是大于0的整数"
-                product.stock = int(new_value)
+                value = int(new_value)
             else:
-                self._log_operation("modify_product", f"fail: 字段{field}不存在", start_time)
+                self._log_operation("modify_product", f"fail: 字段{field}不存在", start_time, session.username)
                 return False, "无效字段：仅支持名称/分类/单价/库存"
 
-            # 保存修改
-            save_success = save_data(self.users, self.products, self.orders)
+            with self._commit_lock:
+                # 修改：先移出索引，改完再加回（分类变化时销售汇总随之转移）
+                with self._product_locks.locked(product_id):
+                    old_value = getattr(product, field)
+                    self._unindex_product(product)
+                    setattr(product, field, value)
+                    self._index_product(product)
+                    product_data = product.to_dict()
+
+                def rollback():
+                    with self._product_locks.locked(product_id):
+                        self._unindex_product(product)
+                        if field == "stock":
+                            # 期间可能有其他订单改变库存，只撤销本次的变化量
+                            product.stock -= value - old_value
+                        else:
+                            setattr(product, field, old_value)
+                        self._index_product(product)
+
+                # 保存修改
+                save_success = self._persist([put_record("products", product_id, product_data)], rollback)
+                if not save_success:
+                    rollback()
             if save_success:
-                self._log_operation("modify_product", f"success: {product_id}-{field}", start_time)
+                self._log_operation("modify_product", f"success: {product_id}-{field}", start_time, session.username)
                 return True, f"{field}修改成功"
             else:
-                self._log_operation("modify_product", "fail: 数据保存失败", start_time)
+                self._log_operation("modify_product", "fail: 数据保存失败", start_time, session.username)
                 return False, "修改失败：数据保存异常"
 
         except Exception as e:
-            self._log_operation("modify_product", f"fail: {str(e)}", start_time)
+            self._log_operation("modify_product", f"fail: {str(e)}", start_time, session.username)
             return False, f"修改失败：{str(e)}"
 
     # ------------------------------ 订单管理业务 ------------------------------
-    def create_order(self, order_id: str, phone: str, product_id: str, buy_count: str) -> Tuple[bool, str]:
+    @_shared
+    def create_order(self, token: Optional[str], order_id: str, phone: str, product_id: str,
+                     buy_count: str) -> Tuple[bool, str]:
         """创建订单：返回（是否成功，提示信息）- 需超级管理员"""
-        start_time = time.time()
-        if not self.check_permission(require_super=True):
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=True)
+        if not session:
             self._log_operation("create_order", "fail: 权限不足", start_time)
             return False, "权限不足：仅超级管理员可创建订单"
 
-        # 验证订单编号唯一
-        if any(o.order_id == order_id for o in self.orders):
-            self._log_operation("create_order", f"fail: 订单编号{order_id}重复", start_time)
+        # 验证订单编号唯一（订单集合只在提交锁内访问：二进制快照的订单按需从文件读取，写快照时会切换文件）
+        with self._commit_lock:
+            duplicate = order_id in self._orders
+        if duplicate:
+            self._log_operation("create_order", f"fail: 订单编号{order_id}重复", start_time, session.username)
             return False, "订单编号已存在，请重新输入"
 
         # 验证手机号
         if not check_phone(phone):
-            self._log_operation("create_order", f"fail: 手机号{phone}无效", start_time)
+            self._log_operation("create_order", f"fail: 手机号{phone}无效", start_time, session.username)
             return False, "手机号格式错误：需11位纯数字"
 
         # 验证商品存在
-        product = next((p for p in self.products if p.product_id == product_id), None)
+        product = self._products.get(product_id)
         if not product:
-            self._log_operation("create_order", f"fail: 商品{product_id}不存在", start_time)
+            self._log_operation("create_order", f"fail: 商品{product_id}不存在", start_time, session.username)
             return False, "创建失败：商品不存在"
 
         # 验证购买数量
         if not check_positive_number(buy_count, is_int=True):
-            self._log_operation("create_order", f"fail: 数量{buy_count}无效", start_time)
+            self._log_operation("create_order", f"fail: 数量{buy_count}无效", start_time, session.username)
             return False, "购买数量必须是大于0的整数"
         buy_count_int = int(buy_count)
-        if buy_count_int > product.stock:
-            self._log_operation("create_order", f"fail: 库存不足（需{buy_count_int}，剩{product.stock}）", start_time)
-            return False, f"库存不足：当前库存{product.stock}，无法购买{buy_count_int}个"
 
-        # 原子操作：扣库存+创建订单（失败回滚）
-        original_stock = product.stock
+        # 预留库存：检查和扣减在同一把商品锁内完成，并发下单不会超卖；不同商品互不阻塞
+        with self._product_locks.locked(product_id):
+            stock = product.stock
+            if buy_count_int <= stock:
+                self._adjust_stock(product, -buy_count_int)
+        if buy_count_int > stock:
+            self._log_operation("create_order", f"fail: 库存不足（需{buy_count_int}，剩{stock}）", start_time, session.username)
+            return False, f"库存不足：当前库存{stock}，无法购买{buy_count_int}个"
+
+        def release_stock():
+            with self._product_locks.locked(product_id):
+                self._adjust_stock(product, buy_count_int)
+
+        # 原子操作：创建订单并提交（失败回滚，归还预留的库存）
+        order = None
         try:
-            product.stock -= buy_count_int  # 扣库存
-            order = Order(order_id, phone, product_id, buy_count_int, product.price)
-            self.orders.append(order)  # 加订单
-            save_success = save_data(self.users, self.products, self.orders)
+            with self._commit_lock:
+                if order_id in self._orders:  # 并发提交了同一编号
+                    release_stock()
+                    self._log_operation("create_order", f"fail: 订单编号{order_id}重复", start_time, session.username)
+                    return False, "订单编号已存在，请重新输入"
+                order = Order(order_id, phone, product_id, buy_count_int, product.price)
+                self._orders[order_id] = order  # 加订单
+                self._index_order(order)
+
+                def rollback():
+                    release_stock()
+                    self._unindex_order(order)
+                    del self._orders[order_id]
+
+                with self._product_locks.locked(product_id):
+                    product_data = product.to_dict()
+                save_success = self._persist([
+                    put_record("products", product_id, product_data),
+                    put_record("orders", order_id, order.to_dict())
+                ], rollback)
+                if not save_success:
+                    rollback()
             if save_success:
-                self._log_operation("create_order", f"success: {order_id}", start_time)
+                self._log_operation("create_order", f"success: {order_id}", start_time, session.username)
                 return True, "订单创建成功"
             else:
-                # 回滚
-                product.stock = original_stock
-                if order in self.orders:
-                    self.orders.remove(order)
-                self._log_operation("create_order", "fail: 数据保存失败", start_time)
+                self._log_operation("create_order", "fail: 数据保存失败", start_time, session.username)
                 return False, "创建失败：数据保存异常"
         except Exception as e:
             # 回滚
-            product.stock = original_stock
-            self._log_operation("create_order", f"fail: {str(e)}", start_time)
+            with self._commit_lock:
+                if order is not None and self._orders.get(order_id) is order:
+                    self._unindex_order(self._orders.pop(order_id))
+                release_stock()
+            self._log_operation("create_order", f"fail: {str(e)}", start_time, session.username)
             return False, f"创建失败：{str(e)}"
 
-    def get_order(self, order_id: str) -> Optional[Order]:
+    @_shared
+    def create_orders_batch(self, token: Optional[str], orders: Iterable[Tuple[str, str, str, str]],
+                            skip_invalid: bool = True) -> Tuple[bool, str, List[str]]:
+        """批量创建订单：orders为(订单编号, 手机号, 商品编号, 购买数量)序列，按顺序为每个商品预留库存，
+        全部有效订单一次写入。skip_invalid=False时有任何无效行都不创建；写入失败时整批回滚。
+        返回（是否成功，提示信息，逐行错误说明，行号从1开始）- 需超级管理员"""
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=True)
+        if not session:
+            self._log_operation("create_orders_batch", "fail: 权限不足", start_time)
+            return False, "权限不足：仅超级管理员可创建订单", []
+
+        # 第一遍：校验并逐行预留库存（在商品锁内检查并扣减，后面失败时归还）
+        accepted: List[Tuple[int, str, str, Product, int]] = []
+        errors: List[str] = []
+        reserved: Dict[str, int] = {}  # 商品编号 -> 本批已预留数量
+        batch_ids = set()
+
+        def release_stock():
+            for reserved_id, count in reserved.items():
+                with self._product_locks.locked(reserved_id):
+                    self._adjust_stock(self._products[reserved_id], count)
+
+        # 先检查每行的格式（4个字段，编号/手机号为字符串），格式错误的行不参与预留库存
+        rows: List[Tuple[int, str, str, str, str]] = []
+        for line_no, row in enumerate(orders, 1):
+            if not isinstance(row, (tuple, list)) or len(row) != 4:
+                errors.append(f"第{line_no}行：应为(订单编号, 手机号, 商品编号, 购买数量)")
+                continue
+            order_id, phone, product_id, buy_count = row
+            if not all(isinstance(value, str) for value in (order_id, phone, product_id)):
+                errors.append(f"第{line_no}行：订单编号、手机号、商品编号必须是字符串")
+                continue
+            rows.append((line_no, order_id, phone, product_id, str(buy_count)))
+        with self._commit_lock:
+            existing = {row[1] for row in rows if row[1] in self._orders}
+
+        try:
+            for line_no, order_id, phone, product_id, buy_count in rows:
+                if not order_id:
+                    errors.append(f"第{line_no}行：订单编号为空")
+                    continue
+                if order_id in existing or order_id in batch_ids:
+                    errors.append(f"第{line_no}行：订单编号{order_id}重复")
+                    continue
+                if not check_phone(phone):
+                    errors.append(f"第{line_no}行：手机号{phone}无效")
+                    continue
+                product = self._products.get(product_id)
+                if not product:
+                    errors.append(f"第{line_no}行：商品{product_id}不存在")
+                    continue
+                if not check_positive_number(buy_count, is_int=True):
+                    errors.append(f"第{line_no}行：数量{buy_count}无效")
+                    continue
+                buy_count_int = int(buy_count)
+                with self._product_locks.locked(product_id):
+                    remaining = product.stock
+                    if buy_count_int <= remaining:
+                        self._adjust_stock(product, -buy_count_int)
+                        reserved[product_id] = reserved.get(product_id, 0) + buy_count_int
+                if buy_count_int > remaining:
+                    errors.append(f"第{line_no}行：商品{product_id}库存不足（需{buy_count_int}，剩{remaining}）")
+                    continue
+                batch_ids.add(order_id)
+                accepted.append((line_no, order_id, phone, product, buy_count_int))
+        except Exception as e:
+            # 预留过程中出现意外异常：归还已预留的全部库存
+            release_stock()
+            self._log_operation("create_orders_batch", f"fail: {str(e)}", start_time, session.username)
+            return False, f"创建失败：{str(e)}", errors
+
+        if errors and not skip_invalid:
+            release_stock()
+            self._log_operation("create_orders_batch", f"fail: {len(errors)}行无效", start_time, session.username)
+            return False, f"创建失败：{len(errors)}行无效，未创建任何订单", errors
+
+        # 第二遍：创建订单并一次提交（失败回滚，归还预留的库存）
+        created: List[Order] = []
+
+        def rollback():
+            release_stock()
+            for order in reversed(created):
+                self._unindex_order(order)
+                del self._orders[order.order_id]
+
+        try:
+            with self._commit_lock:
+                for line_no, order_id, phone, product, buy_count_int in accepted:
+                    if order_id in self._orders:  # 并发提交了同一编号
+                        errors.append(f"第{line_no}行：订单编号{order_id}重复")
+                        reserved[product.product_id] -= buy_count_int
+                        with self._product_locks.locked(product.product_id):
+                            self._adjust_stock(product, buy_count_int)
+                        continue
+                    order = Order(order_id, phone, product.product_id, buy_count_int, product.price)
+                    self._orders[order_id] = order
+                    created.append(order)
+                    self._index_order(order)
+                if not created or (errors and not skip_invalid):
+                    rollback()
+                    save_success = None
+                else:
+                    changes = []
+                    for product_id in reserved:
+                        with self._product_locks.locked(product_id):
+                            changes.append(put_record("products", product_id, self._products[product_id].to_dict()))
+                    changes.extend(put_record("orders", order.order_id, order.to_dict()) for order in created)
+                    save_success = self._persist(changes, rollback)
+                    if not save_success:
+                        rollback()
+        except Exception as e:
+            with self._commit_lock:
+                rollback()
+            self._log_operation("create_orders_batch", f"fail: {str(e)}", start_time, session.username)
+            return False, f"创建失败：{str(e)}", errors
+
+        if save_success is None:
+            self._log_operation("create_orders_batch", f"fail: {len(errors)}行无效", start_time, session.username)
+            if errors and not skip_invalid:
+                return False, f"创建失败：{len(errors)}行无效，未创建任何订单", errors
+            return False, "创建失败：没有有效订单", errors
+
+        if save_success:
+            self._log_operation("create_orders_batch", f"success: 创建{len(created)}个，失败{len(errors)}行",
+                                start_time, session.username)
+            msg = f"成功创建{len(created)}个订单" + (f"，{len(errors)}行失败" if errors else "")
+            return True, msg, errors
+        else:
+            self._log_operation("create_orders_batch", "fail: 数据保存失败", start_time, session.username)
+            return False, "创建失败：数据保存异常，整批已回滚", errors
+
+    @_shared
+    def get_order(self, token: Optional[str], order_id: str) -> Optional[Order]:
         """查询订单：返回订单实体（None表示不存在）- 需超级管理员"""
-        start_time = time.time()
-        if not self.check_permission(require_super=True):
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=True)
+        if not session:
             self._log_operation("get_order", "fail: 权限不足", start_time)
             return None
-        order = next((o for o in self.orders if o.order_id == order_id), None)
+        with self._commit_lock:
+            order = self._orders.get(order_id)
         if order:
-            self._log_operation("get_order", f"success: {order_id}", start_time)
+            self._log_operation("get_order", f"success: {order_id}", start_time, session.username)
         else:
-            self._log_operation("get_order", f"fail: {order_id}不存在", start_time)
+            self._log_operation("get_order", f"fail: {order_id}不存在", start_time, session.username)
         return order
 
-    def cancel_order(self, order_id: str) -> Tuple[bool, str]:
+    @_shared
+    def get_orders_between(self, token: Optional[str], start: Optional[str] = None, end: Optional[str] = None,
+                           offset: int = 0, limit: int = 100,
+                           descending: bool = False) -> Tuple[List[Order], int]:
+        """按下单时间查询订单：start/end为"YYYY-MM-DD HH:MM:SS"或"YYYY-MM-DD"（含两端，空表示不限），
+        按下单时间排序（descending=True为从新到旧）后分页，返回（当前页订单，时间范围内的订单总数）。
+        在时间索引上二分定位，为O(log n + offset + limit) - 需超级管理员"""
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=True)
+        if not session:
+            self._log_operation("get_orders_between", "fail: 权限不足", start_time)
+            return [], 0
+        try:
+            low = parse_time_bound(start) if start else None
+            high = parse_time_bound(end, end=True) if end else None
+        except ValueError as e:
+            self._log_operation("get_orders_between", f"fail: {str(e)}", start_time, session.username)
+            return [], 0
+        offset, limit = max(0, offset), max(0, limit)
+
+        def compute() -> Tuple[List[Order], int]:
+            with self._commit_lock:
+                index = self._order_time_index()
+                order_ids = itertools.islice(index.irange(low, high, reverse=descending), offset, offset + limit)
+                return [self._orders[order_id] for order_id in order_ids], index.count(low, high)
+
+        (orders, total), hit = self._cached(("get_orders_between", low, high, offset, limit, descending),
+                                            ("orders",), compute)
+        self._log_operation("get_orders_between", f"success: {len(orders)}/{total}个订单{'（缓存）' if hit else ''}",
+                            start_time, session.username)
+        return orders, total
+
+    @_shared
+    def get_orders_by_phone(self, token: Optional[str], phone: str, offset: int = 0,
+                            limit: int = 100) -> Tuple[List[Order], Dict[str, float]]:
+        """按客户手机号查询订单：返回（从新到旧第offset起的至多limit个订单，
+        {order_count: 订单总数, total_spend: 累计消费额}），累计值增量维护，不必遍历历史订单 - 需超级管理员"""
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=True)
+        if not session:
+            self._log_operation("get_orders_by_phone", "fail: 权限不足", start_time)
+            return [], {}
+        if not check_phone(phone):
+            self._log_operation("get_orders_by_phone", f"fail: 手机号{phone}格式错误", start_time, session.username)
+            return [], {}
+        offset, limit = max(0, offset), max(0, limit)
+
+        def compute() -> Tuple[List[Order], Dict[str, float]]:
+            with self._commit_lock:
+                index = self._customer_order_index()
+                order_count, total_spend = index.totals(phone)
+                orders = [self._orders[order_id] for order_id in index.page(phone, offset, limit)]
+            return orders, {"order_count": order_count, "total_spend": total_spend}
+
+        (orders, totals), hit = self._cached(("get_orders_by_phone", phone, offset, limit), ("orders",), compute)
+        self._log_operation("get_orders_by_phone",
+                            f"success: {phone} {len(orders)}/{totals['order_count']}个订单{'（缓存）' if hit else ''}",
+                            start_time, session.username)
+        return orders, totals
+
+    @_shared
+    def cancel_order(self, token: Optional[str], order_id: str) -> Tuple[bool, str]:
         """撤销订单：恢复库存，返回（是否成功，提示信息）- 需超级管理员"""
-        start_time = time.time()
-        if not self.check_permission(require_super=True):
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=True)
+        if not session:
             self._log_operation("cancel_order", "fail: 权限不足", start_time)
             return False, "权限不足：仅超级管理员可撤销订单"
 
-        # 查找订单
-        order = next((o for o in self.orders if o.order_id == order_id), None)
-        if not order:
-            self._log_operation("cancel_order", f"fail: {order_id}不存在", start_time)
-            return False, "撤销失败：订单不存在"
+        # 查找订单和删除订单在同一把提交锁内完成，同一订单不会被撤销两次
+        with self._commit_lock:
+            order = self._orders.get(order_id)
+            if not order:
+                self._log_operation("cancel_order", f"fail: {order_id}不存在", start_time, session.username)
+                return False, "撤销失败：订单不存在"
 
-        # 查找关联商品
-        product = next((p for p in self.products if p.product_id == order.product_id), None)
-        if not product:
-            self._log_operation("cancel_order", f"fail: 商品{order.product_id}不存在", start_time)
-            return False, "撤销失败：关联商品不存在"
+            # 查找关联商品
+            product = self._products.get(order.product_id)
+            if not product:
+                self._log_operation("cancel_order", f"fail: 商品{order.product_id}不存在", start_time, session.username)
+                return False, "撤销失败：关联商品不存在"
 
-        # 执行撤销（恢复库存+删除订单）
-        try:
-            product.stock += order.buy_count  # 恢复库存
-            self.orders.remove(order)  # 删除订单
-            save_success = save_data(self.users, self.products, self.orders)
-            if save_success:
-                self._log_operation("cancel_order", f"success: {order_id}", start_time)
-                return True, "订单撤销成功，库存已恢复"
-            else:
-                # 回滚
-                product.stock -= order.buy_count
-                self.orders.append(order)
-                self._log_operation("cancel_order", "fail: 数据保存失败", start_time)
-                return False, "撤销失败：数据保存异常"
-        except Exception as e:
-            self._log_operation("cancel_order", f"fail: {str(e)}", start_time)
-            return False, f"撤销失败：{str(e)}"
+            # 执行撤销（恢复库存+删除订单）
+            try:
+                with self._product_locks.locked(product.product_id):
+                    self._adjust_stock(product, order.buy_count)  # 恢复库存
+                    product_data = product.to_dict()
+                del self._orders[order_id]  # 删除订单
+                self._unindex_order(order)
+
+                def rollback():
+                    with self._product_locks.locked(product.product_id):
+                        self._adjust_stock(product, -order.buy_count)
+                    self._orders[order_id] = order
+                    self._index_order(order)
+
+                save_success = self._persist([
+                    put_record("products", product.product_id, product_data),
+                    delete_record("orders", order_id)
+                ], rollback)
+                if save_success:
+                    self._log_operation("cancel_order", f"success: {order_id}", start_time, session.username)
+                    return True, "订单撤销成功，库存已恢复"
+                else:
+                    rollback()
+                    self._log_operation("cancel_order", "fail: 数据保存失败", start_time, session.username)
+                    return False, "撤销失败：数据保存异常"
+            except Exception as e:
+                self._log_operation("cancel_order", f"fail: {str(e)}", start_time, session.username)
+                return False, f"撤销失败：{str(e)}"
 
     # ------------------------------ 统计与备份业务 ------------------------------
-    def get_order_statistics(self) -> Dict[str, Dict[str, float]]:
+    @_shared
+    def get_order_statistics(self, token: Optional[str]) -> Dict[str, Dict[str, float]]:
         """订单统计：按分类返回{分类: {销售数量: x, 销售总额: y}}"""
-        start_time = time.time()
-        if not self.check_permission(require_super=True):
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=True)
+        if not session:
             self._log_operation("get_order_statistics", "fail: 权限不足", start_time)
             return {}
 
+        # 直接读取增量维护的分类汇总，不再遍历订单（汇总在提交锁内修改）；商品改分类/删除也会改变结果
+        def compute() -> Dict[str, Dict[str, float]]:
+            with self._commit_lock:
+                return {category: {"sales_count": sales[1], "sales_amount": sales[2]}
+                        for category, sales in self._category_sales.items()}
+
+        stats, hit = self._cached(("get_order_statistics",), ("orders", "products"), compute)
+        self._log_operation("get_order_statistics", f"success: {len(stats)}个分类{'（缓存）' if hit else ''}",
+                            start_time, session.username)
+        return stats
+
+    @_shared
+    def get_sales_rollup(self, token: Optional[str], granularity: str = "day", start: Optional[str] = None,
+                         end: Optional[str] = None, category: Optional[str] = None) -> List[Dict]:
+        """按时段汇总销售：granularity为hour/day，start/end格式同get_orders_between，category为空表示全部订单。
+        返回按时间排列的[{period: 时段起点, order_count: 订单数, sales_count: 销售数量, sales_amount: 销售额}]，
+        只列出有订单的时段。读取增量维护的时段汇总，不遍历订单 - 需超级管理员"""
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=True)
+        if not session:
+            self._log_operation("get_sales_rollup", "fail: 权限不足", start_time)
+            return []
+        if granularity not in ROLLUP_GRANULARITIES:
+            self._log_operation("get_sales_rollup", f"fail: 不支持按{granularity}汇总", start_time, session.username)
+            return []
+        try:
+            low = parse_time_bound(start) if start else None
+            high = parse_time_bound(end, end=True) if end else None
+        except ValueError as e:
+            self._log_operation("get_sales_rollup", f"fail: {str(e)}", start_time, session.username)
+            return []
+
+        def compute() -> List[Dict]:
+            with self._commit_lock:
+                periods = self._order_time_index().rollup(granularity, low, high, category or None)
+            return [{"period": ts_to_datetime(period), "order_count": orders, "sales_count": count,
+                     "sales_amount": amount} for period, orders, count, amount in periods]
+
+        rollup, hit = self._cached(("get_sales_rollup", granularity, low, high, category or None),
+                                   ("orders", "products"), compute)
+        self._log_operation("get_sales_rollup", f"success: {len(rollup)}个时段{'（缓存）' if hit else ''}",
+                            start_time, session.username)
+        return rollup
+
+    @_shared
+    def get_sales_report(self, token: Optional[str], top_n: int = 10, granularity: str = "day",
+                         category: Optional[str] = None) -> Dict:
+        """销售报表：{by_category: 同get_order_statistics, top_products: 销售额最高的top_n个商品,
+        histogram: 同get_sales_rollup的各时段, order_count/sales_count/sales_amount: 订单数/销售数量/销售额,
+        average_order_value: 客单价, engine: 计算引擎}。category非空时除by_category外只统计该分类。
+        安装了NumPy时由订单列存向量化计算，否则读取增量维护的汇总，两者结果一致 - 需超级管理员"""
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=True)
+        if not session:
+            self._log_operation("get_sales_report", "fail: 权限不足", start_time)
+            return {}
+        if granularity not in ROLLUP_GRANULARITIES:
+            self._log_operation("get_sales_report", f"fail: 不支持按{granularity}汇总", start_time, session.username)
+            return {}
+
+        category = category or None
+
+        def compute() -> Dict:
+            with self._commit_lock:
+                if NUMPY_AVAILABLE:
+                    return self._order_columns().report(top_n, granularity, category)
+                return self._compute_sales_report(top_n, granularity, category)
+
+        report, hit = self._cached(("get_sales_report", top_n, granularity, category), ("orders", "products"), compute)
+        self._log_operation("get_sales_report", f"success: {report['order_count']}个订单（{report['engine']}"
+                            f"{'，缓存' if hit else ''}）", start_time, session.username)
+        return report
+
+    def _compute_sales_report(self, top_n: int, granularity: str, category: Optional[str]) -> Dict:
+        """销售报表的纯Python实现（调用方持有提交锁）：由商品/分类销售汇总和订单时间索引拼出，格式同OrderColumns.report"""
+        by_category = {name: {"sales_count": sales[1], "sales_amount": round(sales[2], 2)}
+                       for name, sales in self._category_sales.items()}
+        product_sales = self._product_sales.items()
+        if category is not None:
+            product_sales = [(product_id, sales) for product_id, sales in product_sales
+                             if product_id in self._products and self._products[product_id].category == category]
+        ranked = heapq.nsmallest(max(0, top_n), product_sales, key=lambda item: (-round(item[1][2], 2), item[0]))
+        top_products = [{"product_id": product_id, "order_count": sales[0], "sales_count": sales[1],
+                         "sales_amount": round(sales[2], 2)} for product_id, sales in ranked]
+        histogram = [{"period": ts_to_datetime(period), "order_count": orders, "sales_count": count,
+                      "sales_amount": round(amount, 2)}
+                     for period, orders, count, amount in self._order_time_index().rollup(granularity, category=category)]
+
+        if category is None:
+            # 全部订单：含已删除商品的订单，按商品汇总加总
+            order_count, sales_count, sales_amount = 0, 0, 0.0
+            for orders, count, amount in self._product_sales.values():
+                order_count += orders
+                sales_count += count
+                sales_amount += amount
+        else:
+            order_count, sales_count, sales_amount = self._category_sales.get(category, [0, 0, 0.0])
+        return {
+            "by_category": by_category,
+            "top_products": top_products,
+            "histogram": histogram,
+            "order_count": order_count,
+            "sales_count": sales_count,
+            "sales_amount": round(sales_amount, 2),
+            "average_order_value": round(sales_amount / order_count, 2) if order_count else 0.0,
+            "engine": "python",
+        }
+
+    def _compute_order_statistics(self) -> Dict[str, Dict[str, float]]:
+        """全量统计：遍历所有订单重新计算分类汇总（用于一致性校验）"""
         stats: Dict[str, Dict[str, float]] = {}
-        for order in self.orders:
-            product = next((p for p in self.products if p.product_id == order.product_id), None)
+        for order in self._orders.values():
+            product = self._products.get(order.product_id)
             if not product:
                 continue
             category = product.category
@@ -383,93 +1267,173 @@ class MallSystem:
                 stats[category] = {"sales_count": 0, "sales_amount": 0.0}
             stats[category]["sales_count"] += order.buy_count
             stats[category]["sales_amount"] += order.total_amount
-
-        self._log_operation("get_order_statistics", f"success: {len(stats)}个分类", start_time)
         return stats
 
-    def backup_system_data(self) -> Tuple[bool, str]:
-        """手动备份数据：返回（是否成功，提示信息）"""
-        start_time = time.time()
-        if not self.check_permission(require_super=True):
+    @_shared
+    def check_statistics_consistency(self, token: Optional[str]) -> bool:
+        """一致性校验：比较增量汇总与全量统计是否一致（金额允许浮点误差）"""
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=True)
+        if not session:
+            self._log_operation("check_statistics_consistency", "fail: 权限不足", start_time)
+            return False
+
+        with self._commit_lock:
+            expected = self._compute_order_statistics()
+            consistent = expected.keys() == self._category_sales.keys() and all(
+                self._category_sales[category][1] == data["sales_count"]
+                and abs(self._category_sales[category][2] - data["sales_amount"]) < 0.01
+                for category, data in expected.items()
+            )
+            if consistent and self._order_times is not None:
+                # 时间索引已构建时：各分类按天加总后也应与全量统计一致，全部订单的时段汇总覆盖每个订单
+                consistent = len(self._order_times) == len(self._orders) \
+                    and sum(period[1] for period in self._order_times.rollup("day")) == len(self._orders) \
+                    and self._order_times.categories() == sorted(expected) and all(
+                        sum(period[2] for period in self._order_times.rollup("day", category=category))
+                        == data["sales_count"] for category, data in expected.items())
+            if consistent and self._customer_orders is not None:
+                # 客户订单索引已构建时：每个客户的订单数和累计消费额与订单数据一致
+                customers: Dict[str, List] = {}
+                for order in self._orders.values():
+                    totals = customers.setdefault(order.phone, [0, 0.0])
+                    totals[0] += 1
+                    totals[1] += order.total_amount
+                consistent = len(self._customer_orders) == len(customers) and all(
+                    self._customer_orders.totals(phone)[0] == count
+                    and abs(self._customer_orders.totals(phone)[1] - spend) < 0.01
+                    for phone, (count, spend) in customers.items())
+            if consistent and self._analytics is not None:
+                # 订单列存已构建时：行数与订单数一致，按分类的汇总与全量统计一致
+                by_category = self._analytics.report(0)["by_category"]
+                consistent = len(self._analytics) == len(self._orders) \
+                    and by_category.keys() == expected.keys() and all(
+                        by_category[category]["sales_count"] == data["sales_count"]
+                        and abs(by_category[category]["sales_amount"] - data["sales_amount"]) < 0.01
+                        for category, data in expected.items())
+        if consistent:
+            self._log_operation("check_statistics_consistency", "success: 统计一致", start_time, session.username)
+        else:
+            self._log_operation("check_statistics_consistency", "fail: 增量统计与全量统计不一致", start_time, session.username)
+        return consistent
+
+    @_shared
+    def backup_system_data(self, token: Optional[str], full: bool = False) -> Tuple[bool, str]:
+        """手动备份数据：默认增量备份，full=True强制完整备份；返回（是否成功，提示信息）"""
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=True)
+        if not session:
             self._log_operation("backup_system_data", "fail: 权限不足", start_time)
             return False, "权限不足：仅超级管理员可备份"
 
-        backup_success = backup_data()
+        with self._commit_lock:  # 与写日志/写快照串行
+            backup_success = backup_data(full)
         if backup_success:
-            self._log_operation("backup_system_data", "success", start_time)
+            self._log_operation("backup_system_data", "success", start_time, session.username)
             return True, "手动备份成功"
         else:
-            self._log_operation("backup_system_data", "fail", start_time)
+            self._log_operation("backup_system_data", "fail", start_time, session.username)
             return False, "手动备份失败"
 
-    def restore_system_data(self) -> Tuple[bool, str]:
+    @_serialized
+    def restore_system_data(self, token: Optional[str]) -> Tuple[bool, str]:
         """恢复数据：返回（是否成功，提示信息）"""
-        start_time = time.time()
-        if not self.check_permission(require_super=True):
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=True)
+        if not session:
             self._log_operation("restore_system_data", "fail: 权限不足", start_time)
             return False, "权限不足：仅超级管理员可恢复"
 
         users, products, orders, restore_success = restore_data()
         if restore_success:
+            # 尚未写入的变更被备份数据整体覆盖，直接丢弃
+            self._pending_changes, self._pending_rollbacks = [], []
             self.users = users
             self.products = products
             self.orders = orders
-            save_data(self.users, self.products, self.orders)  # 保存到主文件
-            self._log_operation("restore_system_data", "success", start_time)
+            self._rebuild_indexes()
+            # 备份中已不存在的用户，其会话随之失效
+            self._sessions.close_where(lambda other: other.username not in self._users)
+            save_data(self._users.values(), self._products.values(), self._orders.values())  # 保存到主文件
+            self._log_operation("restore_system_data", "success", start_time, session.username)
             return True, "数据恢复成功"
         else:
-            self._log_operation("restore_system_data", "fail", start_time)
+            self._log_operation("restore_system_data", "fail", start_time, session.username)
             return False, "数据恢复失败：备份文件不存在或异常"
 
-    def get_recent_logs(self, keyword: Optional[str] = None) -> List[str]:
+    def get_recent_logs(self, token: Optional[str], keyword: Optional[str] = None) -> List[str]:
         """获取最近10条日志：支持关键词过滤"""
-        start_time = time.time()
-        if not self.check_permission(require_super=True):
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=True)
+        if not session:
             self._log_operation("get_recent_logs", "fail: 权限不足", start_time)
             return ["权限不足：仅超级管理员可查看日志"]
 
-        logs = []
-        log_file = "mall_system.log"
-        if os.path.exists(log_file):
-            with open(log_file, "r", encoding="utf-8", errors="ignore") as f:
-                logs = f.readlines()
-            # 关键词过滤
-            if keyword and keyword.strip():
-                logs = [log.strip() for log in logs if keyword.lower() in log.lower()]
-            else:
-                logs = [log.strip() for log in logs]
-
-        # 取最近10条
-        recent_logs = logs[-10:] if len(logs) >= 10 else logs
-        self._log_operation("get_recent_logs", f"success: {len(recent_logs)}条", start_time)
+        # 从文件末尾向前读取，找到最近10条（匹配关键词的）日志即停止
+        try:
+            flush_log()
+            recent_logs = tail_lines(LOG_FILE, 10, keyword)
+        except Exception as e:
+            self._log_operation("get_recent_logs", f"fail: {str(e)}", start_time, session.username)
+            return [f"查询失败：{str(e)}"]
+        self._log_operation("get_recent_logs", f"success: {len(recent_logs)}条", start_time, session.username)
         return recent_logs
 
-    def clear_logs(self) -> Tuple[bool, str]:
-        """清理日志：返回（是否成功，提示信息）"""
-        start_time = time.time()
-        if not self.check_permission(require_super=True):
+    def query_logs(self, token: Optional[str], operation: Optional[str] = None, user: Optional[str] = None,
+                   day: Optional[str] = None, keyword: Optional[str] = None, failed_only: bool = False,
+                   limit: int = 100) -> List[str]:
+        """按条件查询日志：操作类型/操作人/日期(YYYY-MM-DD)走侧边索引，keyword为包含匹配"""
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=True)
+        if not session:
+            self._log_operation("query_logs", "fail: 权限不足", start_time)
+            return ["权限不足：仅超级管理员可查看日志"]
+
+        try:
+            flush_log()
+            logs = query_logs(LOG_FILE, operation, user, day, keyword, failed_only, limit)
+        except Exception as e:
+            self._log_operation("query_logs", f"fail: {str(e)}", start_time, session.username)
+            return [f"查询失败：{str(e)}"]
+        self._log_operation("query_logs", f"success: {len(logs)}条", start_time, session.username)
+        return logs
+
+    def get_performance_metrics(self, token: Optional[str]) -> Dict[str, Dict]:
+        """性能统计：返回各操作的耗时分布快照（秒）及读写字节数，见utils.metrics"""
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=True)
+        if not session:
+            self._log_operation("get_performance_metrics", "fail: 权限不足", start_time)
+            return {}
+        metrics = registry.snapshot()
+        self._log_operation("get_performance_metrics", f"success: {len(metrics)}项", start_time, session.username)
+        return metrics
+
+    def clear_logs(self, token: Optional[str]) -> Tuple[bool, str]:
+        """清理日志：当前日志压缩归档后重新开始，返回（是否成功，提示信息）"""
+        start_time = time.perf_counter()
+        session = self.check_permission(token, require_super=True)
+        if not session:
             self._log_operation("clear_logs", "fail: 权限不足", start_time)
             return False, "权限不足：仅超级管理员可清理日志"
 
-        log_file = "mall_system.log"
         try:
-            if os.path.exists(log_file):
-                with open(log_file, "w", encoding="utf-8") as f:
-                    f.truncate()  # 清空文件
-                self._log_operation("clear_logs", "success", start_time)
-                return True, "日志清理成功"
-            else:
-                self._log_operation("clear_logs", "fail: 日志文件不存在", start_time)
-                return False, "清理失败：日志文件不存在"
+            rotate_log()
+            remove_index(LOG_FILE)
+            self._log_operation("clear_logs", "success", start_time, session.username)
+            return True, "日志清理成功（旧日志已压缩归档）"
         except Exception as e:
-            self._log_operation("clear_logs", f"fail: {str(e)}", start_time)
+            self._log_operation("clear_logs", f"fail: {str(e)}", start_time, session.username)
             return False, f"清理失败：{str(e)}"
 
+    @_serialized
     def exit_system(self) -> None:
         """退出系统：保存数据+自动备份"""
-        start_time = time.time()
+        start_time = time.perf_counter()
+        # 先写入批量提交中尚未落盘的变更（失败的会被回滚，不会进入下面的完整保存）
+        self.flush()
         # 保存当前数据
-        save_data(self.users, self.products, self.orders)
+        save_data(self._users.values(), self._products.values(), self._orders.values())
         # 自动备份
         backup_data()
-        self._log_operation("exit_system", "success: 数据保存+自动备份", start_time)
\ No newline at end of file
+        self._log_operation("exit_system", "success: 数据保存+自动备份", start_time, "system")
\ No newline at end of file
@@ -0,0 +1,208 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from bisect import bisect_left, insort
+from operator import itemgetter
+from model.entities import Order
+from utils.sorted_index import SortedIndex
+
+# 汇总粒度 -> 时段长度（秒）。下单时间是本地时间的整数秒，取整即得到本地的整点/零点
+ROLLUP_GRANULARITIES: Dict[str, int] = {
+    "hour": 3600,
+    "day": 86400,
+}
+
+# 时段汇总：时段起点 -> [订单数, 销售数量, 销售额]
+Rollup = Dict[int, List]
+
+
+def _add_sales(rollup: Rollup, period: int, orders: int, count: int, amount: float) -> None:
+    sales = rollup.setdefault(period, [0, 0, 0.0])
+    sales[0] += orders
+    sales[1] += count
+    sales[2] += amount
+    if sales[0] <= 0:
+        del rollup[period]  # 时段内已没有订单
+
+
+class OrderTimeIndex:
+    """订单时间索引：按下单时间排序的(下单时间, 订单编号)有序索引，以及按小时/按天的销售汇总。
+    全部订单（分类为None）的汇总包含已删除商品的订单；分类汇总按商品当前分类统计，与get_order_statistics口径一致。
+    非线程安全，由调用方在提交锁内调用"""
+
+    def __init__(self):
+        self._times = SortedIndex()
+        # 分类（None为全部订单）-> 粒度 -> 时段汇总
+        self._rollups: Dict[Optional[str], Dict[str, Rollup]] = {}
+        # 商品编号 -> 按小时的销售汇总：商品改分类/删除时据此把它的订单移到别的分类
+        self._product_hours: Dict[str, Rollup] = {}
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    @classmethod
+    def build(cls, orders: Iterable[Order], categories: Dict[str, str]) -> "OrderTimeIndex":
+        """全量构建：categories为商品编号 -> 当前分类（不在其中的订单只计入全部订单的汇总）"""
+        index = cls()
+        entries = []
+        product_hours = index._product_hours
+        for order in orders:
+            entries.append((order.create_ts, order.order_id))
+            hours = product_hours.get(order.product_id)
+            if hours is None:
+                hours = product_hours[order.product_id] = {}
+            hour = order.create_ts - order.create_ts % 3600
+            sales = hours.get(hour)
+            if sales is None:
+                hours[hour] = [1, order.buy_count, order.total_amount]
+            else:
+                sales[0] += 1
+                sales[1] += order.buy_count
+                sales[2] += order.total_amount
+        # 先按商品、小时汇总，再合并到分类和全部订单的小时汇总，最后由小时汇总得到天汇总
+        category_hours: Dict[Optional[str], Rollup] = {}
+        for product_id, hours in product_hours.items():
+            category = categories.get(product_id)
+            for bucket in (None, category) if category is not None else (None,):
+                target = category_hours.get(bucket)
+                if target is None:
+                    target = category_hours[bucket] = {}
+                for hour, sales in hours.items():
+                    total = target.get(hour)
+                    if total is None:
+                        target[hour] = sales[:]
+                    else:
+                        total[0] += sales[0]
+                        total[1] += sales[1]
+                        total[2] += sales[2]
+        for category, hours in category_hours.items():
+            rollups = index._rollups[category] = {"hour": hours}
+            for granularity, seconds in ROLLUP_GRANULARITIES.items():
+                if granularity != "hour":
+                    rollups[granularity] = periods = {}
+                    for hour, sales in hours.items():
+                        _add_sales(periods, hour - hour % seconds, *sales)
+        # 两次稳定排序（先编号后时间）比直接比较元组快；订单大多按时间先后写入，按时间排序接近线性
+        entries.sort(key=itemgetter(1))
+        entries.sort(key=itemgetter(0))
+        index._times = SortedIndex(entries, presorted=True)
+        return index
+
+    def _add_rollups(self, order: Order, category: Optional[str], sign: int) -> None:
+        orders, count, amount = sign, sign * order.buy_count, sign * order.total_amount
+        hour = order.create_ts - order.create_ts % 3600
+        _add_sales(self._product_hours.setdefault(order.product_id, {}), hour, orders, count, amount)
+        if not self._product_hours[order.product_id]:
+            del self._product_hours[order.product_id]
+        for bucket in (None, category) if category is not None else (None,):
+            self._add_bucket(bucket, hour, orders, count, amount)
+
+    def _add_bucket(self, category: Optional[str], hour: int, orders: int, count: int, amount: float) -> None:
+        """把一个小时的销售额计入分类的小时/天汇总"""
+        rollups = self._rollups.get(category)
+        if rollups is None:
+            rollups = self._rollups[category] = {granularity: {} for granularity in ROLLUP_GRANULARITIES}
+        for granularity, seconds in ROLLUP_GRANULARITIES.items():
+            _add_sales(rollups[granularity], hour - hour % seconds, orders, count, amount)
+        if category is not None and not rollups["hour"]:
+            del self._rollups[category]  # 分类下已没有订单
+
+    def add(self, order: Order, category: Optional[str]) -> None:
+        """订单加入索引：category为商品当前分类（商品已删除时为None）"""
+        self._times.add(order.create_ts, order.order_id)
+        self._add_rollups(order, category, 1)
+
+    def remove(self, order: Order, category: Optional[str]) -> None:
+        self._times.remove(order.create_ts, order.order_id)
+        self._add_rollups(order, category, -1)
+
+    def attach_product(self, product_id: str, category: str) -> None:
+        """商品加入（或改分类后重新加入）：它已有订单的各小时销售额计入该分类"""
+        for hour, sales in self._product_hours.get(product_id, {}).items():
+            self._add_bucket(category, hour, *sales)
+
+    def detach_product(self, product_id: str, category: str) -> None:
+        """商品删除（或改分类前）：从该分类的汇总中扣除它的订单"""
+        for hour, sales in self._product_hours.get(product_id, {}).items():
+            self._add_bucket(category, hour, -sales[0], -sales[1], -sales[2])
+
+    def count(self, start: Optional[int] = None, end: Optional[int] = None) -> int:
+        """下单时间在[start, end]内的订单数（None表示不限）"""
+        return self._times.count(start, end)
+
+    def irange(self, start: Optional[int] = None, end: Optional[int] = None,
+               reverse: bool = False) -> Iterator[str]:
+        """按下单时间顺序（reverse=True为从新到旧）依次返回[start, end]内的订单编号"""
+        return self._times.irange(start, end, reverse)
+
+    def rollup(self, granularity: str, start: Optional[int] = None, end: Optional[int] = None,
+               category: Optional[str] = None) -> List[Tuple[int, int, int, float]]:
+        """时段汇总：与[start, end]有交集的各时段，按时间顺序返回[(时段起点, 订单数, 销售数量, 销售额)]"""
+        periods = self._rollups.get(category, {}).get(granularity, {})
+        if start is not None:
+            start -= start % ROLLUP_GRANULARITIES[granularity]  # 包含start所在的时段
+        return [(period, *periods[period]) for period in sorted(periods)
+                if (start is None or period >= start) and (end is None or period <= end)]
+
+    def categories(self) -> List[str]:
+        """有订单的分类"""
+        return sorted(category for category in self._rollups if category is not None)
+
+
+class CustomerOrderIndex:
+    """客户订单索引：手机号 -> 该客户按下单时间排序的(下单时间, 订单编号)，以及累计消费额。
+    每个客户的订单不多，用有序列表二分插入即可。非线程安全，由调用方在提交锁内调用"""
+
+    def __init__(self):
+        self._orders: Dict[str, List[Tuple[int, str]]] = {}
+        self._spend: Dict[str, float] = {}  # 手机号 -> 累计消费额（已撤销的订单不计）
+
+    @classmethod
+    def build(cls, orders: Iterable[Order]) -> "CustomerOrderIndex":
+        index = cls()
+        for order in orders:
+            entries = index._orders.get(order.phone)
+            if entries is None:
+                entries = index._orders[order.phone] = []
+                index._spend[order.phone] = 0.0
+            entries.append((order.create_ts, order.order_id))
+            index._spend[order.phone] += order.total_amount
+        for entries in index._orders.values():
+            entries.sort()
+        return index
+
+    def add(self, order: Order) -> None:
+        insort(self._orders.setdefault(order.phone, []), (order.create_ts, order.order_id))
+        self._spend[order.phone] = self._spend.get(order.phone, 0.0) + order.total_amount
+
+    def remove(self, order: Order) -> None:
+        entries = self._orders.get(order.phone)
+        if not entries:
+            return
+        entry = (order.create_ts, order.order_id)
+        pos = bisect_left(entries, entry)
+        if pos == len(entries) or entries[pos] != entry:
+            return
+        del entries[pos]
+        if entries:
+            self._spend[order.phone] -= order.total_amount
+        else:
+            # 客户已没有订单：直接删除，避免浮点误差留下0.0000001之类的余额
+            del self._orders[order.phone]
+            del self._spend[order.phone]
+
+    def totals(self, phone: str) -> Tuple[int, float]:
+        """客户的（订单数，累计消费额）"""
+        return len(self._orders.get(phone, ())), self._spend.get(phone, 0.0)
+
+    def page(self, phone: str, offset: int = 0, limit: int = 100, newest_first: bool = True) -> List[str]:
+        """客户的订单编号：按下单时间排序（默认从新到旧）后第offset起的至多limit个"""
+        entries = self._orders.get(phone, [])
+        if newest_first:
+            end = max(0, len(entries) - offset)
+            selected = entries[max(0, end - limit):end][::-1]
+        else:
+            selected = entries[offset:offset + limit]
+        return [order_id for _, order_id in selected]
+
+    def __len__(self) -> int:
+        """有订单的客户数"""
+        return len(self._orders)
@@ -0,0 +1,161 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import heapq
+import itertools
+import threading
+from operator import attrgetter, itemgetter
+from model.entities import Product
+from utils.sorted_index import SortedIndex
+
+# 建有序索引的字段 -> 取键函数（全部商品一组，每个分类各一组）
+INDEXED_FIELDS: Dict[str, Callable[[Product], object]] = {
+    "product_id": lambda product: product.product_id,
+    "price": lambda product: product.price,
+    "stock": lambda product: product.stock,
+    "total_value": lambda product: product.total_value,
+}
+# 库存变化时需要调整的索引
+_STOCK_FIELDS = ("stock", "total_value")
+
+
+def _in_range(value, low, high) -> bool:
+    return (low is None or value >= low) and (high is None or value <= high)
+
+
+class ProductIndex:
+    """商品二级索引：按分类分桶，每个桶（及全部商品）在单价/库存/总价值/编号上各有一个有序索引，
+    随商品增删改增量维护。加减库存可能在不同的商品锁下并发进行，内部用一把锁保护"""
+
+    def __init__(self):
+        self._buckets: Dict[Optional[str], Dict[str, SortedIndex]] = {}  # 分类（None为全部）-> 字段 -> 索引
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _entries(products: Iterable[Product], field: str) -> List[Tuple[object, str]]:
+        key = INDEXED_FIELDS[field]
+        return [(key(product), product.product_id) for product in products]
+
+    def _bucket(self, category: Optional[str]) -> Dict[str, SortedIndex]:
+        bucket = self._buckets.get(category)
+        if bucket is None:
+            bucket = self._buckets[category] = {field: SortedIndex() for field in INDEXED_FIELDS}
+        return bucket
+
+    def rebuild(self, products: Iterable[Product]) -> None:
+        """全量重建：加载、恢复数据后调用。每个字段只排序一次，再按分类拆分（拆分后仍然有序）"""
+        # 先按编号排好，之后各字段只按键做稳定排序，键相同的条目自然按编号有序（比比较元组快）
+        products = sorted(products, key=attrgetter("product_id"))
+        categories = {product.product_id: product.category for product in products}
+        buckets: Dict[Optional[str], Dict[str, SortedIndex]] = {None: {}}
+        for field in INDEXED_FIELDS:
+            entries = self._entries(products, field)
+            entries.sort(key=itemgetter(0))
+            by_category: Dict[str, List[Tuple[object, str]]] = {}
+            for entry in entries:
+                by_category.setdefault(categories[entry[1]], []).append(entry)
+            buckets[None][field] = SortedIndex(entries, presorted=True)
+            for category, members in by_category.items():
+                buckets.setdefault(category, {})[field] = SortedIndex(members, presorted=True)
+        with self._lock:
+            self._buckets = buckets
+
+    def add(self, product: Product) -> None:
+        with self._lock:
+            for category in (None, product.category):
+                for field, index in self._bucket(category).items():
+                    index.add(INDEXED_FIELDS[field](product), product.product_id)
+
+    def remove(self, product: Product) -> None:
+        """移出索引：必须在修改商品字段之前调用（按当前字段值定位条目）"""
+        with self._lock:
+            for category in (None, product.category):
+                bucket = self._buckets.get(category)
+                if bucket is None:
+                    continue
+                for field, index in bucket.items():
+                    index.remove(INDEXED_FIELDS[field](product), product.product_id)
+                if category is not None and not len(bucket["product_id"]):
+                    del self._buckets[category]  # 分类下已没有商品
+
+    def add_many(self, products: List[Product]) -> None:
+        """批量加入（批量导入）：每个索引合并重排一次"""
+        with self._lock:
+            for category in itertools.chain([None], {product.category for product in products}):
+                members = products if category is None else [p for p in products if p.category == category]
+                for field, index in self._bucket(category).items():
+                    index.add_many(self._entries(members, field))
+
+    def remove_many(self, products: List[Product]) -> None:
+        with self._lock:
+            for category in itertools.chain([None], {product.category for product in products}):
+                members = products if category is None else [p for p in products if p.category == category]
+                bucket = self._buckets.get(category)
+                if bucket is None:
+                    continue
+                for field, index in bucket.items():
+                    index.remove_many(self._entries(members, field))
+                if category is not None and not len(bucket["product_id"]):
+                    del self._buckets[category]
+
+    def adjust_stock(self, product: Product, delta: int) -> None:
+        """加减库存并更新库存/总价值索引（调用方持有该商品的锁）"""
+        with self._lock:
+            buckets = [self._buckets[None], self._buckets[product.category]]
+            for bucket in buckets:
+                for field in _STOCK_FIELDS:
+                    bucket[field].remove(INDEXED_FIELDS[field](product), product.product_id)
+            product.stock += delta
+            for bucket in buckets:
+                for field in _STOCK_FIELDS:
+                    bucket[field].add(INDEXED_FIELDS[field](product), product.product_id)
+
+    def category_counts(self) -> Dict[str, int]:
+        """各分类的商品数"""
+        with self._lock:
+            return {category: len(bucket["product_id"]) for category, bucket in self._buckets.items()
+                    if category is not None}
+
+    def query(self, products: Dict[str, Product], category: Optional[str] = None,
+              price_range: Optional[Tuple[Optional[float], Optional[float]]] = None, min_stock: Optional[int] = None,
+              sort_by: str = "product_id", descending: bool = False, offset: int = 0,
+              limit: int = 100) -> Tuple[List[Product], int]:
+        """条件查询：返回（排序后第offset起的至多limit个商品，符合条件的总数）。
+        只有排序字段上有范围条件（或没有条件）时按索引顺序直接取出，为O(log n + offset + limit)；
+        否则先用最窄的范围索引取出候选，过滤后部分排序"""
+        ranges = {}
+        if price_range is not None and price_range != (None, None):
+            ranges["price"] = price_range
+        if min_stock is not None:
+            ranges["stock"] = (min_stock, None)
+
+        with self._lock:
+            bucket = self._buckets.get(category)
+            if bucket is None:
+                return [], 0
+            if sort_by in ranges or not ranges:
+                driver = sort_by
+            else:
+                driver = min(ranges, key=lambda field: bucket[field].count(*ranges[field]))
+            low, high = ranges.get(driver, (None, None))
+            filters = [(INDEXED_FIELDS[field], bounds) for field, bounds in ranges.items() if field != driver]
+            candidates = (products[product_id] for product_id in
+                          bucket[driver].irange(low, high, reverse=descending and driver == sort_by))
+            if filters:
+                candidates = (product for product in candidates
+                              if all(_in_range(key(product), *bounds) for key, bounds in filters))
+
+            if driver == sort_by:
+                if not filters:
+                    total = bucket[driver].count(low, high)
+                    return list(itertools.islice(candidates, offset, offset + limit)), total
+                page, total = [], 0
+                for product in candidates:
+                    if offset <= total < offset + limit:
+                        page.append(product)
+                    total += 1
+                return page, total
+
+            matched = list(candidates)
+        sort_key = INDEXED_FIELDS[sort_by]
+        select = heapq.nlargest if descending else heapq.nsmallest
+        page = select(offset + limit, matched, key=lambda product: (sort_key(product), product.product_id))
+        return page[offset:], len(matched)
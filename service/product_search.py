@@ -0,0 +1,160 @@
+from typing import Dict, Iterable, List, Optional, Set
+import heapq
+import threading
+from model.entities import Product
+from utils.sorted_index import SortedIndex
+
+# 索引的字段，也是排序的优先级：名称匹配排在分类匹配之前，分类匹配排在编号匹配之前
+SEARCH_FIELDS = ("name", "category", "product_id")
+# 比任何字符都大：前缀查询的上界为 前缀 + _MAX_CHAR
+_MAX_CHAR = "\U0010ffff"
+
+
+def _grams(text: str) -> Set[str]:
+    """文本的单字和相邻两字：中文名称没有空格分词，按字切分即可做任意子串查询"""
+    return set(text).union(text[i:i + 2] for i in range(len(text) - 1))
+
+
+def _query_grams(query: str) -> List[str]:
+    """查询词对应的倒排键：一个字查单字，多个字查所有相邻两字（都出现才可能包含查询词）"""
+    if len(query) == 1:
+        return [query]
+    return list({query[i:i + 2] for i in range(len(query) - 1)})
+
+
+class ProductSearchIndex:
+    """商品搜索索引：名称/分类/编号（不区分大小写）的单字+两字倒排索引，以及每个字段按文本排序的前缀索引。
+    第一次搜索时构建，之后随商品增删改增量维护（构建前的增删改直接忽略，构建时读取的就是最新数据）。
+    内部一把锁，搜索与修改商品可以在不同线程进行"""
+
+    def __init__(self):
+        self._built = False
+        # 商品在索引内部用整数文档号表示：倒排集合存整数、按下标取文本，比按编号查字典快
+        self._docs: Dict[str, int] = {}              # 商品编号 -> 文档号
+        self._ids: List[Optional[str]] = []          # 文档号 -> 商品编号（已删除为None）
+        self._texts: List[List[Optional[str]]] = []  # 字段 -> 文档号 -> 小写后的文本
+        self._free: List[int] = []                   # 可复用的文档号
+        self._postings: Dict[str, Set[int]] = {}     # 单字/两字 -> 文档号
+        self._prefixes: List[SortedIndex] = []       # 每个字段一个(文本, 商品编号)有序索引
+        self._lock = threading.Lock()
+
+    def _add(self, product: Product, prefixes: bool = True) -> None:
+        texts = [getattr(product, field).casefold() for field in SEARCH_FIELDS]
+        if self._free:
+            doc = self._free.pop()
+            self._ids[doc] = product.product_id
+            for field_texts, text in zip(self._texts, texts):
+                field_texts[doc] = text
+        else:
+            doc = len(self._ids)
+            self._ids.append(product.product_id)
+            for field_texts, text in zip(self._texts, texts):
+                field_texts.append(text)
+        self._docs[product.product_id] = doc
+        postings = self._postings
+        for gram in set().union(*map(_grams, texts)):
+            docs = postings.get(gram)
+            if docs is None:
+                docs = postings[gram] = set()
+            docs.add(doc)
+        if prefixes:
+            for prefix, text in zip(self._prefixes, texts):
+                prefix.add(text, product.product_id)
+
+    def _remove(self, product_id: str) -> None:
+        doc = self._docs.pop(product_id, None)
+        if doc is None:
+            return
+        texts = [field_texts[doc] for field_texts in self._texts]
+        for gram in set().union(*map(_grams, texts)):
+            docs = self._postings[gram]
+            docs.discard(doc)
+            if not docs:
+                del self._postings[gram]
+        for prefix, text in zip(self._prefixes, texts):
+            prefix.remove(text, product_id)
+        self._ids[doc] = None
+        for field_texts in self._texts:
+            field_texts[doc] = None
+        self._free.append(doc)
+
+    def _build(self, products: Iterable[Product]) -> None:
+        self._docs, self._ids, self._free, self._postings = {}, [], [], {}
+        self._texts = [[] for _ in SEARCH_FIELDS]
+        for product in products:
+            self._add(product, prefixes=False)
+        # 前缀索引整体排序一次，比逐个插入快
+        self._prefixes = [SortedIndex(zip(field_texts, self._ids)) for field_texts in self._texts]
+        self._built = True
+
+    def reset(self) -> None:
+        """丢弃索引（加载、恢复数据后调用），下次搜索时重新构建"""
+        with self._lock:
+            self._built = False
+            self._docs, self._ids, self._texts, self._free, self._postings, self._prefixes = {}, [], [], [], {}, []
+
+    def add(self, product: Product) -> None:
+        """商品加入索引（修改商品后也调用：按当前字段重新建立）"""
+        with self._lock:
+            if self._built:
+                self._remove(product.product_id)
+                self._add(product)
+
+    def remove(self, product_id: str) -> None:
+        with self._lock:
+            if self._built:
+                self._remove(product_id)
+
+    def add_many(self, products: Iterable[Product]) -> None:
+        with self._lock:
+            if self._built:
+                for product in products:
+                    self._remove(product.product_id)
+                    self._add(product)
+
+    def remove_many(self, product_ids: Iterable[str]) -> None:
+        with self._lock:
+            if self._built:
+                for product_id in product_ids:
+                    self._remove(product_id)
+
+    def search(self, query: str, products: Iterable[Product], limit: int = 20) -> List[str]:
+        """搜索名称/分类/编号中包含query的商品，返回按相关度排序的前limit个商品编号；products为全部商品（首次搜索时构建用）。
+        相关度：先按字段（名称、分类、编号）；同一字段内前缀匹配在前（按文本排序，完全匹配最前，走前缀索引），
+        其余子串匹配按出现位置、文本长度、编号排序。较靠前的档次已凑满limit个时不再查看后面的档次"""
+        query = query.strip().casefold()
+        if not query or limit <= 0:
+            return []
+        with self._lock:
+            if not self._built:
+                self._build(products)
+            results: List[str] = []
+            seen: Set[str] = set()
+            candidates = None
+            for rank, prefix in enumerate(self._prefixes):
+                for product_id in prefix.irange(query, query + _MAX_CHAR):
+                    if product_id not in seen:
+                        seen.add(product_id)
+                        results.append(product_id)
+                        if len(results) == limit:
+                            return results
+
+                if candidates is None:
+                    # 倒排求交得到候选（每个两字都出现），再逐个核对确实包含整个查询词
+                    postings = [self._postings.get(gram) for gram in _query_grams(query)]
+                    if not all(postings):
+                        return results
+                    postings.sort(key=len)
+                    candidates = postings[0].intersection(*postings[1:]) if len(postings) > 1 else postings[0]
+                texts, ids = self._texts[rank], self._ids
+                # 只保留position>0的：前缀匹配已在上面取出
+                scored = [(position, len(text), ids[doc]) for doc in candidates
+                          if (position := (text := texts[doc]).find(query)) > 0]
+                if seen:
+                    scored = [item for item in scored if item[2] not in seen]
+                for _, _, product_id in heapq.nsmallest(limit - len(results), scored):
+                    seen.add(product_id)
+                    results.append(product_id)
+                if len(results) == limit:
+                    return results
+            return results
@@ -0,0 +1,72 @@
+from typing import Callable, Dict, Hashable, Iterable, Tuple
+from collections import OrderedDict
+import threading
+
+# 带版本号的数据集合：stock单独计版本，下单/撤单只改库存时不影响只依赖商品名称、分类、单价的结果
+COLLECTIONS = ("products", "stock", "orders")
+# 最多缓存的结果数，超出时淘汰最久未使用的（0为不缓存）
+RESULT_CACHE_SIZE = 256
+
+
+def _copy_containers(value):
+    """复制结果中的list/dict/tuple（逐层），其他值（实体对象、时间等）不复制"""
+    if isinstance(value, list):
+        return [_copy_containers(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _copy_containers(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return tuple(_copy_containers(item) for item in value)
+    return value
+
+
+class ResultCache:
+    """版本化结果缓存：每个数据集合有一个单调递增的版本号，数据修改完成后调用bump。
+    结果按键（操作名+参数）缓存，并记下计算前所依赖集合的版本号，读取时任一版本号变化即视为失效，
+    因此计算期间发生的修改也不会留下过期结果。超出容量时按LRU淘汰。
+    每次返回结果中list/dict/tuple容器的副本，调用方修改返回值不会影响缓存；其中的商品/订单对象仍是同一个"""
+
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE):
+        self._versions: Dict[str, int] = dict.fromkeys(COLLECTIONS, 0)
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[int, ...], object]]" = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def bump(self, *collections: str) -> None:
+        """数据集合已修改：版本号加一，依赖它的结果随之失效（不传参数时为全部集合）"""
+        with self._lock:
+            for collection in collections or COLLECTIONS:
+                self._versions[collection] += 1
+            if not collections:
+                self._entries.clear()  # 全部失效，直接释放
+
+    def get_or_compute(self, key: Hashable, collections: Iterable[str],
+                       compute: Callable[[], object]) -> Tuple[object, bool]:
+        """返回（结果，是否命中缓存）：未命中时在锁外调用compute计算并缓存"""
+        with self._lock:
+            versions = tuple(self._versions[collection] for collection in collections)
+            entry = self._entries.get(key)
+            hit = entry is not None and entry[0] == versions
+            if hit:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if hit:
+            return _copy_containers(entry[1]), True
+
+        value = compute()
+        if self._max_entries <= 0:
+            return value, False
+        with self._lock:
+            self._entries[key] = (versions, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return _copy_containers(value), False
+
+    def stats(self) -> Dict[str, int]:
+        """命中次数、未命中次数、当前缓存的结果数"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
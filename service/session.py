@@ -0,0 +1,111 @@
+from typing import Callable, Dict, List, Optional
+import secrets
+import threading
+import time
+
+# 会话空闲多少秒后失效（每次通过令牌调用业务方法都会刷新）
+SESSION_IDLE_TIMEOUT = 1800
+# 同一账号在同一客户端连续输错密码的次数上限，超过后锁定LOGIN_LOCK_SECONDS秒
+LOGIN_MAX_FAILURES = 3
+LOGIN_LOCK_SECONDS = 30
+
+
+class Session:
+    """登录会话：令牌对应的操作人及登录时缓存的权限"""
+    __slots__ = ("token", "username", "is_super", "created_at", "last_active")
+
+    def __init__(self, token: str, username: str, is_super: bool):
+        self.token = token
+        self.username = username
+        self.is_super = is_super  # 缓存的权限，权限检查不必再查用户表
+        self.created_at = time.monotonic()
+        self.last_active = self.created_at
+
+
+class LoginFailures:
+    """登录失败记录：按（账号, 客户端）分别计数，一个客户端输错密码不会锁住其他客户端"""
+    __slots__ = ("login_fail_count", "lock_time")
+
+    def __init__(self):
+        self.login_fail_count = 0
+        self.lock_time = 0.0
+
+
+class SessionManager:
+    """会话管理：签发/校验/注销令牌，维护登录失败锁定状态（线程安全）"""
+
+    def __init__(self, idle_timeout: float = SESSION_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._sessions: Dict[str, Session] = {}
+        self._failures: Dict[tuple, LoginFailures] = {}
+        self._lock = threading.Lock()
+
+    def lock_remaining(self, username: str, client: str) -> float:
+        """账号在该客户端上剩余的锁定秒数（0表示未锁定）"""
+        with self._lock:
+            failures = self._failures.get((username, client))
+            if not failures or failures.login_fail_count < LOGIN_MAX_FAILURES:
+                return 0
+            return max(0.0, LOGIN_LOCK_SECONDS - (time.monotonic() - failures.lock_time))
+
+    def record_failure(self, username: str, client: str) -> int:
+        """记录一次密码错误，返回锁定前剩余的尝试次数"""
+        with self._lock:
+            failures = self._failures.setdefault((username, client), LoginFailures())
+            if failures.login_fail_count >= LOGIN_MAX_FAILURES:
+                failures.login_fail_count = 0  # 上一次锁定已过期，重新计数
+            failures.login_fail_count += 1
+            failures.lock_time = time.monotonic()
+            return LOGIN_MAX_FAILURES - failures.login_fail_count
+
+    def open(self, username: str, is_super: bool, client: str) -> Session:
+        """登录成功：清除该客户端的失败记录并签发新令牌"""
+        session = Session(secrets.token_urlsafe(24), username, is_super)
+        with self._lock:
+            self._failures.pop((username, client), None)
+            self._sessions[session.token] = session
+        return session
+
+    def get(self, token: Optional[str]) -> Optional[Session]:
+        """校验令牌：有效时刷新活跃时间并返回会话，不存在或已空闲超时返回None"""
+        if not token:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+            if now - session.last_active > self.idle_timeout:
+                del self._sessions[token]
+                return None
+            session.last_active = now
+            return session
+
+    def close(self, token: Optional[str]) -> Optional[Session]:
+        """注销令牌，返回被注销的会话"""
+        with self._lock:
+            return self._sessions.pop(token, None)
+
+    def close_where(self, predicate: Callable[[Session], bool], keep: Optional[str] = None) -> int:
+        """注销满足条件的会话（keep指定的令牌除外），返回注销数量"""
+        with self._lock:
+            tokens = [token for token, session in self._sessions.items() if token != keep and predicate(session)]
+            for token in tokens:
+                del self._sessions[token]
+            return len(tokens)
+
+    def rename_user(self, old_username: str, new_username: str) -> None:
+        """用户改名后同步已有会话的操作人"""
+        with self._lock:
+            for session in self._sessions.values():
+                if session.username == old_username:
+                    session.username = new_username
+
+    def purge_expired(self) -> int:
+        """清除所有空闲超时的会话，返回清除数量"""
+        now = time.monotonic()
+        return self.close_where(lambda session: now - session.last_active > self.idle_timeout)
+
+    def active_sessions(self) -> List[Session]:
+        with self._lock:
+            return list(self._sessions.values())
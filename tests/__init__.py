@@ -0,0 +1,21 @@
+import logging
+import os
+import tempfile
+import unittest
+from utils.log_config import logger
+
+# 测试不写仓库中的日志文件：去掉日志处理器，只保留NullHandler
+for _handler in logger.handlers[:]:
+    logger.removeHandler(_handler)
+    _handler.close()
+logger.addHandler(logging.NullHandler())
+
+
+class TempDirTestCase(unittest.TestCase):
+    """在临时目录中运行的测试：数据文件、日志、备份都使用相对路径，不会改动仓库中的数据文件"""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(tmp_dir.name)
@@ -0,0 +1,64 @@
+import asyncio
+import json
+import unittest
+from view.api_server import ApiServer, MallApi
+from service.mall_service import MallSystem
+from tests import TempDirTestCase
+
+
+class PipelinedPermissionTest(TempDirTestCase):
+    """同一连接上流水线发送的请求：未登录返回401，普通管理员调用超级管理员接口返回403，按请求顺序响应"""
+
+    def setUp(self):
+        super().setUp()
+        self.mall = MallSystem()
+        self.server = ApiServer(MallApi(self.mall), workers=2)
+        self.addCleanup(self.server.close)
+        self.mall.add_product(self.mall.login("lsl", "Lsl123"), "P1", "钢笔", "文具", "12.5", "10")
+        self.normal_token = self.mall.login("user1", "User123456")
+
+    def _request(self, method, path, token=None):
+        headers = f"Authorization: Bearer {token}\r\n" if token else ""
+        return f"{method} {path} HTTP/1.1\r\nHost: test\r\n{headers}Content-Length: 0\r\n\r\n".encode("latin-1")
+
+    async def _pipeline(self, requests):
+        server = await asyncio.start_server(self.server.handle_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"".join(requests))  # 不等响应，一次发出全部请求
+            await writer.drain()
+            responses = []
+            for _ in requests:
+                status_line = await reader.readline()
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line == b"\r\n":
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                body = await reader.readexactly(length)
+                responses.append((int(status_line.split()[1]), json.loads(body)))
+            writer.close()
+            await writer.wait_closed()
+        return responses
+
+    def test_pipelined_requests_without_permission(self):
+        responses = asyncio.run(self._pipeline([
+            self._request("GET", "/statistics"),
+            self._request("GET", "/statistics", self.normal_token),
+            self._request("GET", "/products", self.normal_token),
+            self._request("DELETE", "/products/P1", self.normal_token),
+            self._request("GET", "/orders/O1", "invalid-token"),
+        ]))
+
+        self.assertEqual([status for status, _ in responses], [401, 403, 200, 403, 401])
+        self.assertTrue(all(not payload["success"] for status, payload in responses if status != 200))
+        self.assertEqual([p["product_id"] for p in responses[2][1]["data"]["items"]], ["P1"])
+        self.assertIsNotNone(self.mall.get_product(self.normal_token, "P1"))  # 未被删除
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from unittest import mock
+from dao import data_handler, binary_snapshot
+from model.entities import User, Product, Order
+from tests import TempDirTestCase
+
+
+class BinarySnapshotTest(TempDirTestCase):
+    """二进制快照：写入后读回一致，写新快照时已打开的订单集合改为读取新文件"""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(data_handler, "SNAPSHOT_FORMAT", "binary")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.users = [User("admin", "Admin123", is_super=True), User("user1", "User123456")]
+        self.products = [Product("P1", "钢笔", "文具", 12.5, 8), Product("P2", "茶杯", "日用", 20.0, 3)]
+        self.orders = [Order("O2", "13800000000", "P1", 2, 12.5), Order("O1", "13900000000", "P2", 1, 20.0)]
+        self.orders[0].create_ts = 1700000000
+        self.assertTrue(data_handler.save_data(self.users, self.products, self.orders))
+
+    def _order_rows(self, orders):
+        return sorted((o.order_id, o.phone, o.product_id, o.buy_count, o.product_price, o.total_amount, o.create_ts)
+                      for o in orders)
+
+    def test_round_trip(self):
+        users, products, orders = data_handler.load_data()
+        self.assertEqual([(u.username, u.password, u.is_super) for u in users],
+                         [("admin", "Admin123", True), ("user1", "User123456", False)])
+        self.assertEqual([(p.product_id, p.name, p.category, p.price, p.stock) for p in products],
+                         [("P1", "钢笔", "文具", 12.5, 8), ("P2", "茶杯", "日用", 20.0, 3)])
+        self.assertIsInstance(orders, binary_snapshot.LazyOrderMap)
+        self.assertEqual(len(orders), 2)
+        self.assertEqual(orders["O2"].create_ts, 1700000000)
+        self.assertIs(orders["O2"], orders["O2"])
+        self.assertNotIn("O3", orders)
+        self.assertEqual(self._order_rows(orders.values()), self._order_rows(self.orders))
+        self.assertEqual(orders.product_sales(), {"P1": [1, 2, 25.0], "P2": [1, 1, 20.0]})
+
+    def test_rewrite_rebases_open_orders(self):
+        users, products, orders = data_handler.load_data()
+        kept = orders["O2"]
+        del orders["O1"]
+        orders["O3"] = Order("O3", "13700000000", "P2", 2, 20.0)
+        expected = self._order_rows(orders.values())
+        self.assertTrue(data_handler.save_data(users, products, orders.values()))
+
+        # 仍可读取（已改为映射新文件），已构造的订单对象不变
+        self.assertFalse(orders.snapshot.closed)
+        self.assertIs(orders["O2"], kept)
+        self.assertEqual(len(orders), 2)
+        self.assertEqual(self._order_rows(orders.values()), expected)
+        self.assertEqual(orders.product_sales(), {"P1": [1, 2, 25.0], "P2": [1, 2, 40.0]})
+        _, _, reloaded = data_handler.load_data()
+        self.assertEqual(self._order_rows(reloaded.values()), expected)
+
+    def test_rewrite_detaches_other_readers(self):
+        _, _, reader = data_handler.load_data()
+        users, products, orders = data_handler.load_data()
+        orders["O3"] = Order("O3", "13700000000", "P2", 2, 20.0)
+        self.assertTrue(data_handler.save_data(users, products, orders.values()))
+
+        # 另一份订单集合不再读取被替换的文件，内容仍是原来的
+        self.assertEqual(self._order_rows(reader.values()), self._order_rows(self.orders))
+        self.assertIsNone(reader.snapshot.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
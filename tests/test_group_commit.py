@@ -0,0 +1,50 @@
+import os
+import unittest
+from unittest import mock
+from dao import journal
+from service import mall_service
+from service.mall_service import MallSystem
+from tests import TempDirTestCase
+
+
+class GroupCommitRollbackTest(TempDirTestCase):
+    """批量提交写入失败时，已登记的操作全部回滚，内存与文件一致"""
+
+    def setUp(self):
+        super().setUp()
+        self.mall = MallSystem()  # 不启动后台写入线程，只由测试调用flush
+        patcher = mock.patch.object(mall_service, "GROUP_COMMIT_ENABLED", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.token = self.mall.login("lsl", "Lsl123")
+
+    def test_successful_flush_persists(self):
+        self.assertEqual(self.mall.add_product(self.token, "P1", "钢笔", "文具", "12.5", "10"), (True, "添加成功"))
+        self.assertTrue(self.mall.flush())
+
+        reloaded = MallSystem()
+        self.assertEqual([p.product_id for p in reloaded.products], ["P1"])
+
+    def test_failed_flush_rolls_back(self):
+        self.assertTrue(self.mall.add_product(self.token, "P1", "钢笔", "文具", "12.5", "10")[0])
+        self.assertTrue(self.mall.flush())
+        # 之后的写入失败：日志文件暂时移走，原位置被目录占用
+        os.rename(journal.JOURNAL_FILE, journal.JOURNAL_FILE + ".saved")
+        os.mkdir(journal.JOURNAL_FILE)
+        self.assertTrue(self.mall.add_product(self.token, "P2", "墨水", "文具", "3", "5")[0])
+        self.assertTrue(self.mall.create_order(self.token, "O1", "13800000000", "P1", "2")[0])
+        self.assertTrue(self.mall.modify_product(self.token, "P1", "price", "15")[0])
+
+        self.assertFalse(self.mall.flush())
+        self.assertEqual([(p.product_id, p.price, p.stock) for p in self.mall.products], [("P1", 12.5, 10)])
+        self.assertEqual(self.mall.orders, [])
+        self.assertEqual(self.mall.get_order_statistics(self.token), {})
+        os.rmdir(journal.JOURNAL_FILE)
+        os.rename(journal.JOURNAL_FILE + ".saved", journal.JOURNAL_FILE)
+        reloaded = MallSystem()
+        self.assertEqual([(p.product_id, p.stock) for p in reloaded.products], [("P1", 10)])
+        self.assertEqual(reloaded.orders, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import unittest
+from dao import data_handler, incremental_backup
+from dao.journal import put_record, delete_record
+from model.entities import User, Product
+from tests import TempDirTestCase
+
+
+class DeltaBackupRestoreTest(TempDirTestCase):
+    """完整备份 + 增量备份，恢复时合并为备份时刻的数据"""
+
+    def setUp(self):
+        super().setUp()
+        self.users = [User("admin", "Admin123", is_super=True)]
+        self.products = [Product("P1", "钢笔", "文具", 12.5, 10)]
+        self.assertTrue(data_handler.save_data(self.users, self.products, []))
+        self.assertTrue(data_handler.backup_data())  # 还没有备份状态，做完整备份
+
+    def _add_product(self, product):
+        self.products.append(product)
+        self.assertTrue(data_handler.save_changes([put_record("products", product.product_id, product.to_dict())],
+                                                  self.users, self.products, []))
+
+    def _product_ids(self, products):
+        return sorted(p.product_id for p in products)
+
+    def test_delta_backup_then_restore(self):
+        self._add_product(Product("P2", "墨水", "文具", 3.0, 5))
+        self.assertTrue(data_handler.backup_data())
+        self.assertTrue(os.path.exists(incremental_backup.delta_file(data_handler.BACKUP_FILE, 1)))
+        # 备份之后的修改不应出现在恢复结果中
+        self.products.pop(0)
+        self.assertTrue(data_handler.save_changes([delete_record("products", "P1")], self.users, self.products, []))
+
+        users, products, orders, ok = data_handler.restore_data()
+        self.assertTrue(ok)
+        self.assertEqual([u.username for u in users], ["admin"])
+        self.assertEqual(self._product_ids(products), ["P1", "P2"])
+        self.assertEqual(orders, [])
+
+    def test_delta_survives_checkpoint(self):
+        # 两次备份之间写快照清空了日志，未备份的变更不能丢
+        self._add_product(Product("P2", "墨水", "文具", 3.0, 5))
+        self.assertTrue(data_handler.save_data(self.users, self.products, []))
+        self._add_product(Product("P3", "铅笔", "文具", 1.5, 20))
+        self.assertTrue(data_handler.backup_data())
+
+        _, products, _, ok = data_handler.restore_data()
+        self.assertTrue(ok)
+        self.assertEqual(self._product_ids(products), ["P1", "P2", "P3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import unittest
+from dao import data_handler, journal
+from dao.journal import put_record, delete_record
+from model.entities import User, Product, Order
+from tests import TempDirTestCase
+
+
+class JournalReplayTest(TempDirTestCase):
+    """快照之后的变更只在日志中，模拟进程崩溃后重新加载"""
+
+    def setUp(self):
+        super().setUp()
+        self.users = [User("admin", "Admin123", is_super=True)]
+        self.pen = Product("P1", "钢笔", "文具", 12.5, 10)
+        self.assertTrue(data_handler.save_data(self.users, [self.pen], []))
+
+    def _commit(self, changes, products, orders):
+        self.assertTrue(data_handler.save_changes(changes, self.users, products, orders))
+
+    def test_replay_after_crash(self):
+        self.pen.stock = 8
+        order = Order("O1", "13800000000", "P1", 2, 12.5)
+        self._commit([put_record("products", "P1", self.pen.to_dict()),
+                      put_record("orders", "O1", order.to_dict())], [self.pen], [order])
+        ink = Product("P2", "墨水", "文具", 3.0, 5)
+        self._commit([put_record("products", "P2", ink.to_dict())], [self.pen, ink], [order])
+        self._commit([delete_record("products", "P2")], [self.pen], [order])
+        # 崩溃：最后一次追加只写了一半
+        with open(journal.JOURNAL_FILE, "a", encoding="utf-8") as f:
+            f.write('{"ts": 1, "changes": [{"op": "delete", "entity": "orders", "key": "O1"')
+
+        users, products, orders = data_handler.load_data()
+        self.assertEqual([u.username for u in users], ["admin"])
+        self.assertEqual([(p.product_id, p.stock) for p in products], [("P1", 8)])
+        self.assertEqual([(o.order_id, o.buy_count) for o in orders], [("O1", 2)])
+
+    def test_unfinished_checkpoint_is_ignored(self):
+        self.pen.stock = 9
+        self._commit([put_record("products", "P1", self.pen.to_dict())], [self.pen], [])
+        # 崩溃：写快照的临时文件只写了一半，尚未替换主数据文件
+        with open(data_handler.DATA_FILE + ".tmp", "w", encoding="utf-8") as f:
+            f.write('{"users": [')
+
+        _, products, _ = data_handler.load_data()
+        self.assertEqual([(p.product_id, p.stock) for p in products], [("P1", 9)])
+
+    def test_checkpoint_clears_journal(self):
+        self.pen.stock = 7
+        self._commit([put_record("products", "P1", self.pen.to_dict())], [self.pen], [])
+        self.assertTrue(data_handler.save_data(self.users, [self.pen], []))
+        self.assertEqual(os.path.getsize(journal.JOURNAL_FILE), 0)
+
+        _, products, _ = data_handler.load_data()
+        self.assertEqual([(p.product_id, p.stock) for p in products], [("P1", 7)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from service.mall_service import MallSystem
+from tests import TempDirTestCase
+
+
+class ResultCacheInvalidationTest(TempDirTestCase):
+    """修改数据后缓存的查询结果失效；调用方修改返回值不影响缓存"""
+
+    def setUp(self):
+        super().setUp()
+        self.mall = MallSystem()
+        self.token = self.mall.login("lsl", "Lsl123")
+        self.mall.add_product(self.token, "P1", "钢笔", "文具", "12.5", "10")
+        self.mall.add_product(self.token, "P2", "茶杯", "日用", "20", "5")
+        self.mall.create_order(self.token, "O1", "13800000000", "P1", "2")
+
+    def test_statistics_follow_mutations(self):
+        stats = self.mall.get_order_statistics(self.token)
+        self.assertEqual(stats, {"文具": {"sales_count": 2, "sales_amount": 25.0}})
+        hits = self.mall._cache.stats()["hits"]
+        self.assertEqual(self.mall.get_order_statistics(self.token), stats)
+        self.assertEqual(self.mall._cache.stats()["hits"], hits + 1)
+
+        self.assertTrue(self.mall.create_order(self.token, "O2", "13800000000", "P2", "1")[0])
+        self.assertEqual(self.mall.get_order_statistics(self.token), {
+            "文具": {"sales_count": 2, "sales_amount": 25.0},
+            "日用": {"sales_count": 1, "sales_amount": 20.0}})
+        self.assertTrue(self.mall.modify_product(self.token, "P2", "category", "文具")[0])
+        self.assertEqual(self.mall.get_order_statistics(self.token), {"文具": {"sales_count": 3, "sales_amount": 45.0}})
+        self.assertTrue(self.mall.cancel_order(self.token, "O1")[0])
+        self.assertEqual(self.mall.get_order_statistics(self.token), {"文具": {"sales_count": 1, "sales_amount": 20.0}})
+
+    def test_categories_follow_mutations(self):
+        self.assertEqual(self.mall.get_product_categories(self.token), {"文具": 1, "日用": 1})
+        self.assertTrue(self.mall.add_product(self.token, "P3", "铅笔", "文具", "1.5", "20")[0])
+        self.assertEqual(self.mall.get_product_categories(self.token), {"文具": 2, "日用": 1})
+        self.assertTrue(self.mall.delete_product(self.token, "P2")[0])
+        self.assertEqual(self.mall.get_product_categories(self.token), {"文具": 2})
+
+    def test_returned_results_are_copies(self):
+        stats = self.mall.get_order_statistics(self.token)
+        stats["文具"]["sales_count"] = 100
+        stats.clear()
+        categories = self.mall.get_product_categories(self.token)
+        categories["日用"] = 99
+        self.assertEqual(self.mall.get_order_statistics(self.token), {"文具": {"sales_count": 2, "sales_amount": 25.0}})
+        self.assertEqual(self.mall.get_product_categories(self.token), {"文具": 1, "日用": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
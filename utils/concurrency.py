@@ -0,0 +1,91 @@
+import contextlib
+import threading
+
+
+class ReadWriteLock:
+    """读写锁：多个读者可同时持有，写者独占；有写者等待时新的读者排队（写者优先，避免写者饿死）。
+    同一线程可重入读锁；持有写锁的线程可以再获取读锁或写锁，但持有读锁时不能升级为写锁"""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None        # 持有写锁的线程
+        self._write_depth = 0
+        self._writers_waiting = 0
+        self._local = threading.local()  # 当前线程持有读锁的层数
+
+    def acquire_read(self) -> None:
+        depth = getattr(self._local, "depth", 0)
+        with self._cond:
+            # 已持有读锁或写锁时直接重入，否则会和排队的写者互相等待
+            if depth == 0 and self._writer != threading.get_ident():
+                while self._writer is not None or self._writers_waiting:
+                    self._cond.wait()
+            self._readers += 1
+        self._local.depth = depth + 1
+
+    def release_read(self) -> None:
+        self._local.depth -= 1
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self) -> None:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            if getattr(self._local, "depth", 0):
+                raise RuntimeError("持有读锁时不能获取写锁")
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self) -> None:
+        with self._cond:
+            self._write_depth -= 1
+            if self._write_depth == 0:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def read_locked(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextlib.contextmanager
+    def write_locked(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class StripedLock:
+    """分段锁：按键的哈希值映射到固定数量的可重入锁，不必为每个键单独建锁"""
+
+    def __init__(self, stripes: int = 64):
+        self._locks = [threading.RLock() for _ in range(stripes)]
+
+    @contextlib.contextmanager
+    def locked(self, *keys):
+        """锁定一个或多个键：按锁编号顺序获取，多个线程同时锁多个键时不会死锁"""
+        indexes = sorted({hash(key) % len(self._locks) for key in keys})
+        for index in indexes:
+            self._locks[index].acquire()
+        try:
+            yield
+        finally:
+            for index in reversed(indexes):
+                self._locks[index].release()
@@ -0,0 +1,36 @@
+from typing import Dict, Iterator, Sequence, Tuple
+import csv
+
+# 商品导入CSV的列（表头可以用英文字段名或下面的中文列名）
+PRODUCT_COLUMNS = ("product_id", "name", "category", "price", "stock")
+COLUMN_ALIASES = {
+    "商品编号": "product_id",
+    "商品名称": "name",
+    "商品分类": "category",
+    "分类": "category",
+    "单价": "price",
+    "单价（元）": "price",
+    "库存": "stock",
+    "库存数量": "stock",
+}
+
+
+def iter_csv_rows(path: str, columns: Sequence[str] = PRODUCT_COLUMNS) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """逐行读取CSV：返回(行号, {字段: 去除首尾空格的值})，不把整个文件读入内存；
+    表头缺少必需列时抛出ValueError"""
+    # utf-8-sig：兼容Excel另存为CSV时写入的BOM
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError("CSV文件为空")
+        fields = [COLUMN_ALIASES.get(name.strip(), name.strip()) for name in header]
+        missing = [column for column in columns if column not in fields]
+        if missing:
+            raise ValueError(f"CSV缺少列：{', '.join(missing)}")
+        positions = [(column, fields.index(column)) for column in columns]
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue  # 跳过空行
+            yield reader.line_num, {column: row[index].strip() if index < len(row) else ""
+                                    for column, index in positions}
@@ -1,21 +1,145 @@
+import atexit
+import datetime
+import glob
+import gzip
 import logging
+import logging.handlers
 import os
+import queue
+import shutil
+import threading
+import time
+from typing import Callable, Optional
+
+# 日志文件路径（Service层查询、清理日志时也使用）
+LOG_FILE = "mall_system.log"
+# 单个日志文件超过该大小（字节）时轮转
+LOG_MAX_BYTES = 5 * 1024 * 1024
+# 每天零点轮转一次（设为False则只按大小轮转）
+LOG_ROTATE_DAILY = True
+# 保留的压缩归档个数（mall_system.log.时间戳.gz），超出的删除最旧的
+LOG_BACKUP_COUNT = 10
+# flush_log/rotate_log等待后台写日志线程处理完的最长时间（秒）
+LOG_FLUSH_TIMEOUT = 10.0
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    """归档：把当前日志压缩写入dest后删除原文件"""
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+class RotatingGzipFileHandler(logging.handlers.BaseRotatingHandler):
+    """按大小和日期轮转的文件Handler：旧日志压缩为 日志名.YYYYmmdd-HHMMSS.gz"""
+
+    def __init__(self, filename: str, max_bytes: int = LOG_MAX_BYTES, daily: bool = LOG_ROTATE_DAILY,
+                 backup_count: int = LOG_BACKUP_COUNT, encoding: str = "utf-8"):
+        super().__init__(filename, mode="a", encoding=encoding)
+        self.max_bytes = max_bytes
+        self.daily = daily
+        self.backup_count = backup_count
+        self.rotator = _gzip_rotator
+        # 已有日志从其最后修改时间算起，跨天后第一条日志即触发轮转
+        start = os.path.getmtime(self.baseFilename) if os.path.exists(self.baseFilename) else time.time()
+        self.rollover_at = self._next_midnight(start)
+
+    @staticmethod
+    def _next_midnight(timestamp: float) -> float:
+        day = datetime.date.fromtimestamp(timestamp) + datetime.timedelta(days=1)
+        return time.mktime(day.timetuple())
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.daily and record.created >= self.rollover_at:
+            return True
+        if self.max_bytes > 0 and self.stream is not None:
+            # tell()是字节偏移，日志以中文为主，按编码后的字节数比较
+            size = len((self.format(record) + self.terminator).encode(self.encoding or "utf-8"))
+            return self.stream.tell() + size >= self.max_bytes
+        return False
+
+    def archive_files(self) -> list:
+        """已有的压缩归档（按时间从旧到新）"""
+        return sorted(glob.glob(glob.escape(self.baseFilename) + ".*.gz"))
+
+    def doRollover(self) -> None:
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            dest = f"{self.baseFilename}.{stamp}.gz"
+            number = 1
+            while os.path.exists(dest):  # 同一秒内多次轮转
+                dest = f"{self.baseFilename}.{stamp}-{number}.gz"
+                number += 1
+            self.rotate(self.baseFilename, dest)
+        if self.backup_count > 0:
+            for path in self.archive_files()[:-self.backup_count]:
+                os.remove(path)
+        self.rollover_at = self._next_midnight(time.time())
+        self.stream = self._open()
+
+
+class _ListenerTask:
+    """放进日志队列的标记：后台线程处理到它时，之前的日志都已写入文件，
+    在后台线程中执行action（可为None）后通知等待方。多个线程可同时各自等待自己的标记"""
+
+    def __init__(self, action: Optional[Callable[[], None]] = None):
+        self.action = action
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+
+class _TaskQueueListener(logging.handlers.QueueListener):
+    """识别_ListenerTask的QueueListener：刷新、轮转都在写日志的线程中完成，不必停止再启动监听线程"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.running = False
+
+    def start(self) -> None:
+        super().start()
+        self.running = True
+
+    def stop(self) -> None:
+        if not self.running:
+            return  # 已停止（重复调用init_log或退出时）
+        self.running = False  # 之后的flush_log/rotate_log直接在调用线程执行
+        super().stop()
+
+    def handle(self, record) -> None:
+        if isinstance(record, _ListenerTask):
+            try:
+                if record.action is not None:
+                    record.action()
+            except BaseException as e:
+                record.error = e
+            finally:
+                record.done.set()
+            return
+        super().handle(record)
+
+
+_listener: Optional[_TaskQueueListener] = None
+_file_handler: Optional[RotatingGzipFileHandler] = None
+
 
 def init_log() -> logging.Logger:
     """初始化日志系统：返回日志器实例，供其他模块调用"""
+    global _listener, _file_handler
     logger = logging.getLogger("mall_system")#给日志器起的名字
     logger.setLevel(logging.INFO)  #仅记录INFO及以上级别日志
 
     # 存疑：移除重复Handler（避免多次初始化导致日志重复），比如多次调用init_log()时，会添加多个处理器，导致一条日志打印多次
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
+    if _listener is not None:
+        _listener.stop()
+        _file_handler.close()
 
-    # 创建FileHandler（指定UTF-8编码，解决乱码问题）
-    # mode="a"：追加模式（新日志加在文件末尾，不覆盖旧日志）
-    log_file = "mall_system.log"
-    file_handler = logging.FileHandler(
-        log_file, mode="a", encoding="utf-8"
-    )
+    # 文件Handler：UTF-8编码追加写入，按大小/日期轮转并压缩归档
+    _file_handler = RotatingGzipFileHandler(LOG_FILE)
 
     # 定义日志格式：时间-操作人-操作类型-响应时间-结果
     log_format = logging.Formatter(
@@ -23,11 +147,58 @@ def init_log() -> logging.Logger:
         datefmt="%Y-%m-%d %H:%M:%S"
     )
     #在其他地方需要记录日志时，只需导入这个logger，然后调用logger.info()记录日志
-    file_handler.setFormatter(log_format)
+    _file_handler.setFormatter(log_format)
 
-    # 添加Handler到日志器
-    logger.addHandler(file_handler)
+    # 业务线程（包括Tkinter界面线程）只把日志放进队列，由后台线程写文件
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    _listener = _TaskQueueListener(log_queue, _file_handler, respect_handler_level=True)
+    _listener.start()
     return logger
 
+
+def _run_in_listener(action: Optional[Callable[[], None]] = None) -> None:
+    """在后台写日志线程中排在已入队的日志之后执行action，并等待完成（action的异常在调用线程重新抛出）"""
+    listener = _listener
+    if listener is None or not listener.running:
+        if action is not None:
+            action()  # 监听线程已停止（退出过程中），直接执行
+        return
+    task = _ListenerTask(action)
+    listener.queue.put_nowait(task)
+    if not task.done.wait(LOG_FLUSH_TIMEOUT):
+        raise TimeoutError("等待日志写入超时")
+    if task.error is not None:
+        raise task.error
+
+
+def flush_log() -> None:
+    """等待队列中的日志全部写入文件（可多线程同时调用）"""
+    _run_in_listener()
+
+
+def _rollover() -> None:
+    handler = _file_handler
+    handler.acquire()
+    try:
+        handler.doRollover()
+    finally:
+        handler.release()
+
+
+def rotate_log() -> None:
+    """立即轮转：先写完队列中的日志，再把当前日志压缩归档并开始新文件"""
+    if _listener is not None:
+        _run_in_listener(_rollover)
+
+
+def _shutdown() -> None:
+    if _listener is not None:
+        _listener.stop()
+        _file_handler.close()
+
+
+atexit.register(_shutdown)
+
 # 全局日志器实例（其他模块导入此实例即可使用）
-logger = init_log()
\ No newline at end of file
+logger = init_log()
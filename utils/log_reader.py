@@ -0,0 +1,242 @@
+from typing import List, Optional, Dict, Set
+import json
+import os
+import threading
+
+# 从文件末尾向前读取的块大小
+BLOCK_SIZE = 64 * 1024
+# 侧边索引文件：日志按段（同一天的连续字节区间）记录其中出现的操作类型、操作人，只追加写入
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 2
+# 每段的大小上限（字节）：越小查询时读取的无关日志越少，索引文件越大
+SEGMENT_BYTES = 16 * 1024
+_FINGERPRINT_SIZE = 64  # 用文件开头的字节判断日志是否被清空/轮转过
+
+
+def tail_lines(path: str, count: int, keyword: Optional[str] = None) -> List[str]:
+    """从文件末尾按块向前读取，返回最后count条（包含关键词的）日志，按时间先后排列"""
+    if count <= 0 or not os.path.exists(path):
+        return []
+    keyword = keyword.lower() if keyword and keyword.strip() else None
+    result: List[str] = []
+
+    def _collect(raw: bytes) -> None:
+        line = raw.decode("utf-8", errors="ignore").strip()
+        if keyword is None or keyword in line.lower():
+            result.append(line)
+
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        remainder = b""
+        first_block = True
+        while position > 0 and len(result) < count:
+            size = min(BLOCK_SIZE, position)
+            position -= size
+            f.seek(position)
+            lines = (f.read(size) + remainder).split(b"\n")
+            if first_block and lines[-1] == b"":
+                lines.pop()  # 文件以换行结尾，最后一段不是日志行
+            first_block = False
+            remainder = lines[0]  # 块开头可能是半行，和前一块拼接后再处理
+            for raw in reversed(lines[1:]):
+                _collect(raw)
+                if len(result) >= count:
+                    break
+        if position == 0 and len(result) < count and remainder:
+            _collect(remainder)
+    return list(reversed(result[:count]))
+
+
+# ------------------------------ 侧边索引 ------------------------------
+class _Segment:
+    """日志的一段连续字节区间（同一天，至多SEGMENT_BYTES）：记下其中出现过的操作类型、操作人和是否有失败记录"""
+    __slots__ = ("day", "start", "end", "ops", "users", "fail")
+
+    def __init__(self, day: str, start: int):
+        self.day = day
+        self.start = start
+        self.end = start
+        self.ops: Set[str] = set()
+        self.users: Set[str] = set()
+        self.fail = False
+
+    def to_json(self) -> str:
+        return json.dumps({"day": self.day, "start": self.start, "end": self.end, "ops": sorted(self.ops),
+                           "users": sorted(self.users), "fail": self.fail}, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, data: Dict) -> "_Segment":
+        segment = cls(data["day"], data["start"])
+        segment.end = data["end"]
+        segment.ops = set(data["ops"])
+        segment.users = set(data["users"])
+        segment.fail = data["fail"]
+        return segment
+
+
+class _LogIndex:
+    """一个日志文件的索引：已写入索引文件的段（只追加），以及最后一段尚未写满的段（只在内存中）"""
+
+    def __init__(self, fingerprint: str = ""):
+        self.fingerprint = fingerprint
+        self.segments: List[_Segment] = []
+        self.index_size = 0              # 已读取/写入的索引文件字节数
+        self.open: Optional[_Segment] = None
+
+    @property
+    def indexed_to(self) -> int:
+        """已解析到的日志偏移"""
+        if self.open is not None:
+            return self.open.end
+        return self.segments[-1].end if self.segments else 0
+
+
+# 打开过的索引缓存在内存中（日志路径 -> 索引），查询时只读取索引文件新增的部分
+_indexes: Dict[str, _LogIndex] = {}
+_index_lock = threading.Lock()
+
+
+def _index_file(path: str) -> str:
+    return path + INDEX_SUFFIX
+
+
+def _fingerprint(path: str) -> str:
+    with open(path, "rb") as f:
+        return f.read(_FINGERPRINT_SIZE).decode("utf-8", errors="ignore")
+
+
+def _read_index_tail(path: str, index: _LogIndex) -> Optional[_LogIndex]:
+    """读取索引文件中index.index_size之后新增的段；文件被删除、截断或格式不符时返回None（需要重建）"""
+    try:
+        with open(_index_file(path), "rb") as f:
+            f.seek(index.index_size)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # 上次追加到一半（进程中断），之后从这里重新写
+                data = json.loads(raw)
+                if index.index_size == 0:
+                    if data.get("version") != INDEX_VERSION:
+                        return None
+                    index.fingerprint = data["fingerprint"]
+                else:
+                    index.segments.append(_Segment.from_json(data))
+                index.index_size += len(raw)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return index if index.index_size else None
+
+
+def _append_index(path: str, index: _LogIndex, lines: List[str]) -> None:
+    """把新写满的段（或新建索引的头部）追加到索引文件末尾"""
+    data = "".join(line + "\n" for line in lines).encode("utf-8")
+    with open(_index_file(path), "r+b" if index.index_size else "wb") as f:
+        f.seek(index.index_size)
+        f.write(data)
+        f.truncate()  # 去掉进程中断时留下的半行
+    index.index_size += len(data)
+
+
+def update_index(path: str) -> _LogIndex:
+    """增量更新索引：只解析上次索引之后新写入的完整日志行，写满的段追加到索引文件；日志被清空或轮转时重建。
+    调用方持有_index_lock"""
+    key = os.path.abspath(path)
+    if not os.path.exists(path):
+        _indexes.pop(key, None)
+        return _LogIndex()
+    size = os.path.getsize(path)
+    fingerprint = _fingerprint(path)
+
+    index = _indexes.get(key)
+    if index is not None:
+        try:
+            file_size = os.path.getsize(_index_file(path))
+        except OSError:
+            file_size = -1
+        if file_size < index.index_size:
+            index = None  # 索引文件被删除或截断
+    if index is None:
+        index = _read_index_tail(path, _LogIndex())
+    elif os.path.getsize(_index_file(path)) > index.index_size:
+        index = _read_index_tail(path, _LogIndex())  # 其他进程追加过，重新读取
+    if index is not None and (index.fingerprint != fingerprint or index.indexed_to > size):
+        index = None
+    if index is None:
+        index = _LogIndex(fingerprint)
+        _append_index(path, index, [json.dumps({"version": INDEX_VERSION, "fingerprint": fingerprint},
+                                               ensure_ascii=False)])
+    _indexes[key] = index
+    if index.indexed_to >= size:
+        return index
+
+    closed: List[_Segment] = []
+    segment = index.open
+    offset = index.indexed_to
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break  # 正在写入的半行，下次再索引
+            parts = raw.decode("utf-8", errors="ignore").split(" - ", 4)
+            day = parts[0][:10] if len(parts) == 5 else (segment.day if segment is not None else "")
+            if segment is None or segment.day != day or segment.end - segment.start >= SEGMENT_BYTES:
+                if segment is not None:
+                    closed.append(segment)
+                segment = _Segment(day, offset)
+            if len(parts) == 5:
+                segment.users.add(parts[1])
+                segment.ops.add(parts[2])
+                segment.fail = segment.fail or parts[4].startswith("fail")
+            offset += len(raw)
+            segment.end = offset
+    index.open = segment
+    if closed:
+        _append_index(path, index, [item.to_json() for item in closed])
+        index.segments.extend(closed)
+    return index
+
+
+def remove_index(path: str) -> None:
+    """删除索引（清理日志时调用）"""
+    with _index_lock:
+        _indexes.pop(os.path.abspath(path), None)
+        if os.path.exists(_index_file(path)):
+            os.remove(_index_file(path))
+
+
+def query_logs(path: str, operation: Optional[str] = None, user: Optional[str] = None,
+               day: Optional[str] = None, keyword: Optional[str] = None, failed_only: bool = False,
+               limit: int = 100) -> List[str]:
+    """按索引查询日志：operation/user/day(YYYY-MM-DD)精确匹配，keyword为包含匹配，
+    failed_only只返回结果字段以fail开头的记录；返回最近limit条。
+    先按段的索引信息跳过不可能匹配的段，只读取候选段的字节区间"""
+    if limit <= 0 or not os.path.exists(path):
+        return []
+    with _index_lock:
+        index = update_index(path)
+        segments = index.segments + ([index.open] if index.open is not None else [])
+    keyword = keyword.lower() if keyword and keyword.strip() else None
+    result: List[str] = []
+    with open(path, "rb") as f:
+        # 从最近的一段往前查，凑够limit条即停止
+        for segment in reversed(segments):
+            if (day and segment.day != day) or (operation and operation not in segment.ops) \
+                    or (user and user not in segment.users) or (failed_only and not segment.fail):
+                continue
+            f.seek(segment.start)
+            block = f.read(segment.end - segment.start).decode("utf-8", errors="ignore")
+            for line in reversed(block.splitlines()):
+                line = line.strip()
+                if not line:
+                    continue
+                if day or operation or user or failed_only:
+                    # 有字段条件时只返回格式完整的日志行
+                    parts = line.split(" - ", 4)
+                    if len(parts) != 5 or (operation and parts[2] != operation) or (user and parts[1] != user) \
+                            or (failed_only and not parts[4].startswith("fail")):
+                        continue
+                if keyword is not None and keyword not in line.lower():
+                    continue
+                result.append(line)
+                if len(result) >= limit:
+                    return list(reversed(result))
+    return list(reversed(result))
@@ -0,0 +1,111 @@
+from typing import Dict, List, Optional
+import contextlib
+import math
+import threading
+import time
+
+# 直方图桶：从HISTOGRAM_MIN秒开始按HISTOGRAM_GROWTH倍递增，分位数相对误差不超过约(HISTOGRAM_GROWTH-1)/2
+HISTOGRAM_MIN = 1e-6
+HISTOGRAM_GROWTH = 1.1
+_LOG_GROWTH = math.log(HISTOGRAM_GROWTH)
+
+
+def elapsed(start: float) -> str:
+    """日志中的响应时间字段：start为time.perf_counter()的返回值"""
+    return f"{round(time.perf_counter() - start, 4)}s"
+
+
+class Histogram:
+    """流式耗时直方图：只保存各桶计数，不保存每次的耗时，内存占用与调用次数无关"""
+
+    __slots__ = ("count", "total", "max", "bytes", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.bytes = 0
+        self.buckets: Dict[int, int] = {}
+
+    def observe(self, seconds: float, nbytes: int = 0) -> None:
+        self.count += 1
+        self.total += seconds
+        self.bytes += nbytes
+        if seconds > self.max:
+            self.max = seconds
+        index = int(math.log(seconds / HISTOGRAM_MIN) / _LOG_GROWTH) if seconds > HISTOGRAM_MIN else 0
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def percentile(self, percent: float) -> float:
+        """第percent百分位的耗时（秒），取所在桶的几何中点，不超过实际最大值"""
+        if self.count == 0:
+            return 0.0
+        rank = math.ceil(self.count * percent / 100)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(HISTOGRAM_MIN * HISTOGRAM_GROWTH ** (index + 0.5), self.max)
+        return self.max
+
+    def summary(self) -> Dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+            "bytes": self.bytes,
+        }
+
+
+class _Timer:
+    """timer()返回的计时对象：可在计时范围内补充写入/读取的字节数"""
+
+    __slots__ = ("bytes",)
+
+    def __init__(self):
+        self.bytes = 0
+
+
+class MetricsRegistry:
+    """按名称汇总耗时直方图，例如 dao.write、journal.fsync、service.create_order"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+
+    def observe(self, name: str, seconds: float, nbytes: int = 0) -> None:
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds, nbytes)
+
+    @contextlib.contextmanager
+    def timer(self, name: str):
+        """计时上下文：with registry.timer("dao.write") as t: ...; t.bytes = 写入字节数（异常时不记录）"""
+        record = _Timer()
+        start = time.perf_counter()
+        yield record
+        self.observe(name, time.perf_counter() - start, record.bytes)
+
+    def snapshot(self, prefix: Optional[str] = None) -> Dict[str, Dict]:
+        """当前统计快照：{名称: {count, total, mean, p50, p95, p99, max, bytes}}，耗时单位为秒"""
+        with self._lock:
+            return {name: histogram.summary() for name, histogram in sorted(self._histograms.items())
+                    if prefix is None or name.startswith(prefix)}
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return sorted(self._histograms)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+# 全局指标实例（DAO层和Service层共用）
+registry = MetricsRegistry()
@@ -0,0 +1,134 @@
+from bisect import bisect_left, insort
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+# 每个分块的目标长度：插入/删除只移动一个分块内的元素，不随总量增长
+CHUNK_SIZE = 512
+
+
+class _Top:
+    """比任何主键都大的哨兵：(键, _TOP) 排在所有键相同的条目之后，用于包含上界的查找"""
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+_TOP = _Top()
+
+
+class SortedIndex:
+    """有序二级索引：条目为(键, 主键)，按键排序（键相同按主键）。
+    数据分成若干有序块，插入/删除为O(log n)定位+块内移动，范围查询为O(log n + k)。非线程安全，由调用方加锁"""
+    __slots__ = ("_chunks", "_maxes", "_len")
+
+    def __init__(self, entries: Iterable[Tuple[Any, str]] = (), presorted: bool = False):
+        self._load(entries if presorted else sorted(entries))
+
+    def _load(self, entries: List[Tuple[Any, str]]) -> None:
+        self._chunks = [entries[i:i + CHUNK_SIZE] for i in range(0, len(entries), CHUNK_SIZE)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+        self._len = len(entries)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Tuple[Any, str]]:
+        for chunk in self._chunks:
+            yield from chunk
+
+    def add(self, key: Any, item_id: str) -> None:
+        entry = (key, item_id)
+        if not self._chunks:
+            self._chunks.append([entry])
+            self._maxes.append(entry)
+            self._len = 1
+            return
+        pos = bisect_left(self._maxes, entry)
+        if pos == len(self._maxes):
+            # 比现有条目都大：追加到最后一块
+            pos -= 1
+            self._chunks[pos].append(entry)
+            self._maxes[pos] = entry
+        else:
+            insort(self._chunks[pos], entry)
+        self._len += 1
+        chunk = self._chunks[pos]
+        if len(chunk) > CHUNK_SIZE * 2:
+            self._chunks[pos:pos + 1] = [chunk[:CHUNK_SIZE], chunk[CHUNK_SIZE:]]
+            self._maxes[pos:pos + 1] = [chunk[CHUNK_SIZE - 1], chunk[-1]]
+
+    def remove(self, key: Any, item_id: str) -> bool:
+        """删除条目：返回是否存在"""
+        entry = (key, item_id)
+        pos = bisect_left(self._maxes, entry)
+        if pos == len(self._maxes):
+            return False
+        chunk = self._chunks[pos]
+        index = bisect_left(chunk, entry)
+        if chunk[index] != entry:
+            return False
+        del chunk[index]
+        self._len -= 1
+        if not chunk:
+            del self._chunks[pos]
+            del self._maxes[pos]
+        elif index == len(chunk):
+            self._maxes[pos] = chunk[-1]
+        return True
+
+    def add_many(self, entries: Iterable[Tuple[Any, str]]) -> None:
+        """批量添加（导入等场景）：合并后整体重排，比逐条插入快"""
+        merged = list(self)
+        merged.extend(entries)
+        merged.sort()
+        self._load(merged)
+
+    def remove_many(self, entries: Iterable[Tuple[Any, str]]) -> None:
+        removed = set(entries)
+        self._load([entry for entry in self if entry not in removed])
+
+    def _locate(self, bound: Tuple) -> Tuple[int, int]:
+        """第一个不小于bound的条目位置：(块号, 块内下标)"""
+        pos = bisect_left(self._maxes, bound)
+        if pos == len(self._maxes):
+            return pos, 0
+        return pos, bisect_left(self._chunks[pos], bound)
+
+    def _bounds(self, low: Optional[Any], high: Optional[Any]) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """键在[low, high]内的条目范围：(起始位置, 结束位置)，结束位置不包含"""
+        start = (0, 0) if low is None else self._locate((low,))
+        end = (len(self._chunks), 0) if high is None else self._locate((high, _TOP))
+        return start, end
+
+    def count(self, low: Optional[Any] = None, high: Optional[Any] = None) -> int:
+        """键在[low, high]内的条目数（None表示不限）"""
+        if low is None and high is None:
+            return self._len
+        (start_chunk, start_index), (end_chunk, end_index) = self._bounds(low, high)
+        if (start_chunk, start_index) >= (end_chunk, end_index):
+            return 0
+        total = sum(len(chunk) for chunk in self._chunks[start_chunk:end_chunk])
+        return total - start_index + end_index
+
+    def irange(self, low: Optional[Any] = None, high: Optional[Any] = None,
+               reverse: bool = False) -> Iterator[str]:
+        """按键顺序（reverse=True为逆序）依次返回键在[low, high]内的主键"""
+        (start_chunk, start_index), (end_chunk, end_index) = self._bounds(low, high)
+        if (start_chunk, start_index) >= (end_chunk, end_index):
+            return
+        if not reverse:
+            for pos in range(start_chunk, min(end_chunk + 1, len(self._chunks))):
+                chunk = self._chunks[pos]
+                first = start_index if pos == start_chunk else 0
+                last = end_index if pos == end_chunk else len(chunk)
+                for index in range(first, last):
+                    yield chunk[index][1]
+        else:
+            for pos in range(min(end_chunk, len(self._chunks) - 1), start_chunk - 1, -1):
+                chunk = self._chunks[pos]
+                first = start_index if pos == start_chunk else 0
+                last = end_index if pos == end_chunk else len(chunk)
+                for index in range(last - 1, first - 1, -1):
+                    yield chunk[index][1]
@@ -0,0 +1,489 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+import argparse
+import asyncio
+import json
+import re
+from model.entities import TIME_FORMAT, parse_time_bound
+from service.mall_service import MallSystem
+
+# 无界面服务模式：python -m view.api_server [--host 127.0.0.1] [--port 8080]
+# 客户端先 POST /login 获取令牌，之后的请求带上请求头 Authorization: Bearer <令牌>
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+# 执行业务调用（加锁、写盘）的线程数，事件循环线程只负责收发数据
+EXECUTOR_WORKERS = 8
+# 长连接空闲多少秒后关闭
+KEEP_ALIVE_TIMEOUT = 15
+# 单个连接上允许同时处理的流水线请求数（响应仍按请求顺序返回）
+MAX_PIPELINE = 32
+# 只读方法可以与同一连接上的其他只读请求并行处理；其他方法要等前面的请求完成后再执行，
+# 它后面的请求也要等它完成，保证流水线中的写操作按发送顺序生效
+SAFE_METHODS = ("GET",)
+# GET /products、GET /orders 每次最多返回的条数
+PRODUCT_PAGE_LIMIT = 1000
+ORDER_PAGE_LIMIT = 1000
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+
+class HttpError(Exception):
+    """请求格式或参数错误：直接返回对应的状态码"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    __slots__ = ("method", "path", "query", "headers", "body", "keep_alive", "client")
+
+    def __init__(self, method: str, path: str, query: Dict[str, str], headers: Dict[str, str], body: bytes,
+                 keep_alive: bool, client: str = ""):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+        self.keep_alive = keep_alive
+        self.client = client  # 客户端地址，登录失败锁定按地址区分
+
+    @property
+    def token(self) -> Optional[str]:
+        """请求头 Authorization: Bearer <令牌> 中的会话令牌"""
+        scheme, _, token = self.headers.get("authorization", "").partition(" ")
+        return token.strip() if scheme.lower() == "bearer" else None
+
+    def json(self) -> Dict:
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body)
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "请求体不是有效的JSON")
+        if not isinstance(data, dict):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "请求体必须是JSON对象")
+        return data
+
+
+def _result(success: bool, message: str = "", data: Any = None,
+            status: Optional[HTTPStatus] = None) -> Tuple[HTTPStatus, Dict]:
+    """统一的响应格式：{"success": 是否成功, "message": 提示信息, "data": 数据}"""
+    if status is None:
+        status = HTTPStatus.OK if success else HTTPStatus.BAD_REQUEST
+    return status, {"success": success, "message": message, "data": data}
+
+
+def _require(data: Dict, *fields: str) -> Tuple[str, ...]:
+    missing = [field for field in fields if field not in data]
+    if missing:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"缺少字段：{', '.join(missing)}")
+    return tuple(str(data[field]) for field in fields)
+
+
+def _time_range(query: Dict[str, str]) -> Tuple[Optional[str], Optional[str]]:
+    """取出查询参数中的start/end（可省略），格式错误时返回400"""
+    start, end = query.get("start") or None, query.get("end") or None
+    for value in (start, end):
+        try:
+            if value:
+                parse_time_bound(value)
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"时间格式错误：{value}（应为YYYY-MM-DD或YYYY-MM-DD HH:MM:SS）")
+    return start, end
+
+
+class MallApi:
+    """HTTP接口到MallSystem业务方法的映射：处理函数在线程池中执行，返回(状态码, JSON对象)"""
+
+    def __init__(self, mall_system: MallSystem):
+        self.mall_system = mall_system
+        # (方法, 路径正则, 处理函数)；路径参数按顺序传给处理函数
+        self.routes = [
+            ("GET", r"/health", self.health),
+            ("POST", r"/login", self.login),
+            ("POST", r"/logout", self.logout),
+            ("GET", r"/products", self.list_products),
+            ("POST", r"/products", self.add_product),
+            ("GET", r"/categories", self.categories),
+            ("GET", r"/products/search", self.search_products),
+            ("GET", r"/products/([^/]+)", self.get_product),
+            ("PATCH", r"/products/([^/]+)", self.modify_product),
+            ("DELETE", r"/products/([^/]+)", self.delete_product),
+            ("GET", r"/orders", self.list_orders),
+            ("POST", r"/orders", self.create_order),
+            ("POST", r"/orders/batch", self.create_orders_batch),
+            ("GET", r"/orders/([^/]+)", self.get_order),
+            ("DELETE", r"/orders/([^/]+)", self.cancel_order),
+            ("GET", r"/customers/([^/]+)/orders", self.customer_orders),
+            ("GET", r"/statistics", self.statistics),
+            ("GET", r"/sales", self.sales_rollup),
+            ("GET", r"/sales/report", self.sales_report),
+            ("POST", r"/backup", self.backup),
+            ("POST", r"/restore", self.restore),
+            ("GET", r"/logs", self.logs),
+            ("GET", r"/metrics", self.metrics),
+        ]
+        self.routes = [(method, re.compile(pattern + "$"), handler) for method, pattern, handler in self.routes]
+        # 不需要登录的接口
+        self.public = {self.health, self.login}
+        # 需要超级管理员的接口（与对应业务方法的require_super一致）
+        self.super_only = {self.delete_product, self.list_orders, self.create_order, self.create_orders_batch,
+                           self.get_order, self.cancel_order, self.customer_orders, self.statistics,
+                           self.sales_rollup, self.sales_report, self.backup, self.restore, self.logs, self.metrics}
+
+    def dispatch(self, request: Request) -> Tuple[HTTPStatus, Dict]:
+        """查找并执行处理函数：除公开接口外，令牌无效时返回401，普通管理员调用超级管理员接口时返回403。
+        业务方法权限不足时只返回空结果，必须在这里先区分，不能当作成功的空数据返回"""
+        handler, params = self.resolve(request.method, request.path)
+        if handler not in self.public:
+            session = self.mall_system.get_session(request.token)
+            if session is None:
+                return _result(False, "未登录或会话已过期", status=HTTPStatus.UNAUTHORIZED)
+            if handler in self.super_only and not session.is_super:
+                return _result(False, "权限不足：仅超级管理员可操作", status=HTTPStatus.FORBIDDEN)
+        return handler(request, *params)
+
+    def resolve(self, method: str, path: str) -> Tuple[Callable, Tuple[str, ...]]:
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if match:
+                if route_method == method:
+                    return handler, tuple(unquote(group) for group in match.groups())
+                allowed = True
+        if allowed:
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, f"不支持的方法：{method}")
+        raise HttpError(HTTPStatus.NOT_FOUND, f"接口不存在：{path}")
+
+    # ------------------------------ 接口处理函数 ------------------------------
+    def health(self, request: Request):
+        return _result(True, "ok")
+
+    def login(self, request: Request):
+        username, password = _require(request.json(), "username", "password")
+        token = self.mall_system.login(username, password, request.client)
+        if not token:
+            return _result(False, "登录失败：用户名或密码错误，或账号已锁定", status=HTTPStatus.UNAUTHORIZED)
+        return _result(True, "登录成功", {"token": token})
+
+    def logout(self, request: Request):
+        return _result(self.mall_system.logout(request.token), "已退出登录")
+
+    def list_products(self, request: Request):
+        """GET /products?offset=&limit=&sort=&desc=&keyword=&category=&min_price=&max_price=&min_stock=：
+        分页返回 {"total": 总数, "items": [商品]}；有分类/单价/库存条件时走商品索引查询"""
+        query = request.query
+        try:
+            offset = int(query.get("offset", 0))
+            limit = min(int(query.get("limit", PRODUCT_PAGE_LIMIT)), PRODUCT_PAGE_LIMIT)
+            min_price = float(query["min_price"]) if query.get("min_price") else None
+            max_price = float(query["max_price"]) if query.get("max_price") else None
+            min_stock = int(query["min_stock"]) if query.get("min_stock") else None
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "offset/limit/min_stock必须是整数，min_price/max_price必须是数字")
+        descending = query.get("desc", "").lower() in ("1", "true", "yes")
+        if query.get("category") or min_price is not None or max_price is not None or min_stock is not None:
+            if query.get("keyword"):
+                raise HttpError(HTTPStatus.BAD_REQUEST, "keyword不能与分类/单价/库存条件同时使用")
+            products, total = self.mall_system.query_products(
+                request.token, query.get("category") or None, (min_price, max_price), min_stock,
+                query.get("sort") or "product_id", descending, offset, limit)
+        else:
+            products, total = self.mall_system.get_products_page(
+                request.token, offset, limit, query.get("sort") or None, descending, query.get("keyword") or None)
+        return _result(True, f"{len(products)}/{total}个商品",
+                       {"total": total, "items": [product.to_dict() for product in products]})
+
+    def categories(self, request: Request):
+        return _result(True, "", self.mall_system.get_product_categories(request.token))
+
+    def search_products(self, request: Request):
+        """GET /products/search?q=&limit=：名称/分类/编号包含q的商品，按相关度排序（默认20个）"""
+        try:
+            limit = min(int(request.query.get("limit", 20)), PRODUCT_PAGE_LIMIT)
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "limit必须是整数")
+        products = self.mall_system.search_products(request.token, request.query.get("q", ""), limit)
+        return _result(True, f"{len(products)}个商品", [product.to_dict() for product in products])
+
+    def get_product(self, request: Request, product_id: str):
+        product = self.mall_system.get_product(request.token, product_id)
+        if product is None:
+            return _result(False, "商品不存在", status=HTTPStatus.NOT_FOUND)
+        return _result(True, "", product.to_dict())
+
+    def add_product(self, request: Request):
+        return _result(*self.mall_system.add_product(
+            request.token, *_require(request.json(), "product_id", "name", "category", "price", "stock")))
+
+    def modify_product(self, request: Request, product_id: str):
+        field, value = _require(request.json(), "field", "value")
+        return _result(*self.mall_system.modify_product(request.token, product_id, field, value))
+
+    def delete_product(self, request: Request, product_id: str):
+        return _result(*self.mall_system.delete_product(request.token, product_id))
+
+    def create_order(self, request: Request):
+        return _result(*self.mall_system.create_order(
+            request.token, *_require(request.json(), "order_id", "phone", "product_id", "buy_count")))
+
+    def create_orders_batch(self, request: Request):
+        data = request.json()
+        orders = data.get("orders")
+        if not isinstance(orders, list) or not all(isinstance(item, (list, dict)) for item in orders):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "orders必须是订单数组")
+        rows = []
+        for item in orders:
+            if isinstance(item, dict):
+                rows.append(_require(item, "order_id", "phone", "product_id", "buy_count"))
+            elif len(item) == 4:
+                rows.append(tuple(str(value) for value in item))
+            else:
+                raise HttpError(HTTPStatus.BAD_REQUEST, "订单数组元素应为[订单编号, 手机号, 商品编号, 购买数量]")
+        success, message, errors = self.mall_system.create_orders_batch(
+            request.token, rows, bool(data.get("skip_invalid", True)))
+        return _result(success, message, {"errors": errors})
+
+    def list_orders(self, request: Request):
+        """GET /orders?start=&end=&offset=&limit=&desc=：按下单时间查询订单，
+        start/end为"YYYY-MM-DD HH:MM:SS"或"YYYY-MM-DD"，返回 {"total": 总数, "items": [订单]}"""
+        query = request.query
+        start, end = _time_range(query)
+        try:
+            offset = int(query.get("offset", 0))
+            limit = min(int(query.get("limit", ORDER_PAGE_LIMIT)), ORDER_PAGE_LIMIT)
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "offset/limit必须是整数")
+        descending = query.get("desc", "").lower() in ("1", "true", "yes")
+        orders, total = self.mall_system.get_orders_between(request.token, start, end, offset, limit, descending)
+        return _result(True, f"{len(orders)}/{total}个订单",
+                       {"total": total, "items": [order.to_dict() for order in orders]})
+
+    def get_order(self, request: Request, order_id: str):
+        order = self.mall_system.get_order(request.token, order_id)
+        if order is None:
+            return _result(False, "订单不存在", status=HTTPStatus.NOT_FOUND)
+        return _result(True, "", order.to_dict())
+
+    def customer_orders(self, request: Request, phone: str):
+        """GET /customers/<手机号>/orders?offset=&limit=：客户的订单（从新到旧），
+        返回 {"order_count": 订单总数, "total_spend": 累计消费额, "items": [订单]}"""
+        try:
+            offset = int(request.query.get("offset", 0))
+            limit = min(int(request.query.get("limit", ORDER_PAGE_LIMIT)), ORDER_PAGE_LIMIT)
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "offset/limit必须是整数")
+        orders, totals = self.mall_system.get_orders_by_phone(request.token, phone, offset, limit)
+        if not totals:
+            return _result(False, "手机号格式错误：需11位纯数字", status=HTTPStatus.BAD_REQUEST)
+        return _result(True, f"{len(orders)}/{totals['order_count']}个订单",
+                       dict(totals, items=[order.to_dict() for order in orders]))
+
+    def cancel_order(self, request: Request, order_id: str):
+        return _result(*self.mall_system.cancel_order(request.token, order_id))
+
+    def statistics(self, request: Request):
+        return _result(True, "", self.mall_system.get_order_statistics(request.token))
+
+    def sales_rollup(self, request: Request):
+        """GET /sales?granularity=hour|day&start=&end=&category=：按时段汇总的订单数/销售数量/销售额"""
+        query = request.query
+        start, end = _time_range(query)
+        granularity = query.get("granularity") or "day"
+        if granularity not in ("hour", "day"):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "granularity只能是hour或day")
+        rollup = self.mall_system.get_sales_rollup(request.token, granularity, start, end,
+                                                   query.get("category") or None)
+        rollup = [dict(item, period=item["period"].strftime(TIME_FORMAT)) for item in rollup]
+        return _result(True, f"{len(rollup)}个时段", rollup)
+
+    def sales_report(self, request: Request):
+        """GET /sales/report?top=&granularity=hour|day&category=：分类汇总、销售额最高的商品、时段分布和客单价"""
+        query = request.query
+        try:
+            top_n = int(query.get("top", 10))
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "top必须是整数")
+        granularity = query.get("granularity") or "day"
+        if granularity not in ("hour", "day"):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "granularity只能是hour或day")
+        report = self.mall_system.get_sales_report(request.token, top_n, granularity, query.get("category") or None)
+        if not report:
+            return _result(False, "权限不足", status=HTTPStatus.FORBIDDEN)
+        histogram = [dict(item, period=item["period"].strftime(TIME_FORMAT)) for item in report["histogram"]]
+        return _result(True, f"{report['order_count']}个订单", dict(report, histogram=histogram))
+
+    def backup(self, request: Request):
+        full = bool(request.json().get("full", False))
+        return _result(*self.mall_system.backup_system_data(request.token, full))
+
+    def restore(self, request: Request):
+        return _result(*self.mall_system.restore_system_data(request.token))
+
+    def logs(self, request: Request):
+        query = request.query
+        keyword = query.get("keyword") or None
+        if any(query.get(name) for name in ("operation", "user", "day", "failed_only", "limit")):
+            try:
+                limit = int(query.get("limit", 100))
+            except ValueError:
+                raise HttpError(HTTPStatus.BAD_REQUEST, "limit必须是整数")
+            logs = self.mall_system.query_logs(
+                request.token, query.get("operation") or None, query.get("user") or None,
+                query.get("day") or None, keyword, query.get("failed_only", "").lower() in ("1", "true", "yes"),
+                limit)
+        else:
+            logs = self.mall_system.get_recent_logs(request.token, keyword)
+        return _result(True, f"{len(logs)}条", logs)
+
+    def metrics(self, request: Request):
+        return _result(True, "", self.mall_system.get_performance_metrics(request.token))
+
+
+class ApiServer:
+    """基于asyncio的HTTP/1.1服务：支持长连接和流水线，业务调用放到线程池执行"""
+
+    def __init__(self, api: MallApi, workers: int = EXECUTOR_WORKERS):
+        self.api = api
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mall-api")
+
+    async def _read_request(self, reader: asyncio.StreamReader, client: str) -> Optional[Request]:
+        """读取一个完整请求；连接正常关闭时返回None"""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise HttpError(HTTPStatus.BAD_REQUEST, "请求不完整")
+            return None
+        except asyncio.LimitOverrunError:
+            raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "请求头过大")
+        except asyncio.TimeoutError:
+            return None  # 空闲超时
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "请求行格式错误")
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HttpError(HTTPStatus.NOT_IMPLEMENTED, "不支持分块传输的请求体")
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Content-Length无效")
+        if length < 0 or length > MAX_BODY_BYTES:
+            raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "请求体过大")
+        body = await reader.readexactly(length) if length else b""
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        return Request(method.upper(), url.path.rstrip("/") or "/", query, headers, body, keep_alive, client)
+
+    async def _handle(self, request: Request) -> Tuple[HTTPStatus, Dict]:
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self.api.dispatch, request)
+        except HttpError as e:
+            return _result(False, e.message, status=e.status)
+        except Exception as e:
+            return _result(False, f"服务器内部错误：{str(e)}", status=HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    @staticmethod
+    def _encode(status: HTTPStatus, payload: Dict, keep_alive: bool) -> bytes:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        return head.encode("latin-1") + body
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """一个连接：读协程不断解析请求并开始处理，写协程按请求顺序写回响应（HTTP流水线）"""
+        pending: asyncio.Queue = asyncio.Queue(MAX_PIPELINE)
+        peer = writer.get_extra_info("peername")
+        client = str(peer[0]) if isinstance(peer, tuple) else str(peer)
+        running = []  # 已开始处理、可能尚未完成的请求
+
+        async def write_responses():
+            while True:
+                item = await pending.get()
+                if item is None:
+                    return
+                task, keep_alive = item
+                status, payload = await task
+                writer.write(self._encode(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    return
+
+        writer_task = asyncio.create_task(write_responses())
+        try:
+            while not writer_task.done():
+                try:
+                    request = await self._read_request(reader, client)
+                except HttpError as e:
+                    error = asyncio.get_running_loop().create_future()
+                    error.set_result(_result(False, e.message, status=e.status))
+                    await pending.put((error, False))  # 返回错误后关闭连接
+                    break
+                if request is None:
+                    break
+                running = [task for task in running if not task.done()]
+                if request.method not in SAFE_METHODS and running:
+                    await asyncio.wait(running)
+                task = asyncio.create_task(self._handle(request))
+                running.append(task)
+                await pending.put((task, request.keep_alive))
+                if request.method not in SAFE_METHODS:
+                    await asyncio.wait([task])
+                if not request.keep_alive:
+                    break
+            if not writer_task.done():
+                await pending.put(None)
+            await writer_task
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass  # 服务停止时取消的连接直接关闭，不再向上抛出
+        finally:
+            writer_task.cancel()
+            writer.close()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        print(f"商城API服务已启动：http://{host}:{port}（Ctrl+C 停止）")
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="商城系统HTTP/JSON接口服务")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=EXECUTOR_WORKERS, help="业务线程数")
+    args = parser.parse_args()
+
+    mall_system = MallSystem()
+    api_server = ApiServer(MallApi(mall_system), args.workers)
+    try:
+        asyncio.run(api_server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api_server.close()
+        mall_system.exit_system()  # 写入未落盘的变更并自动备份
@@ -0,0 +1,32 @@
+from typing import List
+import argparse
+import getpass
+import sys
+from service.mall_service import MallSystem
+
+
+def show_import_result(success: bool, msg: str, errors: List[str]) -> None:
+    """显示导入结果：提示信息（服务层已带“成功导入”/“导入失败：”）+逐行错误"""
+    print(msg)
+    # 导入成功时的错误行是按--skip-invalid跳过的行
+    label = "已跳过" if success else "无效数据"
+    for error in errors:
+        print(f"  {label}：{error}")
+
+
+if __name__ == "__main__":
+    # 用法：python -m view.import_products products.csv --user lsl [--skip-invalid]
+    parser = argparse.ArgumentParser(description="从CSV批量导入商品")
+    parser.add_argument("csv_path", help="CSV文件（表头：product_id,name,category,price,stock）")
+    parser.add_argument("--user", required=True, help="管理员用户名")
+    parser.add_argument("--skip-invalid", action="store_true", help="跳过错误行（默认有任何错误都不导入）")
+    args = parser.parse_args()
+
+    mall_system = MallSystem()
+    token = mall_system.login(args.user, getpass.getpass("密码："))
+    if not token:
+        sys.exit("登录失败：用户名或密码错误")
+    result = mall_system.bulk_import_products(token, args.csv_path, args.skip_invalid)
+    show_import_result(*result)
+    mall_system.exit_system()
+    sys.exit(0 if result[0] else 1)
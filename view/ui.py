@@ -35,19 +35,22 @@ def get_product_input() -> Tuple[str, str, str, str, str]:
     stock = input("请输入库存数量（>0）：").strip()
     return product_id, name, category, price, stock
 
-def show_products(products: List[Product]) -> None:
-    """显示所有商品：表格格式"""
+def show_products(products: List[Product], page_size: int = 20) -> None:
+    """显示所有商品：表格格式，每page_size个暂停一次（回车继续，输入q结束显示）"""
     print("\n===== 所有商品信息 =====")
     if not products:
         print("系统中暂无商品信息！")
         return
-    # 表头
-    print(f"{'商品编号':<12} {'商品名称':<15} {'分类':<10} {'单价（元）':<12} {'库存':<8} {'总价值（元）':<12}")
-    print("-" * 70)
-    # 商品数据
-    for prod in products:
-        print(f"{prod.product_id:<12} {prod.name:<15} {prod.category:<10} "
-              f"{prod.price:<12.2f} {prod.stock:<8} {prod.total_value:<12.2f}")
+    for start in range(0, len(products), page_size):
+        if start and input(f"已显示{start}/{len(products)}个，回车继续，q结束：").strip().lower() == "q":
+            return
+        # 表头
+        print(f"{'商品编号':<12} {'商品名称':<15} {'分类':<10} {'单价（元）':<12} {'库存':<8} {'总价值（元）':<12}")
+        print("-" * 70)
+        # 商品数据
+        for prod in products[start:start + page_size]:
+            print(f"{prod.product_id:<12} {prod.name:<15} {prod.category:<10} "
+                  f"{prod.price:<12.2f} {prod.stock:<8} {prod.total_value:<12.2f}")
 
 def get_delete_product_input() -> str:
     """获取删除商品输入：返回商品编号"""